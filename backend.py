@@ -0,0 +1,148 @@
+# Execution backends for the data-level transforms: projection, deduplication, explosion, group counts
+# and join counting. The pandas backend runs the numpy/pandas code paths of encoding.py, mvd.py and
+# exploder.py; the arrow backend runs the same operations on the factorized codes with Apache Arrow.
+# Both return the same rows in the same order, so every normalization result matches across backends.
+# The arrow backend is experimental: pyarrow is optional, and on few cores its hash grouping is slower
+# than sorting packed int64 keys, so pandas stays the default.
+import os
+import schema  # Lazy module loader, keeping numpy, pandas and pyarrow out of the schema-only startup
+encoding = schema.lazy_import("encoding")  # Factorized integer codes shared by both backends
+exploder = schema.lazy_import("exploder")  # Offsets-based cross-product explosion
+
+# Backend of the current run; NORMALIZER_BACKEND sets the initial one
+_settings = {"backend": os.environ.get("NORMALIZER_BACKEND", "pandas")}
+_INSTANCES = {}  # name -> backend object, created on first use
+
+
+class PandasBackend:
+    # numpy sorting and pandas hashing on factorized codes (see encoding.py)
+    name = "pandas"
+
+    def group_ids(self, encoded, columns, n_rows):
+        # Dense group number for every row over columns, numbered in the order of the tuples' codes.
+        # Returns:
+        #     tuple: (int64 array of group ids in [0, n_groups), n_groups)
+        return encoding.group_ids(encoded, columns, n_rows)
+
+    def distinct_rows(self, encoded, columns, n_rows):
+        # Position of the first row of every distinct tuple over columns, in group-id order
+        return encoding.distinct_rows(encoded, columns, n_rows)
+
+    def distinct_per_group(self, encoded, columns, group, n_groups, n_rows):
+        # Number of distinct tuples over columns inside each group of the int64 array group
+        import numpy as np  # Only needed once rows are grouped
+        return np.bincount(group[self.distinct_rows(encoded, columns, n_rows)], minlength=n_groups)
+
+    def project(self, relation, columns):
+        # Distinct projection of a DataFrame or encoded relation, in the original row order
+        return encoding.distinct_projection(relation, columns)
+
+    def explode(self, relation, columns, chunk_rows):
+        # Cross-product explosion of the multi-valued columns, as DataFrames of about chunk_rows rows
+        return exploder.iter_exploded(relation, columns, chunk_rows)
+
+
+class ArrowBackend(PandasBackend):
+    # Arrow hash grouping over zero-copy views of the code arrays; grouping and deduplication run
+    # on Arrow's thread pool. Results are put back in group-id order, so they match the pandas backend.
+    name = "arrow"
+
+    def __init__(self):
+        self.pa, self.pc = _arrow()
+
+    def _table(self, encoded, columns, extra=None):
+        # Arrow table over the code arrays of columns (int64 arrays without nulls are not copied)
+        arrays = {col: self.pa.array(encoded[col][0]) for col in columns}
+        arrays.update(extra or {})
+        return self.pa.table(arrays)
+
+    def group_ids(self, encoded, columns, n_rows):
+        import numpy as np
+        columns = list(columns)
+        if len(columns) <= 1:
+            return encoding.group_ids(encoded, columns, n_rows)  # Factorized codes are already dense
+        combined, _ = encoding.combine_codes([encoded[col][0] for col in columns], [encoded[col][1] for col in columns])
+        encoded_keys = self.pc.dictionary_encode(self.pa.array(combined))  # Hash table, no sort of every row
+        uniques = encoded_keys.dictionary.to_numpy()
+        rank = np.empty(len(uniques), dtype=np.int64)
+        rank[np.argsort(uniques)] = np.arange(len(uniques))  # Only the distinct keys are sorted
+        return rank[encoded_keys.indices.to_numpy()], len(uniques)
+
+    def distinct_rows(self, encoded, columns, n_rows):
+        import numpy as np
+        columns = list(columns)
+        if not columns:
+            return np.zeros(min(n_rows, 1), dtype=np.int64)
+        table = self._table(encoded, columns, {"__row": self.pa.array(np.arange(n_rows))})
+        groups = table.group_by(columns, use_threads=True).aggregate([("__row", "min")])
+        order = np.lexsort([groups[col].to_numpy() for col in reversed(columns)])  # Group-id order
+        return groups["__row_min"].to_numpy()[order]
+
+    def distinct_per_group(self, encoded, columns, group, n_groups, n_rows):
+        import numpy as np
+        columns = list(columns)
+        table = self._table(encoded, columns, {"__group": self.pa.array(group)})
+        distinct = table.group_by(["__group"] + columns, use_threads=True).aggregate([])
+        return np.bincount(distinct["__group"].to_numpy(), minlength=n_groups)
+
+    def project(self, relation, columns):
+        return encoding.distinct_projection(relation, columns, dedup=self.distinct_rows)
+
+    def explode(self, relation, columns, chunk_rows):
+        return exploder.iter_exploded(relation, columns, chunk_rows, flatten=self._flatten)
+
+    def _flatten(self, series):
+        # exploder.flatten_column on an Arrow list array: the values, offsets and lengths come from
+        # its buffers instead of a pass over the Python lists. Columns that are not all lists of one
+        # type (atomic values, sets, mixed numbers and strings) go through exploder.flatten_column.
+        import numpy as np
+        try:
+            lists = self.pa.array(series, from_pandas=True)
+        except (self.pa.ArrowInvalid, self.pa.ArrowTypeError, TypeError):
+            return exploder.flatten_column(series)
+        if isinstance(lists, self.pa.ChunkedArray):
+            lists = lists.combine_chunks()  # Very large columns come back in chunks
+        if not (self.pa.types.is_list(lists.type) or self.pa.types.is_large_list(lists.type)) or lists.null_count:
+            return exploder.flatten_column(series)
+        flat = self.pc.list_flatten(lists)
+        values = np.empty(len(flat) + 1, dtype=object)  # The last slot is the missing value of empty lists
+        values[:-1] = flat.to_numpy(zero_copy_only=False)
+        values[:-1][flat.is_null().to_numpy(zero_copy_only=False)] = np.nan
+        values[-1] = np.nan
+        counts = self.pc.list_value_length(lists).to_numpy(zero_copy_only=False).astype(np.int64)
+        offsets = lists.offsets.to_numpy().astype(np.int64)
+        starts = offsets[:-1] - offsets[0]
+        starts[counts == 0] = len(flat)  # explode keeps one (missing) row for an empty list
+        return values, starts, np.maximum(counts, 1)
+
+
+_BACKENDS = {"pandas": PandasBackend, "arrow": ArrowBackend}
+
+
+def _arrow():
+    # pyarrow and pyarrow.compute, or an ImportError saying how to get them
+    try:
+        import pyarrow
+        import pyarrow.compute
+    except ImportError as error:
+        raise ImportError("The arrow backend needs pyarrow (pip install pyarrow)") from error
+    return pyarrow, pyarrow.compute
+
+
+def configure(name):
+    # Selects the backend ("pandas" or "arrow") of later calls; fails right away if it can not be loaded
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown backend: {name}")
+    if name == "arrow":
+        _arrow()
+    _settings["backend"] = name
+
+
+def current():
+    # The selected backend object
+    name = _settings["backend"]
+    if name not in _INSTANCES:
+        if name not in _BACKENDS:
+            raise ValueError(f"Unknown backend: {name}")
+        _INSTANCES[name] = _BACKENDS[name]()
+    return _INSTANCES[name]
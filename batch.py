@@ -0,0 +1,171 @@
+# Non-interactive batch runner: normalizes every table of a JSON manifest in a process pool
+#
+# The manifest is a JSON list of jobs (or an object with a "jobs" list), for example
+#     [{"name": "employees", "table": "employees.csv", "fds": "employees_fds.txt",
+#       "mvds": "employees_mvds.txt", "key": "employees_key.txt", "target": "4NF"}]
+# Paths are relative to the manifest. The fds and mvds files use the fds.txt format and the
+# "X ->> A, B" format, one dependency per line; without "fds" the FDs are mined from the table and
+# "mvds" is optional. The key file holds the comma-separated primary key, and "target" is the
+# normal form as 1-6 or its name. Each job writes <name>.sql (the DDL) and <name>.log (the stage
+# output) to the output directory, and the batch writes summary.json with the stage records of every job.
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+import traceback
+import backend
+import ddl
+import pipeline
+import schema
+import tracing
+store = schema.lazy_import("store")  # Spill-to-disk relation store, loaded only when a budget is set
+
+
+def _target(value):
+    # Step number of a normal form given as 1-6 or by name ("BCNF", "4NF", ...)
+    if isinstance(value, int) or str(value).isdigit():
+        step = int(value)
+    else:
+        steps = {name.lower(): number for number, name in pipeline.NORMAL_FORMS.items()}
+        step = steps.get(str(value).strip().lower())
+    if step not in pipeline.NORMAL_FORMS:
+        raise ValueError(f"Unknown target normal form: {value}")
+    return step
+
+
+def load_manifest(path):
+    # Reads the jobs of a manifest, resolving their paths and targets
+    with open(path, 'r') as file:
+        manifest = json.load(file)
+    entries = manifest["jobs"] if isinstance(manifest, dict) else manifest
+    base = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    for entry in entries:
+        job = dict(entry)
+        for field in ("table", "fds", "mvds", "key"):
+            if job.get(field):
+                job[field] = os.path.join(base, job[field])
+        job.setdefault("name", os.path.splitext(os.path.basename(job["table"]))[0])
+        job["target"] = _target(job.get("target", 6))
+        jobs.append(job)
+    names = [job["name"] for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("Job names must be unique, they name the output files")
+    return jobs
+
+
+def run_job(job, output_dir, schema_only=False, verbosity=tracing.MESSAGES, cache_dir=None, split_multivalued=False):
+    # Normalizes one table, writing its DDL and the printed stage output to the output directory.
+    # Returns:
+    #     dict: Summary of the job (name, status, target, highest normal form, tables, seconds, error).
+    start = time.perf_counter()
+    summary = {"name": job["name"], "status": "ok", "target": pipeline.NORMAL_FORMS[job["target"]],
+               "highest": None, "tables": 0, "seconds": 0.0, "error": None}
+    log_path = os.path.join(output_dir, job["name"] + ".log")
+    tracing.configure(verbosity=verbosity)  # Set in the worker process running the job
+    tracing.reset()  # Record the stages of this job only, even if it fails before normalizing
+    with open(log_path, 'w') as log, contextlib.redirect_stdout(log):
+        try:
+            step = job["target"]
+            fds = pipeline.read_fds(job["fds"]) if job.get("fds") else None
+            mvds = pipeline.read_mvds(job["mvds"]) if job.get("mvds") else {}
+            with open(job["key"], 'r') as file:
+                pk = pipeline.parse_key(file.read())
+            # Up to BCNF only the schema is needed, unless the FDs have to be mined from the rows
+            job_schema_only = schema_only and fds is not None and step < 5
+            if job_schema_only:
+                table = schema.SchemaRelation(schema.read_header(job["table"]))
+            else:
+                table = pipeline.read_table(job["table"])
+            tracing.show(table, "Provided sample input Table:")
+
+            relations, highest_normal_form, fds = pipeline.normalize(table, fds, mvds, pk, step,
+                                                                     schema_only=job_schema_only, cache_dir=cache_dir,
+                                                                     split_multivalued=split_multivalued)
+            with tracing.stage("ddl", relations):
+                statements = ddl.generate_sql(relations, fds, step, pk)
+        except Exception as error:
+            traceback.print_exc(file=log)
+            summary.update(status="failed", error=f"{type(error).__name__}: {error}")
+        else:
+            with open(os.path.join(output_dir, job["name"] + ".sql"), 'w') as file:
+                file.write("\n".join(statements) + "\n")
+            summary.update(highest=pipeline.NORMAL_FORMS.get(highest_normal_form), tables=len(statements))
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    summary["stages"] = tracing.records()  # Per-stage time, rows, relations, closure calls and peak memory
+    return summary
+
+
+def _progress_line(done, total, summary):
+    if summary["status"] != "ok":
+        return f"[{done}/{total}] {summary['name']}: failed ({summary['error']})"
+    return (f"[{done}/{total}] {summary['name']}: {summary['tables']} tables for {summary['target']}, "
+            f"highest {summary['highest'] or 'none'} ({summary['seconds']}s)")
+
+
+def run_batch(jobs, output_dir, workers=None, schema_only=False, progress=print, verbosity=tracing.MESSAGES,
+              cache_dir=None, split_multivalued=False):
+    # Runs every job in a process pool, reporting each one as it finishes.
+    # Args:
+    #     jobs (list): Jobs as returned by load_manifest.
+    #     output_dir (str): Directory for the .sql and .log files and summary.json.
+    #     workers (int): Worker processes; defaults to the number of CPUs, 1 runs the jobs in this process.
+    #     schema_only (bool): Normalize jobs targeting 1NF-BCNF from the csv header only.
+    #     progress (callable): Called with one line of text per finished job.
+    #     verbosity (int): Tracing verbosity of the .log files; the default never formats relations.
+    #     cache_dir (str): Result cache directory shared by the jobs (see result_cache.py), None to disable.
+    #     split_multivalued (bool): 1NF puts each multi-valued column in its own relation with the key.
+    # Returns:
+    #     list: The job summaries, in manifest order.
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    summaries = [None] * len(jobs)
+    if workers == 1 or len(jobs) <= 1:
+        for done, (index, job) in enumerate(enumerate(jobs), 1):
+            summaries[index] = run_job(job, output_dir, schema_only, verbosity, cache_dir, split_multivalued)
+            progress(_progress_line(done, len(jobs), summaries[index]))
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(min(workers, len(jobs))) as pool:
+            futures = {pool.submit(run_job, job, output_dir, schema_only, verbosity, cache_dir, split_multivalued): index
+                       for index, job in enumerate(jobs)}
+            for done, future in enumerate(as_completed(futures), 1):
+                index = futures[future]
+                summaries[index] = future.result()
+                progress(_progress_line(done, len(jobs), summaries[index]))
+    with open(os.path.join(output_dir, "summary.json"), 'w') as file:
+        json.dump(summaries, file, indent=2)
+    return summaries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Normalize every table of a JSON job manifest without prompts.")
+    parser.add_argument("manifest", help="JSON list of jobs with table, fds, mvds, key and target")
+    parser.add_argument("--output-dir", default="ddl", help="directory for the .sql and .log files of every job")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: number of CPUs)")
+    parser.add_argument("--schema-only", action="store_true", help="normalize 1NF-BCNF targets from the csv header only")
+    parser.add_argument("--split-multivalued", action="store_true", help="put each multi-valued column in its own 1NF relation with the primary key")
+    parser.add_argument("--verbosity", type=int, choices=[0, 1, 2], default=1, help="log detail: 0 quiet, 1 messages, 2 also relations")
+    parser.add_argument("--result-cache", default=os.environ.get("NORMALIZER_CACHE_DIR"), help="reuse results of identical earlier jobs stored in this directory")
+    parser.add_argument("--spill-mb", type=float, default=None, help="memory budget of the decomposed relations of each job; the rest is spilled to disk")
+    parser.add_argument("--backend", choices=["pandas", "arrow"], default=os.environ.get("NORMALIZER_BACKEND", "pandas"), help="engine of the data-level transforms (arrow is experimental)")
+    parser.add_argument("--trace-memory", action="store_true", help="record the peak memory of every stage in summary.json (slows the jobs down)")
+    args = parser.parse_args(argv)
+    backend.configure(args.backend)  # Forked workers inherit the selection
+    tracing.configure(memory=args.trace_memory or None)  # And the tracing of allocations
+    if args.spill_mb is not None:
+        store.configure(budget_mb=args.spill_mb)
+
+    jobs = load_manifest(args.manifest)
+    summaries = run_batch(jobs, args.output_dir, args.workers, args.schema_only,
+                          progress=lambda line: print(line, flush=True), verbosity=args.verbosity,
+                          cache_dir=args.result_cache, split_multivalued=args.split_multivalued)
+    failed = sum(summary["status"] != "ok" for summary in summaries)
+    print(f"{len(summaries) - failed} of {len(summaries)} tables normalized, output in {args.output_dir}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
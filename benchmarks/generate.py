@@ -0,0 +1,120 @@
+# Synthetic workloads for the benchmarks: relations with planted FDs, MVDs, join dependencies and
+# multi-valued columns, at any row and attribute count
+import argparse
+import os
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+# A generated relation with the dependencies planted in it, in the forms used by normalizer.py
+Workload = namedtuple("Workload", "table fds mvds pk")
+
+_TAG_LISTS = 256  # Distinct comma-separated lists a multi-valued column draws from
+_TAG_POOL = 50  # Distinct values inside those lists
+
+
+def _tag_lists(rng, list_length):
+    # The comma-separated value lists of a multi-valued column, 1 to list_length distinct tags each
+    lists = []
+    for _ in range(_TAG_LISTS):
+        size = int(rng.integers(1, list_length + 1))
+        tags = rng.choice(_TAG_POOL, size=size, replace=False)
+        lists.append(", ".join(f"t{tag}" for tag in tags))
+    return np.array(lists, dtype=object)
+
+
+def generate_workload(n_rows, n_attributes, n_multivalued=2, list_length=3, seed=0):
+    # Generates one relation with planted dependencies.
+    # Column K numbers the rows and determines everything else. The other single-valued columns come in
+    # blocks: a determinant D<i> drawn at random per row, followed by up to three columns computed from
+    # it (D<i> -> D<i>_A<j>), which become transitive dependencies of K. Each multi-valued column M<i>
+    # holds comma-separated lists, so after 1NF K ->> M<i> holds and K is no longer a key.
+    # 3NF synthesis puts the multi-valued columns in one key relation (K, M0, M1, ...). With a single
+    # multi-valued column that relation is (K, M0) and K ->> M0 is trivial in it, so 4NF only has
+    # something to split with two or more of them.
+    # Args:
+    #     n_rows (int): Rows before 1NF flattening.
+    #     n_attributes (int): Columns, K and the multi-valued columns included (at least 2).
+    #     n_multivalued (int): Multi-valued columns; 4NF splits nothing with fewer than 2.
+    #     list_length (int): Largest number of values in one multi-valued cell.
+    #     seed (int): Random seed; the same arguments always give the same workload.
+    # Returns:
+    #     Workload: (DataFrame as read from a csv file, fds, mvds, primary key)
+    rng = np.random.default_rng(seed)
+    n_multivalued = min(n_multivalued, max(0, n_attributes - 2))
+    columns = {"K": np.arange(n_rows)}
+    fds = {("K",): []}
+
+    remaining = n_attributes - 1 - n_multivalued
+    block = 0
+    while remaining > 0:
+        determinant = f"D{block}"
+        cardinality = max(2, n_rows // 10 ** (block % 3 + 1))  # Mix of low and high cardinality determinants
+        values = rng.integers(0, cardinality, n_rows)
+        columns[determinant] = values
+        fds[("K",)].append(determinant)
+        dependents = []
+        for j in range(min(3, remaining - 1)):
+            dependent = f"D{block}_A{j}"
+            columns[dependent] = (values * (j + 7) + block) % max(2, cardinality // (j + 2))  # A function of D<i>
+            dependents.append(dependent)
+        if dependents:
+            fds[(determinant,)] = dependents
+        remaining -= 1 + len(dependents)
+        block += 1
+
+    mvds = {}
+    for i in range(n_multivalued):
+        column = f"M{i}"
+        columns[column] = _tag_lists(rng, list_length)[rng.integers(0, _TAG_LISTS, n_rows)]
+        mvds.setdefault(("K",), []).append(column)
+
+    if not fds[("K",)]:
+        del fds[("K",)]
+    return Workload(pd.DataFrame(columns), fds, mvds, ("K",))
+
+
+def generate_join_dependency(n_rows, seed=0):
+    # Generates a relation over A, B, C that is exactly the join of random projections AB, BC and CA,
+    # so the join dependency *(AB, BC, CA) holds, with about n_rows rows.
+    rng = np.random.default_rng(seed)
+    domain = max(2, 2 * int(np.ceil(n_rows ** (1 / 3))))
+    density = min(1.0, (n_rows / domain ** 3) ** (1 / 3))  # Expected join size: domain^3 * density^3
+
+    def pairs(left, right):
+        mask = rng.random((domain, domain)) < density
+        first, second = np.nonzero(mask)
+        return pd.DataFrame({left: [f"{left.lower()}{value}" for value in first],
+                             right: [f"{right.lower()}{value}" for value in second]})
+
+    joined = pairs("A", "B").merge(pairs("B", "C"), on="B").merge(pairs("C", "A"), on=["C", "A"])
+    return joined[["A", "B", "C"]].reset_index(drop=True)
+
+
+def write_workload(directory, workload, name="table"):
+    # Writes a workload as <name>.csv, <name>_fds.txt, <name>_mvds.txt and <name>_key.txt, the inputs of
+    # main.py and of a batch.py manifest entry
+    os.makedirs(directory, exist_ok=True)
+    workload.table.to_csv(os.path.join(directory, f"{name}.csv"), index=False)
+    with open(os.path.join(directory, f"{name}_fds.txt"), 'w') as file:
+        for lhs, rhs in workload.fds.items():
+            file.write(f"{', '.join(lhs)} -> {', '.join(rhs)}\n")
+    with open(os.path.join(directory, f"{name}_mvds.txt"), 'w') as file:
+        for lhs, rhs in workload.mvds.items():
+            file.write(f"{', '.join(lhs)} ->> {', '.join(rhs)}\n")
+    with open(os.path.join(directory, f"{name}_key.txt"), 'w') as file:
+        file.write(", ".join(workload.pk) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic workload for main.py or batch.py.")
+    parser.add_argument("directory", help="output directory")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--attributes", type=int, default=10)
+    parser.add_argument("--multivalued", type=int, default=2)
+    parser.add_argument("--list-length", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--name", default="table")
+    args = parser.parse_args()
+    write_workload(args.directory, generate_workload(args.rows, args.attributes, args.multivalued,
+                                                     args.list_length, args.seed), args.name)
@@ -0,0 +1,203 @@
+# Benchmark suite: times and memory-profiles every normalizer stage on synthetic workloads and appends
+# the results to a JSON Lines file, one record per workload, so runs can be compared over time.
+#
+#     python benchmarks/run.py --rows 1000 100000 --attributes 10 50
+#     python benchmarks/run.py --rows 100000 --baseline benchmarks/results.jsonl
+#     python benchmarks/run.py --rows 100000 --backend arrow --baseline benchmarks/results.jsonl
+import argparse
+from collections.abc import Mapping
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # The normalizer modules
+import numpy as np
+import pandas as pd
+import backend
+import ddl
+import encoding
+import ingest
+import normalizer
+import plan
+import tracing
+import generate
+
+STAGES = ["1NF", "2NF", "3NF", "BCNF", "4NF", "5NF", "closure", "ddl", "5NF-jd"]
+CLOSURE_QUERIES = 1000  # Random attribute sets whose closure the closure stage computes
+
+
+def _stage_functions(workload, seed):
+    # Each stage takes the output of the previous one (closure passes its input through)
+    pk, fds, mvds = workload.pk, workload.fds, workload.mvds
+
+    def first_normal_form(table):
+        relations = normalizer.transform_to_1NF(ingest.parse_multivalued(table), pk, chunk_rows=100000)[0]
+        return {name: encoding.encode_relation(rel) for name, rel in relations.items()}
+
+    def closures(relations):
+        rng = random.Random(seed)
+        attributes = list(workload.table.columns)
+        for _ in range(CLOSURE_QUERIES):
+            normalizer.attribute_closure(set(rng.sample(attributes, rng.randint(1, min(3, len(attributes))))), fds)
+        return relations
+
+    def join_dependency(_):
+        table = generate.generate_join_dependency(len(workload.table), seed)
+        return normalizer.transform_to_5NF({("A", "B", "C"): encoding.encode_relation(table)}, ("A", "B", "C"), {})[0]
+
+    return {
+        "1NF": first_normal_form,
+        "2NF": lambda relations: normalizer.transform_to_2NF(relations, pk, fds)[0],
+        "3NF": lambda relations: normalizer.transform_to_3NF(relations, fds)[0],
+        "BCNF": lambda relations: normalizer.transform_to_BCNF(relations, pk, fds)[0],
+        "4NF": lambda relations: normalizer.transform_to_4NF(relations, mvds)[0],
+        "5NF": lambda relations: normalizer.transform_to_5NF(relations, pk, fds)[0],
+        "closure": closures,
+        "ddl": lambda relations: ddl.generate_sql(relations, fds, 6, pk),
+        "5NF-jd": join_dependency,
+    }
+
+
+def _materialize(output):
+    # Computes the rows of the lazy relations a stage returns (2NF-4NF only plan their projections)
+    if isinstance(output, Mapping):
+        plan.materialize_all(output)
+
+
+def _measure(func, value, repeat, memory):
+    # Runs one stage repeat times, then once more under tracemalloc for its peak allocation.
+    # Every run includes materializing the stage's output, which is where the lazy stages project their
+    # tables; that part is also reported on its own. The output passed on stays lazy, as in the pipeline.
+    # The first timed run is the cold one; later runs and the traced run reuse the per-relation caches.
+    seconds, materialize = [], []
+    output = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):  # The stages print their relations
+            start = time.perf_counter()
+            output = func(value)
+            planned = time.perf_counter()
+            _materialize(output)
+            end = time.perf_counter()
+            seconds.append(round(end - start, 6))
+            materialize.append(round(end - planned, 6))
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            _materialize(func(value))
+        peak_mb = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 3)
+        tracemalloc.stop()
+    return output, {"seconds": seconds, "best": min(seconds), "materialize": materialize[seconds.index(min(seconds))],
+                    "peak_mb": peak_mb}
+
+
+def _size(value):
+    # Rows and relations of a stage output, for the record (the output was materialized by _measure)
+    if isinstance(value, Mapping):  # A dict, or a spill store
+        return {"relations": len(value), "rows": int(sum(len(rel) for rel in value.values()))}
+    if isinstance(value, pd.DataFrame):
+        return {"relations": 1, "rows": len(value)}
+    return {}
+
+
+def run_workload(n_rows, n_attributes, n_multivalued=2, list_length=3, seed=0, stages=STAGES, repeat=1, memory=True):
+    # Generates one workload and measures the selected stages on it, in pipeline order.
+    # Returns:
+    #     dict: The benchmark record (parameters, environment and per-stage measurements).
+    workload = generate.generate_workload(n_rows, n_attributes, n_multivalued, list_length, seed)
+    functions = _stage_functions(workload, seed)
+    value = workload.table
+    results = {}
+    for stage in STAGES:
+        if stage not in stages:
+            continue
+        value, result = _measure(functions[stage], value, repeat, memory)
+        result.update(_size(value))
+        results[stage] = result
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "backend": backend.current().name,
+        "params": {"rows": n_rows, "attributes": n_attributes, "multivalued": n_multivalued,
+                   "list_length": list_length, "seed": seed, "repeat": repeat},
+        "stages": results,
+    }
+
+
+def _commit():
+    # Current git commit of the normalizer, if it is a git checkout
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(record, baseline_path):
+    # Prints the best time of each stage against the latest baseline record with the same parameters,
+    # and flags stages whose output size differs (as when a backend returns other rows than the baseline's)
+    baseline = None
+    with open(baseline_path, 'r') as file:
+        for line in file:
+            previous = json.loads(line)
+            if previous["params"] == record["params"]:
+                baseline = previous
+    if baseline is None:
+        print(f"  no baseline with the same parameters in {baseline_path}")
+        return
+    for stage, result in record["stages"].items():
+        before = baseline["stages"].get(stage)
+        if before and before["best"] > 0:
+            print(f"  {stage}: {result['best']:.4f}s vs {before['best']:.4f}s ({result['best'] / before['best']:.2f}x)")
+        sizes = [(run.get("relations"), run.get("rows")) for run in (result, before or {})]
+        if before and sizes[0] != sizes[1]:
+            # Records written before the backends existed ran on pandas
+            print(f"  {stage}: output differs from the {baseline.get('backend', 'pandas')} baseline "
+                  f"(relations, rows) {sizes[0]} vs {sizes[1]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the normalizer stages on synthetic workloads.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000], help="rows per workload (1k-10M)")
+    parser.add_argument("--attributes", type=int, nargs="+", default=[10], help="columns per workload (5-200)")
+    parser.add_argument("--multivalued", type=int, default=2, help="multi-valued columns per workload (4NF splits nothing with fewer than 2)")
+    parser.add_argument("--list-length", type=int, default=3, help="largest number of values in a multi-valued cell")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES, help="stages to measure")
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per stage")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run of every stage")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.jsonl"),
+                        help="JSON Lines file the records are appended to")
+    parser.add_argument("--baseline", default=None, help="JSON Lines file of an earlier run to compare against")
+    parser.add_argument("--backend", choices=["pandas", "arrow"], default="pandas", help="execution backend of the stages")
+    args = parser.parse_args(argv)
+    backend.configure(args.backend)
+    tracing.configure(verbosity=tracing.QUIET)  # Measure the stages, not the formatting of their relations
+
+    for n_rows in args.rows:
+        for n_attributes in args.attributes:
+            record = run_workload(n_rows, n_attributes, args.multivalued, args.list_length, args.seed,
+                                  args.stages, args.repeat, not args.no_memory)
+            print(f"rows={n_rows} attributes={n_attributes} backend={record['backend']}")
+            for stage, result in record["stages"].items():
+                memory = f", peak {result['peak_mb']} MB" if result["peak_mb"] is not None else ""
+                projection = f" (projections {result['materialize']:.4f}s)" if result["materialize"] > 0.00005 else ""
+                print(f"  {stage}: {result['best']:.4f}s{projection}{memory}")
+            if args.baseline:
+                compare(record, args.baseline)
+            with open(args.output, 'a') as file:
+                file.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# Chase test for lossless-join decompositions, run on the schema (FDs and MVDs) without touching the data
+
+# Rows the tableau may grow to through MVD steps before the test gives up
+DEFAULT_MAX_ROWS = 100000
+
+
+def _as_columns(attributes, index):
+    # Column positions of attribute names, ignoring names outside the tableau
+    attributes = (attributes,) if isinstance(attributes, str) else attributes
+    return [index[attr] for attr in attributes if attr in index]
+
+
+def _rules(dependencies, index):
+    # (lhs columns, rhs columns) of the dependencies that hold on the tableau's attributes: a dependency
+    # whose LHS is not entirely inside says nothing about them (dropping the outside LHS attributes
+    # would make it stronger than declared), while one with an inside LHS holds for its inside RHS
+    rules = []
+    for lhs, rhs in (dependencies or {}).items():
+        lhs = (lhs,) if isinstance(lhs, str) else lhs
+        if all(attr in index for attr in lhs):
+            rules.append((_as_columns(lhs, index), _as_columns(rhs, index)))
+    return rules
+
+
+def _tableau(attributes, schemas):
+    # One row per schema: symbol 0 (distinguished) in the schema's own columns and a distinct
+    # non-distinguished symbol everywhere else. Symbols are only ever compared within a column, so
+    # row + 1 is distinct enough. Plain lists, as the tableau has one row per relation and the
+    # schema-only mode runs without numpy.
+    index = {attr: position for position, attr in enumerate(attributes)}
+    tableau = []
+    for row, schema in enumerate(schemas):
+        own = set(_as_columns(schema, index))
+        tableau.append([0 if col in own else row + 1 for col in range(len(attributes))])
+    return tableau, index
+
+
+def _groups(tableau, columns):
+    # The rows of the tableau grouped by their symbols in the given columns
+    groups = {}
+    for row in tableau:
+        groups.setdefault(tuple(row[col] for col in columns), []).append(row)
+    return list(groups.values())
+
+
+def _apply_fd(tableau, lhs, rhs):
+    # FD rule: rows that agree on lhs get equal rhs symbols. Symbols equated by overlapping groups are
+    # merged (union-find) and renamed to the smallest one (the distinguished 0 wins) in the whole column,
+    # as the chase equates symbols.
+    groups = [rows for rows in _groups(tableau, lhs) if len(rows) > 1]
+    if not groups:
+        return []  # No two rows agree on lhs
+    changed = []
+    for col in rhs:
+        parent = {}
+
+        def find(symbol):
+            while parent.get(symbol, symbol) != symbol:
+                symbol = parent[symbol]
+            return symbol
+
+        for rows in groups:
+            roots = {find(row[col]) for row in rows}
+            smallest = min(roots)
+            for root in roots:
+                if root != smallest:
+                    parent[root] = smallest
+        if not parent:
+            continue
+        for row in tableau:
+            row[col] = find(row[col])
+        changed.append(col)
+    return changed
+
+
+def _apply_mvd(tableau, lhs, rhs, max_rows):
+    # MVD rule: for rows t1, t2 agreeing on lhs, add the row with t1's lhs and rhs symbols and t2's others
+    n_cols = len(tableau[0]) if tableau else 0
+    rest = [col for col in range(n_cols) if col not in lhs and col not in rhs]
+    if not rhs or not rest:
+        return False  # Trivial MVD
+    existing = {tuple(row) for row in tableau}
+    new_rows = []
+    for rows in _groups(tableau, lhs):
+        if len(rows) < 2:
+            continue
+        rhs_parts = sorted({tuple(row[col] for col in rhs) for row in rows})
+        rest_parts = sorted({tuple(row[col] for col in rest) for row in rows})
+        for rhs_part in rhs_parts:
+            for rest_part in rest_parts:
+                row = list(rows[0])
+                for col, symbol in zip(rhs, rhs_part):
+                    row[col] = symbol
+                for col, symbol in zip(rest, rest_part):
+                    row[col] = symbol
+                if tuple(row) not in existing:
+                    existing.add(tuple(row))
+                    new_rows.append(row)
+                    if len(existing) > max_rows:
+                        raise OverflowError(f"Chase tableau grew beyond {max_rows} rows")
+    tableau.extend(new_rows)
+    return bool(new_rows)
+
+
+def _has_distinguished_row(tableau):
+    # Whether some row holds the distinguished symbol in every column
+    return any(not any(row) for row in tableau)
+
+
+def is_lossless(attributes, schemas, fds=None, mvds=None, max_rows=DEFAULT_MAX_ROWS):
+    # Chase test: the decomposition of attributes into schemas is lossless under the dependencies exactly
+    # when chasing the tableau produces a row of distinguished symbols only.
+    # Args:
+    #     attributes (iterable): The attributes of the decomposed relation.
+    #     schemas (iterable): The attribute lists of the relations of the decomposition.
+    #     fds (dict): Functional dependencies in the {tuple(lhs): [rhs]} form.
+    #     mvds (dict): Multi-valued dependencies in the same form (X ->> Y, with Z the remaining attributes).
+    #     max_rows (int): Bound on the tableau size; MVD steps can add rows.
+    # Returns:
+    #     bool: True if the decomposition is lossless, False if it is not, None if the bound was hit.
+    attributes = list(attributes)
+    schemas = [list(schema) for schema in schemas]
+    if not attributes:
+        return True
+    tableau, index = _tableau(attributes, schemas)
+    fd_rules = _rules(fds, index)
+    mvd_rules = _rules(mvds, index)
+    mvd_rules = [(lhs, [col for col in rhs if col not in lhs]) for lhs, rhs in mvd_rules]
+
+    # Worklist of the FDs to (re)apply: an FD can only fire again after a column of its lhs changed
+    rules_by_col = {}
+    for number, (lhs, _) in enumerate(fd_rules):
+        for col in lhs:
+            rules_by_col.setdefault(col, []).append(number)
+    pending = set(range(len(fd_rules)))
+    try:
+        while True:
+            while pending:
+                for number in sorted(pending):
+                    pending.discard(number)
+                    for col in _apply_fd(tableau, *fd_rules[number]):
+                        pending.update(rules_by_col.get(col, ()))
+                if _has_distinguished_row(tableau):
+                    return True
+            # MVD steps only once the FDs are exhausted, as they are the ones that grow the tableau
+            added = False
+            for lhs, rhs in mvd_rules:
+                added |= _apply_mvd(tableau, lhs, rhs, max_rows)
+            if not added:
+                return _has_distinguished_row(tableau)
+            pending = set(range(len(fd_rules)))
+    except OverflowError:
+        return None
+
+
+def verify_decomposition(before, after, fds=None, mvds=None, max_rows=DEFAULT_MAX_ROWS):
+    # Checks that the relations of one normalization stage (after) are a lossless decomposition of the
+    # relations it started from (before), as a decomposition of all their attributes.
+    # Args:
+    #     before, after (dict): name -> relation; only their columns are used.
+    # Returns:
+    #     bool or None: As is_lossless.
+    attributes = []
+    for relation in before.values():
+        attributes.extend(col for col in relation.columns if col not in attributes)
+    return is_lossless(attributes, [list(relation.columns) for relation in after.values()], fds, mvds, max_rows)
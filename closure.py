@@ -0,0 +1,184 @@
+# Bitset closure engine used by normalizer.py for attribute closures and superkey tests
+import copy
+import itertools
+import threading
+from collections import OrderedDict
+
+
+class ClosureEngine:
+    # Computes attribute closures in linear time (LinClosure) over a fixed set of functional dependencies.
+    # Attributes are encoded as bits of a Python int, every FD keeps a counter of the LHS attributes
+    # not yet in the closure, and each attribute indexes the FDs whose LHS mentions it.
+    # Args:
+    #     fds (dict): Functional dependencies in the {tuple(lhs): [rhs]} form used by normalizer.py,
+    #         or a list of (lhs, rhs) pairs when one LHS appears in several FDs.
+    #     attributes (iterable): Optional extra attributes (e.g. relation columns) to register up front.
+
+    def __init__(self, fds, attributes=()):
+        self.bit_of = {}  # attribute name -> bit position
+        self.names = []  # bit position -> attribute name
+        self.lhs_sizes = []  # number of distinct LHS attributes per FD
+        self.rhs_masks = []  # RHS bitmask per FD
+        self.fds_by_attr = []  # bit position -> indexes of FDs whose LHS contains that attribute
+        self.always = 0  # RHS of FDs with an empty LHS, part of every closure
+        self.empty_lhs = []  # indexes of the FDs with an empty LHS
+        self.number = None  # Set by get_engine; only numbered engines share the closure cache
+
+        for attr in attributes:
+            self._register(attr)
+        for lhs, rhs in (fds.items() if isinstance(fds, dict) else fds):
+            lhs = (lhs,) if isinstance(lhs, str) else lhs  # Accept single-attribute determinants
+            lhs_mask = self.encode(lhs)
+            rhs_mask = self.encode(rhs)
+            fd_index = len(self.rhs_masks)
+            self.rhs_masks.append(rhs_mask)
+            self.lhs_sizes.append(bin(lhs_mask).count("1"))
+            if not lhs_mask:
+                self.always |= rhs_mask
+                self.empty_lhs.append(fd_index)
+            for bit in self.bits(lhs_mask):
+                self.fds_by_attr[bit].append(fd_index)
+
+    def _register(self, attr):
+        # Assign the next free bit to an attribute that has not been seen yet. Engines from get_engine
+        # are shared by the executor's threads, so they add attributes under the cache lock.
+        bit = self.bit_of.get(attr)
+        if bit is not None:
+            return bit
+        if self.number is None:
+            return self._add(attr)
+        with _CACHE_LOCK:
+            return self.bit_of[attr] if attr in self.bit_of else self._add(attr)
+
+    def _add(self, attr):
+        # The attribute's bit is published last, so a reader that finds it also finds its FD index
+        self.names.append(attr)
+        self.fds_by_attr.append([])
+        self.bit_of[attr] = len(self.names) - 1
+        return self.bit_of[attr]
+
+    def encode(self, attributes):
+        # Convert an iterable of attribute names to a bitmask, registering unknown attributes
+        mask = 0
+        for attr in attributes:
+            mask |= 1 << self._register(attr)
+        return mask
+
+    def decode(self, mask):
+        # Convert a bitmask back to a set of attribute names
+        return {self.names[bit] for bit in self.bits(mask)}
+
+    @staticmethod
+    def bits(mask):
+        # Yield the positions of the set bits of mask, lowest first
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    def closure_mask(self, mask, disabled=()):
+        # LinClosure: every attribute entering the closure decrements the counters of the FDs it appears in,
+        # and an FD fires exactly once, when its counter reaches zero.
+        # FDs whose indexes are in disabled never fire (used to test whether an FD is redundant).
+        # Closures of cached engines are memoized in the shared LRU cache, keyed by (engine number, mask).
+        _STATS["closure_calls"] += 1
+        if self.number is None or disabled:
+            return self._linclosure(mask, disabled)
+        key = (self.number, mask)
+        with _CACHE_LOCK:
+            closure = _CLOSURE_CACHE.get(key)
+            if closure is not None:
+                _CLOSURE_CACHE.move_to_end(key)
+                _STATS["closure_hits"] += 1
+                return closure
+        closure = self._linclosure(mask, disabled)
+        with _CACHE_LOCK:
+            _STATS["closure_misses"] += 1
+            _CLOSURE_CACHE[key] = closure
+            if len(_CLOSURE_CACHE) > _CLOSURE_CACHE_SIZE:
+                _CLOSURE_CACHE.popitem(last=False)  # Evict the least recently used closure
+        return closure
+
+    def _linclosure(self, mask, disabled):
+        always = self.always
+        if disabled:
+            always = 0
+            for fd_index in self.empty_lhs:
+                if fd_index not in disabled:
+                    always |= self.rhs_masks[fd_index]
+        closure = mask | always
+        counters = self.lhs_sizes.copy()
+        pending = list(self.bits(closure))  # Attributes whose FDs have not been visited yet
+        while pending:
+            for fd_index in self.fds_by_attr[pending.pop()]:
+                counters[fd_index] -= 1
+                if counters[fd_index] == 0 and fd_index not in disabled:
+                    new_attrs = self.rhs_masks[fd_index] & ~closure
+                    if new_attrs:
+                        closure |= new_attrs
+                        pending.extend(self.bits(new_attrs))
+        return closure
+
+    def closure(self, attributes):
+        # Determine the closure of a set of attribute names
+        return self.decode(self.closure_mask(self.encode(attributes)))
+
+    def is_superkey(self, attributes, relation_attributes):
+        # Check if the closure of attributes covers every attribute of the relation
+        relation_mask = self.encode(relation_attributes)
+        return relation_mask & ~self.closure_mask(self.encode(attributes)) == 0
+
+
+# Closure requests of all engines and their cache hits and misses, read by the stage instrumentation in tracing.py
+_STATS = {"closure_calls": 0, "closure_hits": 0, "closure_misses": 0}
+
+# Closures of the engines returned by get_engine, keyed by (engine number, attribute bitmask), so the
+# superkey tests of 3NF, BCNF, key discovery and DDL generation share results across stages and calls
+_CLOSURE_CACHE = OrderedDict()
+_CLOSURE_CACHE_SIZE = 1 << 16
+_CACHE_LOCK = threading.Lock()  # Relations may be checked from several threads (see executor.py)
+
+
+def stats():
+    # Counters of this process: closure_calls, closure_hits, closure_misses
+    return dict(_STATS)
+
+
+# Engines built for recently seen FD sets, so repeated closure calls reuse the same index
+_ENGINE_CACHE = OrderedDict()
+_ENGINE_CACHE_SIZE = 32
+# Numbers the engines, so a rebuilt engine (whose bit layout may differ) never reads its predecessor's closures
+_ENGINE_NUMBERS = itertools.count()
+# FD dicts recently passed to get_engine: id -> (the dict, a copy of it, its engine). A dict seen before is
+# answered by identity without building its fingerprint; the copy catches dicts changed in place since.
+_ENGINES_BY_ID = OrderedDict()
+
+
+def fd_fingerprint(fds):
+    # Hashable representation of an FD dict, used as the cache key for its engine
+    return tuple(((lhs,) if isinstance(lhs, str) else tuple(lhs), tuple(rhs)) for lhs, rhs in fds.items())
+
+
+def get_engine(fds):
+    # Return the closure engine for an FD set, building and caching it on first use
+    with _CACHE_LOCK:
+        seen = _ENGINES_BY_ID.get(id(fds))  # The entry holds the dict, so its id is not reused meanwhile
+        if seen is not None and seen[1] == fds:
+            _ENGINES_BY_ID.move_to_end(id(fds))
+            return seen[2]
+    key = fd_fingerprint(fds)
+    with _CACHE_LOCK:
+        engine = _ENGINE_CACHE.get(key)
+        if engine is None:
+            engine = ClosureEngine(fds)
+            engine.number = next(_ENGINE_NUMBERS)
+            _ENGINE_CACHE[key] = engine
+            if len(_ENGINE_CACHE) > _ENGINE_CACHE_SIZE:
+                _ENGINE_CACHE.popitem(last=False)  # Evict the least recently used engine
+        else:
+            _ENGINE_CACHE.move_to_end(key)
+        _ENGINES_BY_ID[id(fds)] = (fds, {lhs: copy.copy(rhs) for lhs, rhs in fds.items()}, engine)
+        _ENGINES_BY_ID.move_to_end(id(fds))
+        if len(_ENGINES_BY_ID) > _ENGINE_CACHE_SIZE:
+            _ENGINES_BY_ID.popitem(last=False)
+    return engine
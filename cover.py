@@ -0,0 +1,101 @@
+# Minimal (canonical) cover of functional dependencies and Bernstein 3NF synthesis, on bitset closures
+import closure
+
+
+def _names(engine, mask):
+    # Attribute names of a bitmask, in the order the engine first saw them
+    return [engine.names[bit] for bit in engine.bits(mask)]
+
+
+def minimal_cover(fds):
+    # Computes a minimal cover: single-attribute dependents, no extraneous LHS attribute and no redundant FD.
+    # Args:
+    #     fds (dict): Functional dependencies in the {tuple(lhs): [rhs]} form.
+    # Returns:
+    #     dict: The cover in the same form, with the dependents of a remaining LHS grouped again.
+    engine = closure.ClosureEngine(fds)
+
+    # Split the right-hand sides into single attributes, dropping trivial and repeated dependencies
+    unit_fds = []
+    for lhs, rhs in fds.items():
+        lhs_mask = engine.encode((lhs,) if isinstance(lhs, str) else lhs)
+        for attr in rhs:
+            rhs_bit = engine.encode([attr])
+            if not rhs_bit & lhs_mask and (lhs_mask, rhs_bit) not in unit_fds:
+                unit_fds.append((lhs_mask, rhs_bit))
+
+    # Remove extraneous LHS attributes: A is extraneous in X -> B when B is in the closure of X - A.
+    # Every reduction keeps the FD set equivalent, so the closures of the original FDs stay valid.
+    reduced = []
+    for lhs_mask, rhs_bit in unit_fds:
+        for bit in engine.bits(lhs_mask):
+            smaller = lhs_mask & ~(1 << bit)
+            if engine.closure_mask(smaller) & rhs_bit:
+                lhs_mask = smaller
+        if (lhs_mask, rhs_bit) not in reduced:
+            reduced.append((lhs_mask, rhs_bit))
+
+    # Drop redundant FDs: X -> B is redundant when B is in the closure of X under the FDs still kept
+    pairs = [(_names(engine, lhs_mask), _names(engine, rhs_bit)) for lhs_mask, rhs_bit in reduced]
+    unit_engine = closure.ClosureEngine(pairs)
+    removed = set()
+    for fd_index, (lhs, rhs) in enumerate(pairs):
+        removed.add(fd_index)
+        if not unit_engine.closure_mask(unit_engine.encode(lhs), removed) & unit_engine.encode(rhs):
+            removed.discard(fd_index)  # Needed to derive rhs, so keep it
+
+    cover = {}
+    for fd_index, (lhs, rhs) in enumerate(pairs):
+        if fd_index not in removed:
+            cover.setdefault(tuple(lhs), []).extend(rhs)
+    return cover
+
+
+def _one_key(engine, relation_mask):
+    # One candidate key, by dropping every attribute whose removal keeps a superkey (linear in the
+    # attributes, where enumerating all keys is exponential)
+    key_mask = relation_mask
+    for bit in engine.bits(relation_mask):
+        smaller = key_mask & ~(1 << bit)
+        if relation_mask & ~engine.closure_mask(smaller) == 0:
+            key_mask = smaller
+    return key_mask
+
+
+def synthesize_3NF(attributes, fds):
+    # Bernstein synthesis: a lossless, dependency-preserving 3NF decomposition with one relation per group
+    # of equivalent determinants in the minimal cover, plus a key relation when no group holds a key.
+    # Args:
+    #     attributes (iterable): The columns of the relation.
+    #     fds (dict): Functional dependencies over those columns, in the {tuple(lhs): [rhs]} form.
+    # Returns:
+    #     list: (determinant tuple, columns) per relation, the determinant first; the determinant of
+    #     an added key relation is the key itself.
+    attributes = list(attributes)
+    cover = minimal_cover(fds)
+    engine = closure.ClosureEngine(cover, attributes)  # Bits follow the column order of the relation
+    relation_mask = engine.encode(attributes)
+
+    # Determinants with the same closure are equivalent and share one relation
+    groups = {}  # closure of the determinant -> [determinant mask, columns mask]
+    for lhs, rhs in cover.items():
+        lhs_mask = engine.encode(lhs)
+        group = groups.setdefault(engine.closure_mask(lhs_mask), [lhs_mask, 0])
+        group[1] |= lhs_mask | engine.encode(rhs)
+    schemas = list(groups.values())
+
+    # A relation whose columns are all part of another relation is redundant
+    schemas = [(lhs_mask, mask) for index, (lhs_mask, mask) in enumerate(schemas)
+               if not any(mask & ~other == 0 and (mask != other or other_index < index)
+                          for other_index, (_, other) in enumerate(schemas) if other_index != index)]
+
+    # The join is lossless once some relation contains a candidate key
+    if not any(relation_mask & ~engine.closure_mask(mask) == 0 for _, mask in schemas):
+        key_mask = _one_key(engine, relation_mask)
+        schemas.append((key_mask, key_mask))
+
+    result = []
+    for lhs_mask, mask in schemas:
+        determinant = _names(engine, lhs_mask)
+        result.append((tuple(determinant), determinant + _names(engine, mask & ~lhs_mask)))
+    return result
@@ -0,0 +1,137 @@
+# SQL generation: CREATE TABLE statements with primary and foreign keys for the normalized relations
+import keys
+import plan
+import schema
+encoding = schema.lazy_import("encoding")  # Decoding of encoded relations, loaded with the first table
+
+# To generate output schema with proper constraints, first let's determine SQL datatype
+def determine_sql_datatype(dtype):
+    # Determine the SQL data type based on the pandas data type.
+    import pandas as pd  # Already loaded, as the column holds data
+    if pd.api.types.is_integer_dtype(dtype):
+        return "INT"
+    elif pd.api.types.is_float_dtype(dtype):
+        return "FLOAT"
+    elif pd.api.types.is_bool_dtype(dtype):
+        return "BOOLEAN"
+    elif pd.api.types.is_datetime64_any_dtype(dtype):
+        return "DATETIME"
+    elif pd.api.types.is_string_dtype(dtype):
+        max_length = dtype.str.len().max()  # Get the maximum length of the string values
+        return f"VARCHAR({max_length})" if max_length is not None else "VARCHAR(255)"
+    else:
+        # Default to VARCHAR(255) for non-numeric or unknown types
+        return "VARCHAR(255)"
+
+def column_sql_datatype(relation, column):
+    # Schema-only relations have no values to derive a type or length from
+    if isinstance(relation, schema.SchemaRelation):
+        return "VARCHAR(255)"
+    return determine_sql_datatype(relation[column])
+    
+# To generate output queries for 1NF   
+def generate_1nf_table_sql(pk, dataframe):
+    # Assume `pk` is the primary key column; if not provided, take the first column as primary key.
+    pk = list(dataframe.keys())[0]
+    
+    # Create table name by joining primary key column names with an underscore
+    table_name = "_".join(pk)
+    
+    # Extract only the columns related to primary keys from dataframe
+    dataframe = dataframe[pk]
+    
+    # Start forming the CREATE TABLE SQL query
+    create_query = f"CREATE TABLE {table_name} (\n"
+    
+    # Add columns to the query, specifying the primary key(s) and appropriate SQL data types
+    for column in dataframe.columns:
+        dtype = column_sql_datatype(dataframe, column)  # Use the dynamic determination function
+        if column in pk:
+            # Mark column as NOT NULL and PRIMARY KEY
+            create_query += f"  {column} {dtype} NOT NULL PRIMARY KEY,\n"
+        else:
+            create_query += f"  {column} {dtype},\n"
+    
+    # Remove last comma and close the table statement
+    create_query = create_query.rstrip(',\n') + "\n);"
+    return create_query  # The generated SQL query, printed by main.py or written by batch.py
+
+def table_name(rel_name):
+    # Table name of a relation: its determinant columns joined with underscores
+    return "_".join((rel_name,) if isinstance(rel_name, str) else rel_name)
+
+def table_names(rel_names):
+    # Table name of every relation, with a numeric suffix where an earlier relation already took the name:
+    # ("A_B",) and ("A", "B") both join to A_B, and SQL table names ignore case
+    names, taken = {}, set()
+    for rel_name in rel_names:
+        name = base = table_name(rel_name)
+        number = 1
+        while name.lower() in taken:
+            number += 1
+            name = f"{base}_{number}"
+        taken.add(name.lower())
+        names[rel_name] = name
+    return names
+
+def primary_key(rel_name, relation, fds):
+    # Use the first discovered candidate key as primary key, preferring the relation name if it is one
+    rel_key = (rel_name,) if isinstance(rel_name, str) else rel_name
+    candidate_keys = keys.discover_candidate_keys(relation, fds)
+    return rel_key if rel_key in candidate_keys else (candidate_keys[0] if candidate_keys else rel_key)
+
+# Function to create SQL tables for each normalized relation based on given relations and functional dependencies
+def create_tables_for_normalized_relations(relations, fds):
+    relations = plan.materialize_all(relations)  # Project every table of the plan from its source once
+    statements = []  # One CREATE TABLE statement per relation
+    names = table_names(relations)
+    for rel_name, relation in relations.items():
+        if not isinstance(relation, schema.SchemaRelation):
+            relation = encoding.to_frame(relation)  # Decode encoded relations to their string values
+        # `rel_name` holds the determinant the relation was split on
+        pks = primary_key(rel_name, relation, fds)
+        
+        # Begin the CREATE TABLE statement for the relation
+        create_query = f"CREATE TABLE {names[rel_name]} (\n"
+        
+        # Loop through columns in the relation and add each to the CREATE TABLE statement
+        for column in relation.columns:
+            # Pass the actual column to determine_sql_datatype
+            create_query += f"  {column} {column_sql_datatype(relation, column)}"
+            if column in pks:  # Add NOT NULL and PRIMARY KEY constraint if column is a primary key
+                # Composite keys get a single table-level PRIMARY KEY clause below
+                create_query += " NOT NULL PRIMARY KEY" if len(pks) == 1 else " NOT NULL"
+            create_query += ",\n"
+
+        if len(pks) > 1:
+            create_query += f"  PRIMARY KEY ({', '.join(pks)}),\n"
+        
+        # Track foreign keys already added to avoid duplicates
+        foreign_keys_added = set()
+        
+        # Loop through functional dependencies to create foreign key constraints where applicable
+        for (determinants, dependents) in fds.items():
+            for dep in dependents:
+                # Only add foreign key if column is part of current relation and not a primary key
+                if dep in relation.columns and dep not in pks:
+                    # Search for the source table containing the foreign key column
+                    for source_table, source_columns in relations.items():
+                        if dep in source_columns.columns and source_table != rel_name:
+                            # Add the foreign key if it has not already been added
+                            if (dep, source_table) not in foreign_keys_added:
+                                create_query += f"  FOREIGN KEY ({dep}) REFERENCES {names[source_table]}({dep}),\n"
+                                foreign_keys_added.add((dep, source_table))
+        
+        # Remove trailing comma, newline, and finalize the CREATE TABLE statement
+        create_query = create_query.rstrip(',\n') + "\n);"
+        
+        # Collect the SQL query for the generated table
+        statements.append(create_query)
+
+    return statements
+
+# Function to generate the SQL queries for the relations of the selected normal form
+def generate_sql(relations, fds, step, pk):
+    if step == 1 and len(relations) == 1:
+        return [generate_1nf_table_sql(pk, relations)]  # 1NF keeps the single flattened table
+    return create_tables_for_normalized_relations(relations, fds)
@@ -0,0 +1,255 @@
+# Factorized integer codes for relation columns, shared by the data-level checks in normalizer.py
+import weakref
+import numpy as np
+import pandas as pd
+
+# Largest number of distinct combined keys that still fits comfortably in an int64
+_MAX_COMBINED = 1 << 62
+
+
+class SharedDictionary:
+    # String values shared by all columns of encoded relations; a value's code is its position in the list
+
+    def __init__(self):
+        self.values = []
+        self.code_of = {}  # value -> code
+        self._array = None  # Object array of values, rebuilt after the dictionary grows
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode_uniques(self, uniques):
+        # Codes of the given distinct values, adding the new ones to the dictionary
+        codes = np.empty(len(uniques), dtype=np.int32)
+        for i, value in enumerate(np.asarray(uniques, dtype=object).tolist()):  # Not pandas' per-item __iter__
+            value = str(value)  # Values are kept as the strings they are displayed and exported as
+            code = self.code_of.get(value)
+            if code is None:
+                code = self.code_of[value] = len(self.values)
+                self.values.append(value)
+                self._array = None
+            codes[i] = code
+        return codes
+
+    def decode(self, codes):
+        # Values of an array of codes
+        if self._array is None or len(self._array) != len(self.values):
+            self._array = np.array(self.values, dtype=object)
+        return self._array[codes]
+
+
+class EncodedRelation:
+    # A relation stored as one int32 code array per column plus a SharedDictionary of the string values.
+    # It supports the DataFrame operations the normalizer transforms use (column projection, drop_duplicates,
+    # drop, reset_index, duplicated), deduplicating on packed int64 keys, and only decodes for display and SQL.
+
+    def __init__(self, codes, dictionary, index=None):
+        self._codes = codes  # column -> int32 array of codes into dictionary
+        self.dictionary = dictionary
+        n_rows = len(next(iter(codes.values()))) if codes else 0
+        self.index = np.arange(n_rows) if index is None else index  # Row labels, kept for display
+
+    @classmethod
+    def from_frame(cls, frame, dictionary=None):
+        # Encodes a DataFrame with atomic values, optionally into an existing shared dictionary
+        dictionary = SharedDictionary() if dictionary is None else dictionary
+        codes = {}
+        for col in frame.columns:
+            local_codes, uniques = pd.factorize(frame[col], use_na_sentinel=False)
+            codes[col] = dictionary.encode_uniques(uniques)[local_codes]  # Map local codes onto shared codes
+        return cls(codes, dictionary, frame.index.to_numpy())
+
+    @property
+    def columns(self):
+        return pd.Index(list(self._codes))
+
+    @property
+    def empty(self):
+        return len(self) == 0 or not self._codes
+
+    def __len__(self):
+        return len(self.index)
+
+    def column_codes(self, col):
+        # The int32 code array of one column
+        return self._codes[col]
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return pd.Series(self.dictionary.decode(self._codes[key]), index=self.index, name=key)  # One decoded column
+        return EncodedRelation({col: self._codes[col] for col in key}, self.dictionary, self.index)
+
+    def take(self, positions):
+        # Rows at the given positions, like DataFrame.iloc
+        return EncodedRelation({col: codes[positions] for col, codes in self._codes.items()},
+                               self.dictionary, self.index[positions])
+
+    def packed_keys(self, subset=None):
+        # One int64 key per row over the given columns (all by default), equal for equal tuples
+        columns = list(self._codes) if subset is None else list(subset)
+        combined, _ = combine_codes([self._codes[col].astype(np.int64) for col in columns],
+                                    [len(self.dictionary)] * len(columns))
+        return np.zeros(len(self), dtype=np.int64) if combined is None else combined
+
+    def duplicated(self, subset=None):
+        # Boolean array marking rows whose tuple already appeared earlier, like DataFrame.duplicated
+        return pd.Index(self.packed_keys(subset)).duplicated()
+
+    def drop_duplicates(self, subset=None):
+        return self.take(np.flatnonzero(~self.duplicated(subset)))
+
+    def reset_index(self, drop=True):
+        return EncodedRelation(self._codes, self.dictionary)
+
+    def drop(self, columns, inplace=False):
+        columns = [columns] if isinstance(columns, str) else columns  # One column name, as with DataFrame.drop
+        kept = {col: codes for col, codes in self._codes.items() if col not in columns}
+        if inplace:
+            self._codes = kept
+            return None
+        return EncodedRelation(kept, self.dictionary, self.index)
+
+    def decode(self):
+        # The relation as a DataFrame of strings, for display and SQL generation
+        return pd.DataFrame({col: self.dictionary.decode(codes) for col, codes in self._codes.items()}, index=self.index)
+
+    def memory_usage(self):
+        # Bytes used by the code arrays and row labels (the dictionary is shared, so it is not counted)
+        return sum(codes.nbytes for codes in self._codes.values()) + self.index.nbytes
+
+    def __repr__(self):
+        return repr(self.decode())
+
+
+def concat_encoded(parts):
+    # Stacks encoded relations with the same columns and shared dictionary, like pd.concat
+    columns = list(parts[0].columns)
+    codes = {col: np.concatenate([part.column_codes(col) for part in parts]) for col in columns}
+    return EncodedRelation(codes, parts[0].dictionary, np.concatenate([part.index for part in parts]))
+
+
+def encode_relation(relation, dictionary=None):
+    # Encodes a DataFrame into an EncodedRelation; encoded relations are returned unchanged
+    if isinstance(relation, EncodedRelation):
+        return relation
+    return EncodedRelation.from_frame(relation, dictionary)
+
+
+def to_frame(relation):
+    # The relation as a DataFrame, decoding it if it is an EncodedRelation
+    return relation.decode() if isinstance(relation, EncodedRelation) else relation
+
+
+def take_rows(relation, positions):
+    # Rows of a DataFrame or EncodedRelation at the given positions
+    return relation.take(positions) if isinstance(relation, EncodedRelation) else relation.iloc[positions]
+
+
+def factorize_columns(relation, columns=None):
+    # Dictionary-encodes the columns of a relation into dense integer codes.
+    # Args:
+    #     relation (DataFrame or EncodedRelation): The relation to encode.
+    #     columns (iterable): Optional subset of columns to encode, all columns by default.
+    # Returns:
+    #     dict: column -> (codes array of int64, number of distinct values)
+    columns = relation.columns if columns is None else columns
+    encoded = {}
+    for col in columns:
+        if isinstance(relation, EncodedRelation):
+            codes, uniques = pd.factorize(relation.column_codes(col))  # Shared codes are not dense per column
+        else:
+            codes, uniques = pd.factorize(relation[col], use_na_sentinel=False)  # Missing values get their own code
+        encoded[col] = (codes.astype(np.int64, copy=False), len(uniques))
+    return encoded
+
+
+# Factorized columns of live relations, keyed by id() and dropped when the relation is garbage collected
+_CODE_CACHE = {}
+
+
+def remember_codes(relation, encoded):
+    # Stores the factorized columns of a relation so later checks on the same object reuse them
+    key = id(relation)
+    if key not in _CODE_CACHE:
+        weakref.finalize(relation, _CODE_CACHE.pop, key, None)
+    _CODE_CACHE[key] = (len(relation), encoded)
+
+
+def cached_codes(relation):
+    # Factorized columns of a relation, computed once per relation object
+    entry = _CODE_CACHE.get(id(relation))
+    if entry is not None:
+        n_rows, encoded = entry
+        # Columns may have been dropped in place since; rows never are, but check the count to be safe
+        if n_rows == len(relation) and all(col in encoded for col in relation.columns):
+            return encoded
+    encoded = factorize_columns(relation)
+    remember_codes(relation, encoded)
+    return encoded
+
+
+def project_codes(encoded, keep_rows, columns):
+    # Codes of a projection whose rows are the positions (or boolean mask) keep_rows.
+    # Re-densifying integer codes is much cheaper than factorizing the original values again.
+    projected = {}
+    for col in columns:
+        codes, uniques = pd.factorize(encoded[col][0][keep_rows])
+        projected[col] = (codes.astype(np.int64, copy=False), len(uniques))
+    return projected
+
+
+def combine_codes(code_arrays, cardinalities):
+    # Packs several code columns into one int64 key per row (mixed radix), re-densifying when it would overflow.
+    # Returns:
+    #     tuple: (int64 array of combined keys, upper bound on the number of distinct keys)
+    if not code_arrays:
+        return None, 1  # No columns: every row falls into the same single group
+    combined = code_arrays[0]
+    bound = max(cardinalities[0], 1)
+    for codes, cardinality in zip(code_arrays[1:], cardinalities[1:]):
+        cardinality = max(cardinality, 1)
+        if bound * cardinality >= _MAX_COMBINED:
+            # Replace the running keys by dense ranks before they overflow
+            uniques, combined = np.unique(combined, return_inverse=True)
+            bound = len(uniques)
+        combined = combined * cardinality + codes
+        bound *= cardinality
+    return combined, bound
+
+
+def group_ids(encoded, columns, n_rows):
+    # Dense group number for every row over the given columns.
+    # Returns:
+    #     tuple: (int64 array of group ids in [0, n_groups), n_groups)
+    columns = list(columns)
+    if not columns:
+        return np.zeros(n_rows, dtype=np.int64), 1 if n_rows else 0
+    combined, bound = combine_codes([encoded[col][0] for col in columns], [encoded[col][1] for col in columns])
+    if len(columns) == 1:
+        return combined, bound  # Factorized codes are already dense
+    uniques, ids = np.unique(combined, return_inverse=True)
+    return ids.reshape(-1), len(uniques)
+
+
+def distinct_rows(encoded, columns, n_rows):
+    # Position of the first row of every distinct tuple over columns, in group-id order
+    ids, _ = group_ids(encoded, columns, n_rows)
+    return np.unique(ids, return_index=True)[1]
+
+
+def distinct_projection(relation, columns, dedup=None):
+    # Same rows as relation[columns].drop_duplicates(), deduplicated on the cached codes of relation.
+    # The codes of the projection are remembered too, so checks on it do not factorize it again.
+    # dedup replaces distinct_rows, for the execution backends of backend.py.
+    columns = list(columns)
+    if isinstance(relation, EncodedRelation):
+        if dedup is None:
+            return relation[columns].drop_duplicates()  # Already deduplicated on packed codes
+        codes = {col: (relation.column_codes(col), len(relation.dictionary)) for col in columns}
+        return relation.take(np.sort(dedup(codes, columns, len(relation))))[columns]
+    encoded = cached_codes(relation)
+    first_rows = (dedup or distinct_rows)(encoded, columns, len(relation))  # First occurrence of every distinct tuple
+    first_rows.sort()  # Keep the original row order, like drop_duplicates
+    projection = relation.iloc[first_rows][columns]
+    remember_codes(projection, project_codes(encoded, first_rows, columns))
+    return projection
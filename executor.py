@@ -0,0 +1,56 @@
+# Relation-level execution layer: runs per-relation work in a thread or process pool, in deterministic order
+import os
+
+# Defaults used when a call does not pass its own; NORMALIZER_WORKERS sets the initial worker count
+_settings = {"workers": int(os.environ.get("NORMALIZER_WORKERS", "1")), "kind": "thread"}
+
+# Work of the current process-pool call, inherited by forked workers instead of being pickled per task
+_SHARED = {}
+
+
+def configure(workers=None, kind=None):
+    # Sets the default worker count and pool kind ("thread" or "process") for later calls
+    if workers is not None:
+        _settings["workers"] = max(1, int(workers))
+    if kind is not None:
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        _settings["kind"] = kind
+
+
+def _run_shared(position):
+    # Process-pool task: only the position travels to the worker, the relation was inherited at fork time
+    func, items, args = _SHARED["func"], _SHARED["items"], _SHARED["args"]
+    name, relation = items[position]
+    return func(name, relation, *args)
+
+
+def map_relations(func, relations, *args, workers=None, kind=None):
+    # Calls func(name, relation, *args) for every relation and returns the results in the dict's order.
+    # Args:
+    #     func: A module-level function, so process workers can run it.
+    #     relations (dict): name -> relation.
+    #     workers (int): Pool size; 1 runs everything in the calling thread. Defaults to configure().
+    #     kind (str): "thread", or "process" to fork workers that share the relations copy-on-write.
+    # Returns:
+    #     list: One result per relation, in the same order as relations.
+    workers = _settings["workers"] if workers is None else workers
+    kind = _settings["kind"] if kind is None else kind
+    workers = min(workers, len(relations))
+
+    if workers <= 1:
+        # One relation at a time, so relations spilled to disk (see store.py) are not all loaded at once
+        return [func(name, relation, *args) for name, relation in relations.items()]
+    items = list(relations.items())
+    # The pools are imported on first parallel use, keeping them out of the serial (and schema-only) startup
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    if kind == "process" and "fork" in multiprocessing.get_all_start_methods():
+        _SHARED.update(func=func, items=items, args=args)
+        try:
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork")) as pool:
+                return list(pool.map(_run_shared, range(len(items))))
+        finally:
+            _SHARED.clear()
+    with ThreadPoolExecutor(workers) as pool:
+        return list(pool.map(lambda item: func(item[0], item[1], *args), items))
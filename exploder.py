@@ -0,0 +1,122 @@
+# Memory-bounded 1NF flattening: blow-up estimation and chunked cross-product explosion
+import numpy as np
+import pandas as pd
+
+
+def _is_collection(value):
+    return isinstance(value, (list, set, tuple))
+
+
+def multivalued_columns(relation):
+    # Columns holding at least one list or set value
+    return [col for col in relation.columns if relation[col].map(_is_collection).any()]
+
+
+def _lengths(series):
+    # Number of values per row; atomic values and empty lists count as one row
+    counts = series.map(lambda value: len(value) if _is_collection(value) else 1).to_numpy(dtype=np.int64)
+    return np.maximum(counts, 1)  # explode keeps one (missing) row for an empty list
+
+
+def list_lengths(relation, columns):
+    # Number of values per row for each column
+    return {col: _lengths(relation[col]) for col in columns}
+
+
+def estimate_exploded_rows(relation, columns=None):
+    # Rows produced by exploding the given (by default all multi-valued) columns, without exploding anything
+    columns = multivalued_columns(relation) if columns is None else columns
+    if not columns:
+        return len(relation)
+    lengths = list_lengths(relation, columns)
+    return int(np.prod(np.vstack([lengths[col] for col in columns]), axis=0).sum())
+
+
+def _flatten(series, lengths):
+    # All values of a column in one array, with the start offset of every row's values
+    flat = []
+    for value in series:
+        if _is_collection(value):
+            flat.extend(value if len(value) else [np.nan])
+        else:
+            flat.append(value)
+    values = np.empty(len(flat), dtype=object)
+    values[:] = flat
+    starts = np.zeros(len(lengths), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    return values, starts
+
+
+def flatten_column(series):
+    # The values of a column in one array with the start offset and the number of values of every row.
+    # Returns:
+    #     tuple: (object array of values, int64 start offsets, int64 lengths)
+    lengths = _lengths(series)
+    values, starts = _flatten(series, lengths)
+    return values, starts, lengths
+
+
+def iter_exploded(relation, columns=None, chunk_rows=100000, flatten=flatten_column):
+    # Yields the cross-product explosion of the multi-valued columns as DataFrames of about chunk_rows rows.
+    # Every output row is located with offsets arithmetic (row, position in each list) instead of
+    # exploding one column at a time, so no intermediate full-size frame is ever built.
+    # flatten has the contract of flatten_column (the arrow backend passes a columnar one).
+    columns = multivalued_columns(relation) if columns is None else list(columns)
+    if not columns:
+        yield relation
+        return
+    flattened, lengths = {}, {}
+    for col in columns:
+        values, starts, lengths[col] = flatten(relation[col])
+        flattened[col] = (values, starts)
+    per_row = np.prod(np.vstack([lengths[col] for col in columns]), axis=0)
+    offsets = np.cumsum(per_row)  # Output rows produced up to and including every input row
+    index = relation.index.to_numpy()
+
+    start = 0
+    while start < len(relation):
+        # Take as many input rows as fit in one chunk (at least one, however large it explodes)
+        emitted = offsets[start - 1] if start else 0
+        stop = max(start + 1, int(np.searchsorted(offsets, emitted + chunk_rows, side="right")))
+        counts = per_row[start:stop]
+        rows = np.repeat(np.arange(start, stop), counts)  # Input row of every output row
+        first_output = np.cumsum(counts) - counts
+        position = np.arange(len(rows)) - np.repeat(first_output, counts)  # Output number within its input row
+
+        chunk = relation.iloc[rows].copy()
+        chunk.index = index[rows]
+        stride = np.ones(len(rows), dtype=np.int64)
+        for col in reversed(columns):  # The last column varies fastest, as with successive explode calls
+            values, starts = flattened[col]
+            col_lengths = lengths[col][rows]
+            chunk[col] = values[starts[rows] + (position // stride) % col_lengths]
+            stride = stride * col_lengths
+        yield chunk
+        start = stop
+
+
+def split_schemas(columns, pk, multivalued):
+    # The relations split_multivalued makes, by their columns: {pk: the columns without the multi-valued
+    # ones outside the key, pk + (column,): the key and that column} for every multi-valued non-key column
+    split = [col for col in multivalued if col not in pk]
+    schemas = {pk: [col for col in columns if col not in split]}
+    for col in split:
+        schemas[tuple(pk) + (col,)] = list(pk) + [col]
+    return schemas
+
+
+def split_multivalued(relation, pk, columns=None):
+    # Moves each multi-valued column into its own relation with the primary key, instead of
+    # cross-multiplying independent columns in one table. A multi-valued key column is flattened
+    # first, so every relation holds the whole key with one value of it per row.
+    # Returns:
+    #     dict: {pk: relation without the non-key multi-valued columns, pk + (column,): exploded key/column pairs}
+    columns = multivalued_columns(relation) if columns is None else list(columns)
+    key_cols = [col for col in columns if col in pk]
+    if key_cols:
+        relation = pd.concat(list(iter_exploded(relation, key_cols)))
+    relations = {}
+    for name, schema_columns in split_schemas(list(relation.columns), pk, columns).items():
+        nested = [col for col in schema_columns if col in columns and col not in pk]
+        relations[name] = pd.concat(list(iter_exploded(relation[schema_columns], nested))).drop_duplicates()
+    return relations
@@ -0,0 +1,119 @@
+# Data export of the normalized relations: batched load into SQLite, or COPY-ready CSV files
+import csv
+import itertools
+import os
+import sqlite3
+import time
+import ddl
+import plan
+import schema
+encoding = schema.lazy_import("encoding")  # Decoding of encoded relations, loaded with the first table
+
+# Rows sent to sqlite3 per executemany call, and written per to_csv call
+DEFAULT_BATCH_ROWS = 10000
+
+
+def _tables(relations, fds, step, pk):
+    # Yields (table name, decoded DataFrame, key columns, unique key) per relation, named as by ddl.py,
+    # so relations whose names join to the same table name never replace each other's table.
+    # The 1NF table keeps the entered primary key, which its flattened rows may repeat.
+    relations = plan.materialize_all(relations)
+    names = ddl.table_names(relations)
+    for rel_name, relation in relations.items():
+        if isinstance(relation, schema.SchemaRelation):
+            raise ValueError("Schema-only relations have no rows to export")
+        relation = encoding.to_frame(relation)
+        if step == 1:
+            key, unique = [col for col in pk if col in relation.columns], False
+        else:
+            key, unique = list(ddl.primary_key(rel_name, relation, fds)), True
+        yield names[rel_name], relation, key, unique
+
+
+def _quote(name):
+    # SQL identifier in double quotes, with embedded double quotes doubled
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _batches(relation, batch_rows):
+    # Row tuples of a DataFrame in lists of batch_rows, with missing values as None (SQL NULL)
+    rows = relation.astype(object).where(relation.notna(), None).itertuples(index=False, name=None)
+    while True:
+        batch = list(itertools.islice(rows, batch_rows))
+        if not batch:
+            return
+        yield batch
+
+
+def _report(table, rows, loaded, seconds):
+    return {"table": table, "rows": rows, "loaded": loaded, "verified": rows == loaded, "unique_key": None,
+            "seconds": round(seconds, 6), "rows_per_sec": round(loaded / seconds) if seconds else None}
+
+
+def export_sqlite(relations, fds, path, step, pk, batch_rows=DEFAULT_BATCH_ROWS):
+    # Loads every relation into a SQLite database in one transaction: tables are (re)created without
+    # constraints, filled with batched executemany calls, and only then indexed on their keys. A key
+    # the rows repeat (the data breaks an FD) gets a plain index instead of a unique one.
+    # Args:
+    #     relations (dict): The relations of the selected normal form.
+    #     fds (dict): Functional dependencies, used to choose the key of each table as ddl.py does.
+    #     path (str): The database file, created if needed; existing tables of the same name are replaced.
+    #     step (int), pk (tuple): The normal form and primary key entered by the user.
+    #     batch_rows (int): Rows per executemany call.
+    # Returns:
+    #     list: One dict per table: table, rows (in memory), loaded (counted in the database),
+    #         verified (the counts match), unique_key (False when the rows repeat the key), seconds
+    #         and rows_per_sec.
+    connection = sqlite3.connect(path, isolation_level=None)  # Transaction handled here, DDL included
+    reports = []
+    try:
+        connection.execute("BEGIN")
+        try:
+            indexes = []
+            for table, relation, key, unique in _tables(relations, fds, step, pk):
+                start = time.perf_counter()
+                columns = ", ".join(_quote(col) for col in relation.columns)
+                connection.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+                connection.execute(f"CREATE TABLE {_quote(table)} ({columns})")
+                insert = f'INSERT INTO {_quote(table)} VALUES ({", ".join("?" * len(relation.columns))})'
+                for batch in _batches(relation, batch_rows):
+                    connection.executemany(insert, batch)
+                loaded = connection.execute(f"SELECT COUNT(*) FROM {_quote(table)}").fetchone()[0]
+                reports.append(_report(table, len(relation), loaded, time.perf_counter() - start))
+                if key:
+                    indexes.append((reports[-1], key, unique))
+            # Building the indexes once over the loaded rows is cheaper than maintaining them per insert
+            for report, key, unique in indexes:
+                key_columns = ", ".join(_quote(col) for col in key)
+                statement = f"INDEX {_quote(report['table'] + '_key')} ON {_quote(report['table'])} ({key_columns})"
+                try:
+                    connection.execute(f"CREATE {'UNIQUE ' if unique else ''}{statement}")
+                    report["unique_key"] = True if unique else None  # The 1NF key is not meant to be unique
+                except sqlite3.IntegrityError:  # Only the failed statement is undone, not the transaction
+                    connection.execute(f"CREATE {statement}")
+                    report["unique_key"] = False
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+    finally:
+        connection.close()
+    return reports
+
+
+def export_csv(relations, fds, directory, step, pk, batch_rows=DEFAULT_BATCH_ROWS):
+    # Writes every relation to <directory>/<table>.csv with a header row, missing values as empty
+    # fields, ready for COPY ... FROM ... WITH (FORMAT csv, HEADER). Row counts are verified by
+    # reading each file back.
+    # Returns:
+    #     list: One dict per table, as export_sqlite.
+    os.makedirs(directory, exist_ok=True)
+    reports = []
+    for table, relation, _, _ in _tables(relations, fds, step, pk):
+        start = time.perf_counter()
+        path = os.path.join(directory, f"{table}.csv")
+        relation.to_csv(path, index=False, chunksize=batch_rows)
+        with open(path, newline="") as file:
+            loaded = sum(1 for _ in csv.reader(file)) - 1  # Without the header
+        reports.append(_report(table, len(relation), loaded, time.perf_counter() - start))
+    return reports
@@ -0,0 +1,174 @@
+# Data-driven functional dependency discovery (TANE: stripped partitions and a level-wise lattice walk)
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import encoding  # Dictionary-encoded columns (DataFrame or EncodedRelation)
+
+
+class StrippedPartition:
+    # Partition of the row indexes by their values on an attribute set, with singleton classes removed.
+    # Rows are stored grouped by class, so only rows sharing their values with another row take up space.
+
+    __slots__ = ("rows", "labels", "n_classes")
+
+    def __init__(self, rows, labels, n_classes):
+        self.rows = rows  # Row indexes that are in a class of size >= 2
+        self.labels = labels  # Class number of each of those rows, in [0, n_classes)
+        self.n_classes = n_classes
+
+    @property
+    def error(self):
+        # ||pi|| - |pi|: rows that would have to be removed for the attribute set to become a key
+        return len(self.rows) - self.n_classes
+
+
+def _strip(rows, keys):
+    # Builds a stripped partition from candidate rows and their (not necessarily dense) class keys
+    inverse, _ = pd.factorize(keys)  # Hash-based grouping, cheaper than sorting the keys
+    counts = np.bincount(inverse)
+    kept = counts >= 2
+    keep_rows = kept[inverse]
+    dense = np.cumsum(kept, dtype=np.int64) - 1  # New class number for every kept class
+    return StrippedPartition(rows[keep_rows], dense[inverse[keep_rows]].astype(np.int32), int(kept.sum()))
+
+
+def column_partition(codes):
+    # Stripped partition of a single dictionary-encoded column
+    counts = np.bincount(codes)
+    rows = np.flatnonzero(counts[codes] >= 2).astype(np.int32)
+    return _strip(rows, codes[rows])
+
+
+def partition_product(first, second, n_rows):
+    # Stripped partition of X u Y from the stripped partitions of X and Y
+    lookup = np.full(n_rows, -1, dtype=np.int64)
+    lookup[second.rows] = second.labels  # Class of every row in Y, -1 for Y-singletons
+    other = lookup[first.rows]
+    shared = other >= 0  # Rows that are singletons in Y are singletons in X u Y as well
+    rows = first.rows[shared]
+    keys = first.labels[shared].astype(np.int64) * max(second.n_classes, 1) + other[shared]
+    return _strip(rows, keys)
+
+
+# Partitions of the previous level, inherited by forked workers instead of being pickled per task
+_SHARED_PARTITIONS = {}
+
+
+def _product_task(args):
+    first_key, second_key, n_rows = args
+    product = partition_product(_SHARED_PARTITIONS[first_key], _SHARED_PARTITIONS[second_key], n_rows)
+    return product.rows, product.labels, product.n_classes
+
+
+def _bits(mask):
+    # Positions of the set bits of mask, lowest first
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _next_level(level, n_rows, n_jobs):
+    # Joins sets sharing all but their last attribute (prefix blocks), keeping candidates whose subsets all survived
+    blocks = {}
+    for mask in level:
+        last = 1 << (mask.bit_length() - 1)
+        blocks.setdefault(mask ^ last, []).append(mask)
+
+    candidates = []
+    for members in blocks.values():
+        members.sort()
+        for i, first in enumerate(members):
+            for second in members[i + 1:]:
+                mask = first | second
+                if all(mask ^ (1 << bit) in level for bit in _bits(mask)):
+                    candidates.append((mask, first, second))
+
+    if n_jobs > 1 and len(candidates) > 1 and "fork" in multiprocessing.get_all_start_methods():
+        # Refine partitions in parallel; forked workers see the previous level without copying it
+        _SHARED_PARTITIONS.clear()
+        _SHARED_PARTITIONS.update(level)
+        tasks = [(first, second, n_rows) for _, first, second in candidates]
+        with ProcessPoolExecutor(n_jobs, mp_context=multiprocessing.get_context("fork")) as pool:
+            products = [StrippedPartition(*result) for result in pool.map(_product_task, tasks, chunksize=16)]
+        _SHARED_PARTITIONS.clear()
+    else:
+        products = [partition_product(level[first], level[second], n_rows) for _, first, second in candidates]
+    return {mask: product for (mask, _, _), product in zip(candidates, products)}
+
+
+def _is_minimal(mask, bit, previous, singles, n_rows):
+    # For a key X, X -> A is minimal when no X \ {B} determines A; X \ {B} always survives in the previous level
+    for other in _bits(mask):
+        lhs = mask ^ (1 << other)
+        if not lhs:
+            continue  # Empty left-hand sides are not reported
+        if previous[lhs].error == partition_product(previous[lhs], singles[1 << bit], n_rows).error:
+            return False
+    return True
+
+
+def discover_fds(relation, max_lhs=None, n_jobs=1):
+    # Mines all minimal, non-trivial functional dependencies that hold in a relation instance.
+    # Args:
+    #     relation (DataFrame or EncodedRelation): The relation instance (atomic values, i.e. after 1NF).
+    #     max_lhs (int): Optional bound on the number of attributes on a left-hand side.
+    #     n_jobs (int): Number of worker processes used to refine partitions, 1 to stay in-process.
+    # Returns:
+    #     dict: Functional dependencies in the {tuple(lhs): [rhs]} form used by normalizer.py.
+    columns = list(relation.columns)
+    n_rows = len(relation)
+    full_mask = (1 << len(columns)) - 1
+    max_level = len(columns) if max_lhs is None else min(max_lhs + 1, len(columns))
+
+    level = {}
+    encoded = encoding.factorize_columns(relation)  # Dictionary-encode every column
+    for bit, col in enumerate(columns):
+        level[1 << bit] = column_partition(encoded[col][0])
+
+    singles = dict(level)  # Single-column partitions, kept to test key-derived dependencies
+    previous = {}
+    errors = {mask: partition.error for mask, partition in level.items()}
+    cplus = {0: full_mask}  # Candidate right-hand sides per attribute set
+    found = []  # (lhs mask, rhs bit) pairs
+    depth = 1
+
+    while level:
+        # Compute dependencies: X \ {A} -> A holds exactly when both sets have the same partition error
+        for mask in level:
+            candidates = full_mask
+            for bit in _bits(mask):
+                candidates &= cplus.get(mask ^ (1 << bit), 0)
+            cplus[mask] = candidates
+        for mask in level:
+            for bit in _bits(mask & cplus[mask]):
+                lhs = mask ^ (1 << bit)
+                if lhs and errors[lhs] == errors[mask]:  # Empty left-hand sides (constant columns) are not reported
+                    found.append((lhs, bit))
+                    cplus[mask] &= ~(1 << bit)
+                    cplus[mask] &= mask  # Attributes outside X can not be minimal right-hand sides any more
+
+        # Prune: drop sets without candidates, and turn keys into dependencies without expanding them
+        for mask in list(level):
+            if not cplus[mask]:
+                del level[mask]
+            elif errors[mask] == 0:
+                # A key of the last level is one attribute wider than max_lhs allows as a left-hand side
+                if max_lhs is None or bin(mask).count("1") <= max_lhs:
+                    for bit in _bits(cplus[mask] & ~mask):
+                        if _is_minimal(mask, bit, previous, singles, n_rows):
+                            found.append((mask, bit))
+                del level[mask]
+
+        if depth >= max_level:
+            break
+        previous = level
+        level = _next_level(level, n_rows, n_jobs)
+        errors.update((mask, partition.error) for mask, partition in level.items())
+        depth += 1
+
+    fds = {}
+    for lhs, bit in sorted(found):
+        fds.setdefault(tuple(columns[b] for b in _bits(lhs)), []).append(columns[bit])
+    return fds
@@ -0,0 +1,171 @@
+# Incremental re-normalization: checks appended rows against saved FD indexes and relation projections
+#
+#     python incremental.py init manifest.json --job employees --state employees.state
+#     python incremental.py append employees.state new_rows.csv --output-dir delta
+#
+# init normalizes one job of a batch manifest (see batch.py) and saves the indexes of its full table.
+# append reads a csv file of new rows, reports the FDs and MVDs those rows break and writes the new
+# tuples of every normalized relation to <output-dir>/<table>.csv, then saves the updated state.
+import argparse
+import os
+import pickle
+import sys
+import batch
+import ddl
+import pipeline
+import schema
+import tracing
+ingest = schema.lazy_import("ingest")  # Parsing and flattening of the appended rows, with pandas
+
+
+class IncrementalState:
+    # Everything needed to check appended rows without reading the table again:
+    #     columns: the columns of the input table
+    #     schemas: relation name -> columns of the normalized relations
+    #     verifier: ingest.StreamingFDVerifier with one LHS -> RHS hash index per FD
+    #     projections: relation name -> set of the distinct tuples of that relation
+    #     mvd_groups: one dict per MVD, X values -> [set of Y values, set of Z values, distinct XYZ tuples]
+    #     rows: the distinct atomic rows seen, so a repeated row never counts twice
+    # Values are kept as strings, and both the base table and the appended files are read as text:
+    # inferred dtypes differ between files (a blank EmployeeID turns the column float, so 201 would
+    # become "201.0") and the same value would then never match its earlier copy.
+
+    def __init__(self, columns, schemas, fds, mvds):
+        self.columns = list(columns)
+        self.schemas = {name: list(cols) for name, cols in schemas.items()}
+        self.verifier = ingest.StreamingFDVerifier(fds or {})
+        self.projections = {name: set() for name in self.schemas}
+        position = {col: i for i, col in enumerate(self.columns)}
+        self.mvds = []  # (determinant, dependents, X positions, Y positions, Z positions)
+        for determinant, dependents in (mvds or {}).items():
+            x_cols = [col for col in determinant if col in position]
+            y_cols = [col for col in dependents if col in position and col not in x_cols]
+            z_cols = [col for col in self.columns if col not in x_cols and col not in y_cols]
+            self.mvds.append((tuple(determinant), list(dependents), [position[col] for col in x_cols],
+                              [position[col] for col in y_cols], [position[col] for col in z_cols]))
+        self.mvd_groups = [{} for _ in self.mvds]
+        self.rows = set()
+
+    def _atomic(self, table):
+        # The appended rows as distinct atomic string rows, flattened like transform_to_1NF does
+        if set(table.columns) != set(self.columns):
+            raise ValueError(f"Appended rows must have the columns {self.columns}, got {list(table.columns)}")
+        return ingest.explode_all(ingest.parse_multivalued(table[self.columns])).astype(str).drop_duplicates()
+
+    def update(self, table):
+        # Checks a batch of appended rows and adds them to the indexes.
+        # Args:
+        #     table (DataFrame): The new rows, with the columns of the input table.
+        # Returns:
+        #     tuple: (FDs first violated by this batch as {lhs: (lhs values, RHS values, conflicting RHS values)},
+        #             MVDs violated in X-groups this batch touched as [(determinant, dependents, X values)],
+        #             relation name -> DataFrame of the tuples that relation did not hold yet)
+        import pandas as pd  # Already loaded, as table holds rows
+        rows = self._atomic(table)
+        known_violations = set(self.verifier.violations)
+        self.verifier.update(rows)
+        fd_violations = {lhs: found for lhs, found in self.verifier.violations.items() if lhs not in known_violations}
+
+        # Only the X-groups that gain a distinct row can change, so only those are checked
+        touched = [{} for _ in self.mvds]  # X values -> whether the group was violated before this batch
+        for row in rows.itertuples(index=False, name=None):
+            if row in self.rows:
+                continue
+            self.rows.add(row)
+            for number, (_, _, x_pos, y_pos, z_pos) in enumerate(self.mvds):
+                x = tuple(row[i] for i in x_pos)
+                group = self.mvd_groups[number].setdefault(x, [set(), set(), 0])
+                if x not in touched[number]:
+                    touched[number][x] = len(group[0]) * len(group[1]) != group[2]
+                group[0].add(tuple(row[i] for i in y_pos))
+                group[1].add(tuple(row[i] for i in z_pos))
+                group[2] += 1
+        mvd_violations = []
+        for number, (determinant, dependents, _, _, _) in enumerate(self.mvds):
+            for x, was_violated in touched[number].items():
+                y_values, z_values, n_rows = self.mvd_groups[number][x]
+                if not was_violated and len(y_values) * len(z_values) != n_rows:
+                    mvd_violations.append((determinant, dependents, x))
+
+        new_tuples = {}
+        for name, cols in self.schemas.items():
+            seen = self.projections[name]
+            fresh = [row for row in rows[cols].drop_duplicates().itertuples(index=False, name=None) if row not in seen]
+            seen.update(fresh)
+            new_tuples[name] = pd.DataFrame(fresh, columns=cols)
+        return fd_violations, mvd_violations, new_tuples
+
+
+def build_state(table, fds, mvds, pk, step):
+    # Normalizes the full table once and indexes its rows, keeping the violations the table already has.
+    # Returns:
+    #     tuple: (IncrementalState, relations of the target normal form, the FDs used)
+    relations, _, fds = pipeline.normalize(table, fds, mvds, pk, step)
+    state = IncrementalState(table.columns, {name: rel.columns for name, rel in relations.items()}, fds, mvds)
+    state.update(table)
+    return state, relations, fds
+
+
+def save_state(state, path):
+    with open(path, 'wb') as file:
+        pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_state(path):
+    with open(path, 'rb') as file:
+        return pickle.load(file)
+
+
+def _init(args):
+    jobs = {job["name"]: job for job in batch.load_manifest(args.manifest)}
+    if args.job not in jobs:
+        raise ValueError(f"No job named {args.job} in {args.manifest}")
+    job = jobs[args.job]
+    fds = pipeline.read_fds(job["fds"]) if job.get("fds") else None
+    mvds = pipeline.read_mvds(job["mvds"]) if job.get("mvds") else {}
+    with open(job["key"], 'r') as file:
+        pk = pipeline.parse_key(file.read())
+    state, relations, _ = build_state(pipeline.read_table(job["table"], dtype=str), fds, mvds, pk, job["target"])
+    save_state(state, args.state)
+    print(f"Indexed {len(state.rows)} rows of {job['name']} into {len(relations)} relations, state in {args.state}")
+    return 0
+
+
+def _append(args):
+    state = load_state(args.state)
+    fd_violations, mvd_violations, new_tuples = state.update(pipeline.read_table(args.rows, dtype=str))
+    for lhs, (key, previous, value) in fd_violations.items():
+        print(f"FD {', '.join(lhs)} -> {', '.join(state.verifier.fds[lhs])} violated: {key} maps to {previous} and {value}")
+    for determinant, dependents, x in mvd_violations:
+        print(f"MVD {', '.join(determinant)} ->> {', '.join(dependents)} violated for {x}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    tables = ddl.table_names(new_tuples)
+    for name, tuples in new_tuples.items():
+        if len(tuples):
+            path = os.path.join(args.output_dir, f"{tables[name]}.csv")
+            tuples.to_csv(path, index=False)
+            print(f"{len(tuples)} new rows for {tables[name]} in {path}")
+    save_state(state, args.state)
+    return 1 if fd_violations or mvd_violations else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check appended rows against an already normalized table.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    init = commands.add_parser("init", help="normalize one manifest job and save the indexes of its rows")
+    init.add_argument("manifest", help="JSON job manifest, as read by batch.py")
+    init.add_argument("--job", required=True, help="name of the job to normalize")
+    init.add_argument("--state", required=True, help="file the indexes are saved to")
+    append = commands.add_parser("append", help="check a csv file of appended rows and emit the new tuples")
+    append.add_argument("state", help="file written by init (and updated by every append)")
+    append.add_argument("rows", help="csv file of the appended rows")
+    append.add_argument("--output-dir", default="delta", help="directory for the new tuples of every relation")
+    args = parser.parse_args(argv)
+
+    tracing.configure(verbosity=tracing.QUIET)  # Only the findings are printed
+    return _init(args) if args.command == "init" else _append(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+# Chunked CSV ingestion: bounded-memory reading, streaming FD verification and distinct projections
+import pandas as pd
+import encoding  # Distinct rows are collected as int32 codes into one shared string dictionary
+
+# Rows read to estimate the in-memory size of one row
+_SAMPLE_ROWS = 1000
+# In-memory overhead per chunk on top of its raw size (string parsing, splitting and exploding)
+_CHUNK_OVERHEAD = 4
+
+
+def contains_comma(series):
+    # Helper function to check if any value in the series contains a comma
+    return any(series.str.contains(','))
+
+
+def parse_multivalued(table):
+    # Converts comma-separated values into lists of stripped strings, in the columns that contain commas.
+    # Only text columns can contain commas, so numeric columns keep their compact dtype instead of
+    # becoming Python strings; the values become strings once they are dictionary-encoded after 1NF.
+    table = table.copy()
+    text_columns = [col for col in table.columns if not pd.api.types.is_numeric_dtype(table[col])]
+    for col in text_columns:
+        if table[col].isna().any():
+            table[col] = table[col].astype(str)  # Missing values are kept as the text 'nan', as before
+    columns_with_commas = list(filter(lambda col: contains_comma(table[col]), text_columns))
+    for col in columns_with_commas:
+        table[col] = table[col].apply(lambda x: list(map(str.strip, x.split(','))) if isinstance(x, str) else x)
+    return table
+
+
+def list_columns(table):
+    # Columns holding list values, as parse_multivalued leaves the multi-valued ones
+    return [col for col in table.columns if table[col].map(lambda value: isinstance(value, list)).any()]
+
+
+def explode_all(table, columns=None):
+    # Flattens every list-valued column (or the given ones), so each row holds atomic values only
+    for col in list_columns(table) if columns is None else columns:
+        table = table.explode(col)
+    return table
+
+
+def chunk_rows_for_budget(path, max_memory_mb):
+    # Number of CSV rows per chunk that keeps a parsed chunk within max_memory_mb megabytes
+    sample = pd.read_csv(path, nrows=_SAMPLE_ROWS, dtype=str)
+    if sample.empty:
+        return _SAMPLE_ROWS
+    row_bytes = sample.memory_usage(deep=True, index=False).sum() / len(sample)
+    return max(1, int(max_memory_mb * 1024 * 1024 / (row_bytes * _CHUNK_OVERHEAD)))
+
+
+def read_csv_chunks(path, max_memory_mb=None, chunk_rows=None):
+    # Iterates over the CSV file in chunks of raw string values, sized from the memory budget if given
+    if chunk_rows is None:
+        chunk_rows = chunk_rows_for_budget(path, max_memory_mb) if max_memory_mb else 100000
+    return pd.read_csv(path, dtype=str, chunksize=chunk_rows)
+
+
+class StreamingFDVerifier:
+    # Verifies functional dependencies chunk by chunk with one hash map (LHS values -> RHS values) per FD.
+    # An FD is dropped from tracking after its first counterexample, which is kept for reporting.
+
+    def __init__(self, fds):
+        self.fds = {tuple(lhs): list(rhs) for lhs, rhs in fds.items()}
+        self.maps = {lhs: {} for lhs in self.fds}  # Per-FD index of the RHS values seen for each LHS value
+        self.violations = {}  # lhs -> (lhs values, first RHS values, conflicting RHS values)
+        self.rows_seen = 0
+
+    def update(self, chunk):
+        # Checks the rows of one (atomic) chunk against everything seen so far
+        self.rows_seen += len(chunk)
+        for lhs, rhs in self.fds.items():
+            if lhs in self.violations or not set(lhs).union(rhs).issubset(chunk.columns):
+                continue
+            seen = self.maps[lhs]
+            columns = list(lhs) + [col for col in rhs if col not in lhs]
+            for row in chunk[columns].drop_duplicates().itertuples(index=False, name=None):
+                key, value = row[:len(lhs)], row[len(lhs):]
+                previous = seen.setdefault(key, value)
+                if previous != value:
+                    self.violations[lhs] = (key, previous, value)
+                    del self.maps[lhs]  # No need to keep indexing a violated FD
+                    break
+
+    def holds(self, lhs):
+        # Check if the FD with this left-hand side held on every row seen
+        return tuple(lhs) not in self.violations
+
+
+def _stream_codes(path, schemas, verifier=None, max_memory_mb=None, chunk_rows=None, atomic=False):
+    # One pass over the CSV file, collecting the distinct rows of every projection in schemas and
+    # verifying the FDs (on the atomic values) with the verifier, if any.
+    # The distinct rows are held as int32 codes (4 bytes per value, every string stored once in the
+    # dictionary) and deduplicated whenever they double, so memory grows with the distinct values, not
+    # with the rows read.
+    # Returns:
+    #     tuple: (dict name -> EncodedRelation of the distinct rows, raw or flattened when atomic is set,
+    #             or {} for a file without rows; the columns that held multi-valued values)
+    dictionary = encoding.SharedDictionary()
+    blocks = {name: [] for name in schemas}  # name -> list of encoded blocks of rows, distinct within each block
+    compacted = dict.fromkeys(schemas, 0)  # name -> rows held right after the last deduplication across blocks
+    multivalued = []
+    read_any = False
+    for chunk in read_csv_chunks(path, max_memory_mb, chunk_rows):
+        read_any = True
+        chunk = chunk.astype(str)  # Same string values as the in-memory path produces
+        exploded = chunk
+        if verifier is not None or atomic or not schemas:  # Raw projections alone need no parsing
+            parsed = parse_multivalued(chunk)
+            nested = list_columns(parsed)
+            multivalued.extend(col for col in nested if col not in multivalued)
+            exploded = explode_all(parsed, nested)
+        if verifier is not None:
+            verifier.update(exploded)
+        if not schemas:
+            continue
+        encoded_chunk = encoding.EncodedRelation.from_frame(exploded if atomic else chunk, dictionary)
+        for name, schema in schemas.items():
+            blocks[name].append(encoded_chunk[list(schema)].drop_duplicates())
+            held = sum(len(block) for block in blocks[name])
+            if len(blocks[name]) > 1 and held > 2 * compacted[name]:
+                # First-seen order is kept, as drop_duplicates keeps the first occurrence
+                blocks[name] = [encoding.concat_encoded(blocks[name]).drop_duplicates()]
+                compacted[name] = len(blocks[name][0])
+
+    if not read_any:
+        return {}, multivalued
+    projections = {}
+    for name, parts in blocks.items():
+        projections[name] = encoding.concat_encoded(parts).drop_duplicates()
+        del parts[:]  # Release the blocks of this projection before concatenating the next one
+    return projections, multivalued
+
+
+def stream_table(path, fds=None, schemas=None, max_memory_mb=None, chunk_rows=None):
+    # Reads a CSV file in bounded chunks, verifying FDs and collecting distinct projections as it goes.
+    # Args:
+    #     path (str): The CSV file.
+    #     fds (dict): Optional functional dependencies to verify, checked on the atomic (exploded) values.
+    #     schemas (dict): name -> list of columns of each target relation; the whole table by default.
+    #     max_memory_mb (float): Memory budget of one chunk, used to size the chunks.
+    #     chunk_rows (int): Explicit chunk size, overriding max_memory_mb.
+    # Returns:
+    #     tuple: (dict name -> DataFrame of distinct raw rows of that projection, StreamingFDVerifier or None)
+    # The result columns are object arrays pointing into the shared dictionary of the codes.
+    verifier = StreamingFDVerifier(fds) if fds else None
+    if schemas is None:
+        schemas = {"table": list(pd.read_csv(path, nrows=0).columns)}
+    projections, _ = _stream_codes(path, schemas, verifier, max_memory_mb, chunk_rows)
+    for name in projections:
+        rows = projections[name]
+        projections[name] = pd.DataFrame({col: rows.dictionary.decode(rows.column_codes(col)) for col in schemas[name]})
+    return projections, verifier
+
+
+class StreamedTable:
+    # A CSV file normalized under a memory budget without ever holding the whole table. One pass at
+    # construction verifies the FDs and finds the multi-valued columns; relations() then streams the
+    # file again to fill the relations planned on its header with their distinct atomic rows, which is
+    # what projecting them from the flattened 1NF table gives.
+
+    def __init__(self, path, fds=None, max_memory_mb=None, chunk_rows=None):
+        self.path = path
+        self.max_memory_mb = max_memory_mb
+        self.chunk_rows = chunk_rows
+        self.columns = list(pd.read_csv(path, nrows=0).columns)
+        self.verifier = StreamingFDVerifier(fds) if fds else None
+        _, self.multivalued = _stream_codes(path, {}, self.verifier, max_memory_mb, chunk_rows)
+
+    def relations(self, planned):
+        # The planned relations (name -> relation with columns) as EncodedRelations of their distinct atomic rows
+        schemas = {name: list(relation.columns) for name, relation in planned.items()}
+        projections, _ = _stream_codes(self.path, schemas, None, self.max_memory_mb, self.chunk_rows, atomic=True)
+        if not projections:  # No rows at all
+            dictionary = encoding.SharedDictionary()
+            projections = {name: encoding.EncodedRelation.from_frame(pd.DataFrame(columns=columns), dictionary)
+                           for name, columns in schemas.items()}
+        return projections
@@ -0,0 +1,50 @@
+# Join verification on factorized codes: counts join cardinality without materializing the join
+import numpy as np
+import backend  # Grouping and distinct counts of the selected execution backend
+import encoding  # Factorized integer codes for relation columns
+
+# Number of shared-key groups summed per step before checking the early exit
+_CHUNK = 1 << 16
+
+
+def join_cardinality(encoded, n_rows, left, right, limit=None):
+    # Counts the rows of the natural join of the projections on left and right.
+    # Args:
+    #     encoded (dict): Factorized columns of the base relation (see encoding.factorize_columns).
+    #     n_rows (int): Number of rows of the base relation.
+    #     left, right (iterable): The column sets of the two components.
+    #     limit (int): Optional bound; counting stops as soon as the join is known to exceed it.
+    # Returns:
+    #     int: The join cardinality, or a value greater than limit when counting stopped early.
+    left, right = list(left), list(right)
+    shared = [col for col in left if col in right]
+    engine = backend.current()
+    shared_ids, n_shared = engine.group_ids(encoded, shared, n_rows)
+    # For the distinct tuples of each component, how many fall into each shared-key group
+    left_counts = engine.distinct_per_group(encoded, left, shared_ids, n_shared, n_rows)
+    right_counts = engine.distinct_per_group(encoded, right, shared_ids, n_shared, n_rows)
+
+    total = 0
+    for start in range(0, n_shared, _CHUNK):
+        # Each shared key contributes (#left tuples) x (#right tuples) joined rows
+        total += int(np.dot(left_counts[start:start + _CHUNK], right_counts[start:start + _CHUNK]))
+        if limit is not None and total > limit:
+            break  # Already larger than the base relation, no need to finish counting
+    return total
+
+
+def is_lossless_join(relation, left, right, encoded=None):
+    # Checks if joining the projections of relation on left and right gives back exactly the relation.
+    # The join of two projections always contains the relation, so equal cardinalities prove equality.
+    # Args:
+    #     relation (DataFrame): The base relation.
+    #     left, right (iterable): The column sets of the two components; together they cover the relation.
+    #     encoded (dict): Optional precomputed codes of relation, reused across calls on the same relation.
+    # Returns:
+    #     bool: True if the decomposition is lossless for this instance.
+    if encoded is None:
+        encoded = encoding.cached_codes(relation)
+    n_rows = len(relation)
+    columns = list(dict.fromkeys(list(left) + list(right)))
+    _, n_distinct = backend.current().group_ids(encoded, columns, n_rows)  # Distinct tuples of the relation
+    return join_cardinality(encoded, n_rows, left, right, limit=n_distinct) == n_distinct
@@ -0,0 +1,141 @@
+# Candidate key discovery from functional dependencies and from data instances
+from itertools import combinations  # Used to walk the attribute lattice one level at a time
+import closure  # Bitset closure engine for the FD-based superkey tests
+import schema
+sampling = schema.lazy_import("sampling")  # Sampled uniqueness checks, loaded with the first data-level check
+
+# Key candidates prime_attributes may visit enumerating keys for the attributes its shortcuts leave open
+DEFAULT_PRIME_CHECKS = 5000
+
+
+def candidate_keys_from_fds(attributes, fds):
+    # Finds all minimal candidate keys of a relation implied by a set of functional dependencies.
+    # Args:
+    #     attributes (iterable): The columns of the relation.
+    #     fds (dict): Functional dependencies in the {tuple(lhs): [rhs]} form.
+    # Returns:
+    #     list: Candidate keys as tuples, in column order of the relation.
+    attributes = list(attributes)
+    engine = closure.get_engine(fds)
+    relation_mask = engine.encode(attributes)
+
+    # Attributes never on a right-hand side can not be derived, so they are forced into every key
+    rhs_attrs = {attr for rhs in fds.values() for attr in rhs}
+    core = [attr for attr in attributes if attr not in rhs_attrs]
+    middle = [attr for attr in attributes if attr in rhs_attrs]
+    core_mask = engine.encode(core)
+
+    def is_key(mask):
+        return relation_mask & ~engine.closure_mask(mask) == 0
+
+    if is_key(core_mask):
+        return [tuple(core)]
+
+    found_masks = []  # Bitmasks of keys found so far, used to prune their supersets
+    for size in range(1, len(middle) + 1):
+        for combo in combinations(middle, size):
+            mask = core_mask | engine.encode(combo)
+            if any(key & mask == key for key in found_masks):
+                continue  # Superset of a known key, so not minimal
+            if is_key(mask):
+                found_masks.append(mask)
+    keys = [engine.decode(mask) for mask in found_masks]
+    return [tuple(attr for attr in attributes if attr in key) for key in keys]
+
+
+def _minimize_key(engine, relation_mask, key_mask, bits):
+    # Shrinks the superkey key_mask by dropping the attributes at bits, in that order, wherever
+    # the rest still determines the relation
+    for bit in bits:
+        smaller = key_mask & ~(1 << bit)
+        if relation_mask & ~engine.closure_mask(smaller) == 0:
+            key_mask = smaller
+    return key_mask
+
+
+def prime_attributes(attributes, fds, max_checks=DEFAULT_PRIME_CHECKS):
+    # The attributes that belong to some candidate key, without enumerating every key (which is
+    # exponential). Attributes on no right-hand side are in every key; attributes on no left-hand side
+    # but on some right-hand side are in none, since the attributes that derive them do so without them.
+    # Each remaining attribute is tried in a key minimized from one known key plus that attribute, and
+    # those still open go through a level-wise key enumeration stopped after max_checks candidates.
+    # Args:
+    #     attributes (iterable): The columns of the relation.
+    #     fds (dict): Functional dependencies over those columns, in the {tuple(lhs): [rhs]} form.
+    #     max_checks (int): Bound on the key candidates the enumeration visits.
+    # Returns:
+    #     tuple: (set of prime attributes, set of attributes left undecided when the bound was reached)
+    attributes = list(attributes)
+    engine = closure.get_engine(fds)
+    relation_mask = engine.encode(attributes)
+    rhs_attrs = {attr for lhs, rhs in fds.items() for attr in rhs if attr not in lhs}
+    lhs_attrs = {attr for lhs in fds for attr in lhs}
+    prime = {attr for attr in attributes if attr not in rhs_attrs}
+    middle = [attr for attr in attributes if attr in rhs_attrs and attr in lhs_attrs]
+    core_mask = engine.encode(prime)
+    # Without the attributes that are in no key, the relation's attributes still form a superkey
+    first_key = _minimize_key(engine, relation_mask, core_mask | engine.encode(middle), [engine.bit_of[attr] for attr in middle])
+    prime |= engine.decode(first_key)  # Every attribute of a candidate key is prime
+    undecided = set(middle) - prime
+    for attr in middle:
+        if attr in undecided:
+            # A key of first_key plus attr that drops attr last keeps it if the others it needs were kept
+            bit = engine.bit_of[attr]
+            found = engine.decode(_minimize_key(engine, relation_mask, first_key | (1 << bit),
+                                                list(engine.bits(first_key & ~core_mask)) + [bit]))
+            prime |= found
+            undecided -= found
+    if not undecided:
+        return prime, undecided
+
+    found_masks = []
+    checks = 0
+    for size in range(len(middle) + 1):
+        for combo in combinations(middle, size):
+            checks += 1
+            if checks > max_checks:
+                return prime, undecided
+            mask = core_mask | engine.encode(combo)
+            if any(key & mask == key for key in found_masks):
+                continue  # Superset of a known key, so not minimal
+            if relation_mask & ~engine.closure_mask(mask) == 0:
+                found_masks.append(mask)
+                found = engine.decode(mask)
+                prime |= found
+                undecided -= found
+                if not undecided:
+                    return prime, undecided
+    return prime, set()  # Every key was enumerated: the rest are in none
+
+
+def is_unique(relation, attributes):
+    # Check if no two rows of the relation agree on all the given attributes; growing samples are
+    # searched for two such rows first, so most non-keys are rejected without a full scan
+    return sampling.check_unique(relation, attributes).holds
+
+
+def candidate_keys_from_data(relation, max_size=None):
+    # Finds all minimal sets of columns whose values are unique in the given data instance.
+    # Args:
+    #     relation (DataFrame): The relation instance to search.
+    #     max_size (int): Optional bound on the number of attributes per key.
+    # Returns:
+    #     list: Candidate keys as tuples, in column order of the relation.
+    relation = relation.drop_duplicates()  # Duplicate rows would make every column set non-unique
+    columns = list(relation.columns)
+    max_size = len(columns) if max_size is None else min(max_size, len(columns))
+    found = []
+    for size in range(1, max_size + 1):
+        for combo in combinations(columns, size):
+            if any(set(key).issubset(combo) for key in found):
+                continue  # Superset of a known key, so not minimal
+            if is_unique(relation, combo):
+                found.append(combo)
+    return found
+
+
+def discover_candidate_keys(relation, fds=None):
+    # Candidate keys of a relation: implied by fds when they are given, otherwise mined from the data
+    if fds:
+        return candidate_keys_from_fds(relation.columns, fds)
+    return candidate_keys_from_data(relation)
@@ -1,48 +1,115 @@
 # main file to read csv_file and import other files 
-import pandas as pd
 import csv
-import normalizer
+import os
+import backend
+import executor
+import pipeline
+import ddl
+import schema
+import tracing
 import re
-
-# Reading the input csv file and the fds text file
+import argparse
+# Modules that need pandas are loaded on first use, so the schema-only mode starts without it
+ingest = schema.lazy_import("ingest")
+export = schema.lazy_import("export")
+store = schema.lazy_import("store")
+
+# Command line options; without any, the program reads fds.txt and asks for the rest interactively
+parser = argparse.ArgumentParser(description="Normalize referenceInputTable.csv up to the selected normal form.")
+parser.add_argument("--discover-fds", action="store_true", help="mine minimal FDs from the table instead of reading fds.txt")
+parser.add_argument("--max-lhs", type=int, default=None, help="largest left-hand side considered by --discover-fds")
+parser.add_argument("--jobs", type=int, default=1, help="worker processes used by --discover-fds")
+parser.add_argument("--split-multivalued", action="store_true", help="put each multi-valued column in its own 1NF relation with the primary key instead of cross-multiplying them")
+parser.add_argument("--explode-chunk-rows", type=int, default=100000, help="rows per chunk when flattening multi-valued columns")
+parser.add_argument("--max-memory", type=float, default=None, help="read the CSV in chunks of at most this many MB")
+parser.add_argument("--workers", type=int, default=1, help="relations validated and decomposed in parallel")
+parser.add_argument("--executor", choices=["thread", "process"], default="thread", help="pool used with --workers")
+parser.add_argument("--verbosity", type=int, choices=[0, 1, 2], default=2, help="0: quiet, 1: messages only, 2: also print every intermediate relation")
+parser.add_argument("--trace", default=None, help="write per-stage timings, rows, closure calls and peak memory to this JSON file (tracing the allocations slows the run down)")
+parser.add_argument("--schema-only", action="store_true", help="normalize 1NF-BCNF from the csv header and fds.txt, without loading the rows")
+parser.add_argument("--export-sqlite", default=None, help="load the rows of the normalized tables into this SQLite database")
+parser.add_argument("--export-csv", default=None, help="write the rows of the normalized tables as CSV files into this directory")
+parser.add_argument("--result-cache", default=os.environ.get("NORMALIZER_CACHE_DIR"), help="reuse results of identical earlier runs stored in this directory")
+parser.add_argument("--result-cache-mb", type=float, default=1024, help="size bound of --result-cache; least recently used results are evicted")
+parser.add_argument("--backend", choices=["pandas", "arrow"], default=os.environ.get("NORMALIZER_BACKEND", "pandas"), help="engine of the projections, deduplication, explosion, group counts and join counts (arrow is experimental)")
+parser.add_argument("--spill-mb", type=float, default=None, help="keep at most this many MB of decomposed relations in memory and spill the rest to memory-mapped files")
+parser.add_argument("--spill-dir", default=None, help="directory of the --spill-mb files (default: the system temporary directory)")
+args = parser.parse_args()
+executor.configure(workers=args.workers, kind=args.executor)
 try:
-    table = pd.read_csv('referenceInputTable.csv')
-    print(f"Provided sample input Table:\n{table}\n")
-except FileNotFoundError:
-    print("Error: 'referenceInputTable.csv' not found.")
+    backend.configure(args.backend)
+except ImportError as error:
+    print(f"Error: {error}")
     exit(1)
-# Enter FDs as input by reading file
-try:
-    with open('fds.txt', 'r') as file:
-        lines = [line.strip() for line in file]
-except FileNotFoundError:
-    print("Error: 'fds.txt' not found.")
+tracing.configure(verbosity=args.verbosity, memory=True if args.trace else None)
+if args.schema_only and args.discover_fds:
+    print("Error: --discover-fds mines the FDs from the rows, so it can not be combined with --schema-only.")
+    exit(1)
+if args.spill_mb is not None:
+    store.configure(budget_mb=args.spill_mb, directory=args.spill_dir)
+if args.schema_only and (args.export_sqlite or args.export_csv):
+    print("Error: --export-sqlite and --export-csv write the rows, so they can not be combined with --schema-only.")
     exit(1)
-fds = {}
-for line in lines:
-    determinant, dependent = line.split(" -> ")
-    # Splitting the determinant by comma to make it a list
-    determinant = determinant.split(", ")
-    fds[tuple(determinant)] = dependent.split(", ")
-print(f"fds=\n{fds}\n")
-
-# Helper function to check if any value in the series contains a comma
-def contains_comma(series):
-    return any(series.str.contains(','))
-
-# Helper function  to parse the main data table for comma-separated values (input parser)
-def inputparser(table):
-    table = table.astype(str)  # Ensure all data is treated as strings
-    
-    # Use filter to find columns that contain commas
-    columns_with_commas = list(filter(lambda col: contains_comma(table[col]), table.columns))
-    
-    # Use map to apply splitting and stripping on each column with commas
-    for col in columns_with_commas:
-        table[col] = table[col].apply(lambda x: list(map(str.strip, x.split(','))) if isinstance(x, str) else x)
 
+# Helper function to read the whole input csv file
+def read_table():
+    try:
+        table = pipeline.read_table('referenceInputTable.csv')
+        tracing.show(table, "Provided sample input Table:")
+    except FileNotFoundError:
+        print("Error: 'referenceInputTable.csv' not found.")
+        exit(1)
     return table
 
+# Helper function to stream the csv file under a memory budget, verifying the FDs chunk by chunk. With the FDs known
+# the decomposition is planned on the header and only the rows of the planned relations are streamed in during the
+# normalization (see ingest.StreamedTable); mined FDs need the table, so then its distinct rows are kept.
+# Returns the table (or its schema) and the StreamedTable, or None
+def stream_table(fds):
+    import pandas as pd  # Only needed once the rows are read
+    source = fd_verifier = None
+    try:
+        if fds is None:
+            projections, _ = ingest.stream_table('referenceInputTable.csv', max_memory_mb=args.max_memory)
+            table = projections.get("table", pd.DataFrame())
+            tracing.show(table, "Provided sample input Table:")
+        else:
+            source = ingest.StreamedTable('referenceInputTable.csv', fds, max_memory_mb=args.max_memory)
+            table, fd_verifier = schema.SchemaRelation(source.columns), source.verifier
+            print(f"Provided input schema:\n{table}\n")
+    except FileNotFoundError:
+        print("Error: 'referenceInputTable.csv' not found.")
+        exit(1)
+    if fd_verifier is not None:
+        for lhs, (lhs_values, rhs_values, other_values) in fd_verifier.violations.items():
+            print(f"Warning: FD {lhs} -> {fds[lhs]} does not hold: {lhs_values} maps to {rhs_values} and {other_values}\n")
+    return table, source
+
+# Reading the input csv file (or only its header) and the fds text file
+source = None  # The csv file the planned relations are streamed from under a memory budget
+if args.schema_only:
+    try:
+        table = schema.SchemaRelation(schema.read_header('referenceInputTable.csv'))
+        print(f"Provided input schema:\n{table}\n")
+    except FileNotFoundError:
+        print("Error: 'referenceInputTable.csv' not found.")
+        exit(1)
+elif args.max_memory is None:
+    table = read_table()
+# Enter FDs as input by reading file, unless they are to be discovered from the data
+if args.discover_fds:
+    fds = None  # Mined from the 1NF table below
+else:
+    try:
+        fds = pipeline.read_fds('fds.txt')
+    except FileNotFoundError:
+        print("Error: 'fds.txt' not found. Use --discover-fds to mine FDs from the table instead.")
+        exit(1)
+    print(f"fds=\n{fds}\n")
+
+# With a memory budget, stream the csv file after the FDs are known, so they can be verified on the way
+if args.max_memory is not None and not args.schema_only:
+    table, source = stream_table(fds)
 
 # Enter mvds as input 
 mvds = {}
@@ -52,12 +119,9 @@ while True:
         break
     try:
         # Split the input into determinant and dependent parts
-        determinant, dependent = inp.split(" ->> ")
-        # Clean up the inputs by stripping extra spaces
-        determinants_list = [d.strip() for d in determinant.split(',')]
-        dependents_list = [d.strip() for d in dependent.split(',')]
+        determinant, dependents_list = pipeline.parse_mvd(inp)
         # Store in the dictionary
-        mvds.setdefault(tuple(determinants_list), []).extend(dependents_list)  # Use setdefault for cleaner logic
+        mvds.setdefault(determinant, []).extend(dependents_list)  # Use setdefault for cleaner logic
     except ValueError:
         print("Invalid input format, enter input format as X ->> A, B or X ->> A.")
 
@@ -72,202 +136,48 @@ print('}')
 # Choose any normal form as input to normalize the input table if not in the provided user normal form
 step = int(input("\nSelect the highest normal form that the table can achieve (1: 1NF, 2: 2NF, 3: 3NF, 4: BCNF, 5: 4NF, 6: 5NF): "))
 current = int(input("\nDo you want to know the highest normal form of the input table? (1: Yes, 2: No): "))
-highest_normal_form = 0  # Variable to keep track of the highest normal form achieved
 
 # Enter primary or composite keys as input
-pk = input("\nEnter primary keys (for composite keys, separate them with commas): ").split(', ')
-# Convert list to tuple
-pk = tuple(pk)
-
-# To generate output schema with proper constraints, first let's determine SQL datatype
-def determine_sql_datatype(dtype):
-    # Determine the SQL data type based on the pandas data type.
-    if pd.api.types.is_integer_dtype(dtype):
-        return "INT"
-    elif pd.api.types.is_float_dtype(dtype):
-        return "FLOAT"
-    elif pd.api.types.is_bool_dtype(dtype):
-        return "BOOLEAN"
-    elif pd.api.types.is_datetime64_any_dtype(dtype):
-        return "DATETIME"
-    elif pd.api.types.is_string_dtype(dtype):
-        max_length = dtype.str.len().max()  # Get the maximum length of the string values
-        return f"VARCHAR({max_length})" if max_length is not None else "VARCHAR(255)"
+pk = pipeline.parse_key(input("\nEnter primary keys (for composite keys, separate them with commas): "))
+
+# 4NF and 5NF are checked on the data instances, so a schema-only run reads the rows for them
+schema_only = args.schema_only and step < 5
+if args.schema_only and not schema_only:
+    print("\n4NF and 5NF are checked on the data instances, reading the table.\n")
+    if args.max_memory is None:
+        table = read_table()
     else:
-        # Default to VARCHAR(255) for non-numeric or unknown types
-        return "VARCHAR(255)"
-    
-# To generate output queries for 1NF   
-def generate_1nf_table_sql(pk, dataframe):
-    # Assume `pk` is the primary key column; if not provided, take the first column as primary key.
-    pk = list(dataframe.keys())[0]
-    
-    # Create table name by joining primary key column names with an underscore
-    table_name = "_".join(pk)
-    
-    # Extract only the columns related to primary keys from dataframe
-    dataframe = dataframe[pk]
-    
-    # Start forming the CREATE TABLE SQL query
-    create_query = f"CREATE TABLE {table_name} (\n"
-    
-    # Add columns to the query, specifying the primary key(s) and appropriate SQL data types
-    for column in dataframe.columns:
-        dtype = determine_sql_datatype(dataframe[column])  # Use the dynamic determination function
-        if column in pk:
-            # Mark column as NOT NULL and PRIMARY KEY
-            create_query += f"  {column} {dtype} NOT NULL PRIMARY KEY,\n"
-        else:
-            create_query += f"  {column} {dtype},\n"
-    
-    # Remove last comma and close the table statement
-    create_query = create_query.rstrip(',\n') + "\n);"
-    print(create_query)  # Output the generated SQL query for debugging or review
-
-# Function to create SQL tables for each normalized relation based on given relations and functional dependencies
-def create_tables_for_normalized_relations(relations, fds):
-    for rel_name, relation in relations.items():
-        # Assume `rel_name` contains the primary key(s) and convert to tuple if it's a single string
-        pks = rel_name
-        pks = (pks,) if isinstance(pks, str) else pks
-        
-        # Construct table name from primary keys
-        table_name = "_".join(pks)
-        
-        # Begin the CREATE TABLE statement for the relation
-        create_query = f"CREATE TABLE {table_name} (\n"
-        
-        # Loop through columns in the relation and add each to the CREATE TABLE statement
-        for column in relation.columns:
-            # Pass the actual column to determine_sql_datatype
-            create_query += f"  {column} {determine_sql_datatype(relation[column])}"
-            if column in pks:  # Add NOT NULL and PRIMARY KEY constraint if column is a primary key
-                create_query += " NOT NULL PRIMARY KEY"
-            create_query += ",\n"
-        
-        # Track foreign keys already added to avoid duplicates
-        foreign_keys_added = set()
-        
-        # Loop through functional dependencies to create foreign key constraints where applicable
-        for (determinants, dependents) in fds.items():
-            for dep in dependents:
-                # Only add foreign key if column is part of current relation and not a primary key
-                if dep in relation.columns and dep not in pks:
-                    # Search for the source table containing the foreign key column
-                    for source_table, source_columns in relations.items():
-                        if dep in source_columns.columns and source_table != rel_name:
-                            # Add the foreign key if it has not already been added
-                            if (dep, source_table) not in foreign_keys_added:
-                                # Format source table name if its a tuple
-                                source_table_name = "_".join(source_table) if isinstance(source_table, tuple) else source_table
-                                create_query += f"  FOREIGN KEY ({dep}) REFERENCES {source_table_name}({dep}),\n"
-                                foreign_keys_added.add((dep, source_table))
-        
-        # Remove trailing comma, newline, and finalize the CREATE TABLE statement
-        create_query = create_query.rstrip(',\n') + "\n);"
-        
-        # Output the SQL query for the generated table (useful for debugging or review)
+        table, source = stream_table(fds)
+
+# Normalize the table up to the selected normal form
+relations, highest_normal_form, fds = pipeline.normalize(table, fds, mvds, pk, step,
+                                                         schema_only=schema_only or source is not None,
+                                                         max_lhs=args.max_lhs, jobs=args.jobs,
+                                                         explode_chunk_rows=args.explode_chunk_rows,
+                                                         cache_dir=args.result_cache, cache_max_mb=args.result_cache_mb,
+                                                         source=source, split_multivalued=args.split_multivalued)
+
+# Generate the SQL queries for the selected normal form
+if step in pipeline.NORMAL_FORMS:
+    print(f"Generating output queries for {pipeline.NORMAL_FORMS[step]}-->\n")
+    with tracing.stage("ddl", relations):
+        statements = ddl.generate_sql(relations, fds, step, pk)
+    for create_query in statements:
         print(create_query)
 
-table = inputparser(table)
-# Normalize to 1NF 
-if step >= 1:
-    result = normalizer.transform_to_1NF(table, pk)  # Call the normalization function for 1NF
-    normalized_table_1 = result[0]  # Get the normalized table after applying 1NF
-    onenfcheck = result[1]  # Get the check result for 1NF
-
-    # Check if the table was already in 1NF
-    if onenfcheck:
-        print("Given input table is already in 1NF.\n")
-        highest_normal_form = max(highest_normal_form, 1)  # Update the highest normal form achieved
-
-    # If this is the step for 1NF, generate the SQL queries
-    if step == 1:
-        print("Generating output queries for 1NF-->\n")
-        generate_1nf_table_sql(pk, normalized_table_1)
-
-
-# Normalize to 2NF
-if step >= 2:
-    # Normalize to 2NF
-    normalized_result = normalizer.transform_to_2NF(normalized_table_1, pk, fds)  # Transform to 2NF
-    normalized_table_2, twonfcheck = normalized_result  # Get the normalized table and check result
-
-    # Check if the table was already in 2NF
-    if twonfcheck:
-        print("Given input table is already in 2NF.\n")
-        highest_normal_form = max(highest_normal_form, 2)  # Update highest normal form
-
-    # If this is the step for 2NF, generate the SQL queries
-    if step == 2:
-        print("Generating output queries for 2NF-->\n")
-        create_tables_for_normalized_relations(normalized_table_2, fds)  # Create tables for the normalized relations
-
-
-# Normalize to 3NF
-if step >= 3:
-    # Normalize to 3NF
-    normalized_result = normalizer.transform_to_3NF(normalized_table_2, fds)  # Transform to 3NF
-    normalized_table_3, threenfcheck = normalized_result  # Get the normalized table and check result
-
-    # Check if the table was already in 3NF
-    if threenfcheck:
-        print("Given input table is already in 3NF.\n")
-        highest_normal_form = max(highest_normal_form, 3)  # Update highest normal form
-
-    # If this is the step for 3NF, generate the SQL queries
-    if step == 3:
-        print("Generating output queries for 3NF-->\n")
-        create_tables_for_normalized_relations(normalized_table_3, fds)  # Create tables for the normalized relations
-
-
-# Normalize to BCNF
-if step >= 4:
-    # Normalize to BCNF
-    normalized_result_bcnf = normalizer.transform_to_BCNF(normalized_table_3, pk, fds)  # Transform to BCNF
-    normalized_table_bcnf, bcnfcheck = normalized_result_bcnf  # Get the normalized table and check result
-
-    # Check if the table was already in BCNF
-    if bcnfcheck:
-        print("Given input table is already in BCNF.\n")
-        highest_normal_form = max(highest_normal_form, 4)  # Update highest normal form
-
-    # If this is the step for BCNF, generate the SQL queries
-    if step == 4:
-        print("Generating output queries for BCNF-->\n")
-        create_tables_for_normalized_relations(normalized_table_bcnf, fds)  # Create tables for the normalized relations
-   
-
-# Normalize to 4NF
-if step >= 5:
-    normalized_result = normalizer.transform_to_4NF(normalized_table_bcnf, mvds)  # Transform to 4NF
-    normalized_table_4nf, fournfcheck = normalized_result  # Get the normalized table and check result
-
-    # Check if the table was already in 4NF
-    if fournfcheck:
-        print("Given input table is already in 4NF.\n")
-        highest_normal_form = max(highest_normal_form, 5)  # Update highest normal form
-
-    # If this is the step for 4NF, generate the SQL queries
-    if step == 5:
-        print("Generating output queries for 4NF-->\n")
-        create_tables_for_normalized_relations(normalized_table_4nf, fds)  # Create tables for the normalized relations
-
-
-# Normalize to 5NF
-if step >= 6:
-    normalized_result = normalizer.transform_to_5NF(normalized_table_4nf, pk, fds)  # Transform to 5NF
-    normalized_table_5nf, fivenfcheck = normalized_result  # Get the normalized table and check result
-
-    # Check if the table was already in 5NF
-    if fivenfcheck:
-        print("Given input table is already in 5NF.\n")
-        highest_normal_form = max(highest_normal_form, 6)  # Update highest normal form
-
-    # If this is the step for 5NF, generate the SQL queries
-    if step == 6:
-        print("Generating output queries for 5NF-->\n")
-        create_tables_for_normalized_relations(normalized_table_5nf, fds)  # Create tables for the normalized relations
+# Export the rows of the normalized tables, reporting the load rate and checking every row arrived
+for target, export_function in ((args.export_sqlite, export.export_sqlite), (args.export_csv, export.export_csv)):
+    if target and step in pipeline.NORMAL_FORMS:
+        with tracing.stage("export", relations):
+            reports = export_function(relations, fds, target, step, pk)
+        for report in reports:
+            tracing.message(f"Exported {report['loaded']} rows of {report['table']} to {target} ({report['rows_per_sec']} rows/sec)")
+            if not report["verified"]:
+                print(f"Warning: {report['table']} has {report['rows']} rows but {report['loaded']} were exported.")
+            if report["unique_key"] is False:
+                print(f"Warning: the rows of {report['table']} repeat its key, so the data does not satisfy the FDs.")
+if args.trace:
+    tracing.write_json(args.trace)
 
 
 # Output the highest normal form achieved if the user requested it
@@ -276,15 +186,6 @@ if current == 1:
     if highest_normal_form == 0:
         print("The input table is still not normalized into any specific normal form.")
     else:
-        # Map the highest normal form number to its name
-        normal_forms = {
-            1: "1NF",
-            2: "2NF",
-            3: "3NF",
-            4: "BCNF",
-            5: "4NF",
-            6: "5NF"
-        }
-        print(f"The highest normal form achieved is: {normal_forms[highest_normal_form]}")  # Output the highest normal form achieved
+        print(f"The highest normal form achieved is: {pipeline.NORMAL_FORMS[highest_normal_form]}")  # Output the highest normal form achieved
 
 print("Normalization process completed.")  # Indicate that the normalization process is finished
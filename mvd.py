@@ -0,0 +1,56 @@
+# Counting-based multi-valued dependency checks on factorized codes
+import numpy as np
+import backend  # Grouping and distinct counts of the selected execution backend
+import encoding  # Factorized integer codes, cached per relation
+
+
+def violating_rows(relation, determinant, dependent, encoded=None):
+    # Positions of one row per X-group that violates X ->> Y, in group order (empty when the MVD holds).
+    # X ->> Y holds exactly when every X-group has |pi_XY| * |pi_XZ| == |pi_XYZ| distinct tuples.
+    if encoded is None:
+        encoded = encoding.cached_codes(relation)
+    n_rows = len(relation)
+    x_cols = list(determinant)
+    y_cols = [col for col in dependent if col not in x_cols]
+    z_cols = [col for col in relation.columns if col not in x_cols and col not in y_cols]
+
+    engine = backend.current()
+    x_ids, n_groups = engine.group_ids(encoded, x_cols, n_rows)
+    # Number of distinct XY, XZ and XYZ tuples inside each X-group
+    xy_counts = engine.distinct_per_group(encoded, x_cols + y_cols, x_ids, n_groups, n_rows)
+    xz_counts = engine.distinct_per_group(encoded, x_cols + z_cols, x_ids, n_groups, n_rows)
+    xyz_counts = engine.distinct_per_group(encoded, x_cols + y_cols + z_cols, x_ids, n_groups, n_rows)
+
+    violating = np.flatnonzero(xy_counts * xz_counts != xyz_counts)
+    if not len(violating):
+        return violating
+    return engine.distinct_rows(encoded, x_cols, n_rows)[violating]  # One row per X-group, in group order
+
+
+def group_values(relation, determinant, rows):
+    # DataFrame with the X values of the given rows, one line per X-group
+    x_cols = list(determinant)
+    return encoding.to_frame(encoding.take_rows(relation, rows)[x_cols]).drop_duplicates().reset_index(drop=True)
+
+
+def check_mvd(relation, determinant, dependent, encoded=None):
+    # Checks the multi-valued dependency X ->> Y on a relation instance, with Z the remaining columns.
+    # Args:
+    #     relation (DataFrame): The relation instance.
+    #     determinant (list): The columns of X.
+    #     dependent (list): The columns of Y.
+    #     encoded (dict): Optional factorized columns of relation, cached per relation when omitted.
+    # Returns:
+    #     tuple: (True if the MVD holds, DataFrame with the X values of the groups that violate it)
+    rows = violating_rows(relation, determinant, dependent, encoded)
+    return not len(rows), group_values(relation, determinant, rows)
+
+
+def is_determinant_unique(relation, determinant, encoded=None):
+    # Check if no two distinct tuples of the relation share the same X values (X is a superkey)
+    if encoded is None:
+        encoded = encoding.cached_codes(relation)
+    n_rows = len(relation)
+    _, n_groups = encoding.group_ids(encoded, determinant, n_rows)
+    _, n_distinct = encoding.group_ids(encoded, relation.columns, n_rows)
+    return n_groups == n_distinct
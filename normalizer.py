@@ -1,6 +1,23 @@
-import pandas as pd  # Import the Pandas library for data manipulation and analysis, using the alias 'pd'
 from itertools import combinations  # Import the 'combinations' function from 'itertools' for generating combinations of elements from an iterable
-import re  # Import the 're' module for working with regular expressions, useful for string searching and manipulation
+import closure  # Import the bitset closure engine used for attribute closures and superkey checks
+import keys  # Import candidate key discovery used by the 5NF checks
+import schema  # Import schema-only relations and the lazy module loader
+# The data-level modules pull in pandas and numpy, so they are only loaded once a table is checked
+encoding = schema.lazy_import("encoding")  # Import factorized integer codes for the data-level checks
+joins = schema.lazy_import("joins")  # Import the join-cardinality engine for lossless-join checks
+mvd = schema.lazy_import("mvd")  # Import the counting-based multi-valued dependency checks
+exploder = schema.lazy_import("exploder")  # Import the chunked 1NF flattening
+profiling = schema.lazy_import("profiling")  # Import the cached single-pass column type profiling
+sampling = schema.lazy_import("sampling")  # Import the sampled pre-validation of dependencies
+backend = schema.lazy_import("backend")  # Import the pandas/arrow execution backends of the data-level transforms
+store = schema.lazy_import("store")  # Import the spill-to-disk relation store
+import executor  # Import the relation-level thread/process pool layer
+import cover  # Import the minimal cover and Bernstein 3NF synthesis
+import plan  # Import the lazy decomposition plan
+import tracing  # Import the verbosity-controlled output and stage instrumentation
+
+# Determinant candidates relation_fds may check when projecting the FDs onto one relation
+DEFAULT_PROJECTION_CHECKS = 5000
 
 
 ############################1NF##########################################
@@ -14,15 +31,17 @@ def validate_1NF(relation):
     # Check if the DataFrame is empty
     if relation.empty:
         return False
+
+    # Schema-only relations have atomic attributes by definition, and encoded relations hold
+    # one atomic string value per cell by construction
+    if isinstance(relation, schema.SchemaRelation) or isinstance(relation, encoding.EncodedRelation):
+        return True
     
     # Ensure each column has a single, consistent data type and no nested structures.
-    for col in relation.columns:
-        # If a column contains more than one unique type, it violates 1NF
-        if relation[col].map(type).nunique() > 1:
-            return False
-        
-        # Check if any item in the column is a nested structure (list, dict, or set)
-        if relation[col].apply(lambda item: isinstance(item, (list, dict, set))).any():
+    # One profiling pass per column answers both questions; it is sampled first and cached for transform_to_1NF.
+    for profile in profiling.profile_relation(relation).values():
+        # If a column contains more than one unique type, or a nested structure (list, dict, or set), it violates 1NF
+        if profile.n_types > 1 or profile.has_nested:
             return False
             
     return True  # Return True if all checks pass, indicating the relation is in 1NF
@@ -36,11 +55,15 @@ def is_nested_collection(value):
     
     return isinstance(value, (list, set))  # Return True if the value is of type list or set
 
-def transform_to_1NF(relation, pk):
+def transform_to_1NF(relation, pk, chunk_rows=None, split_multivalued=False):
     # Transforms a relation to comply with First Normal Form (1NF) by flattening any nested structures.
     # Args:
     #     relation (DataFrame): The DataFrame representing the relation to normalize.
     #     pk: The primary key identifier for the relation.
+    #     chunk_rows (int): Optional; explode in chunks of about this many rows and dictionary-encode each
+    #         chunk as it is produced, so the flattened relation is returned as an EncodedRelation.
+    #     split_multivalued (bool): Put each multi-valued column in its own relation with the primary key
+    #         instead of cross-multiplying independent multi-valued columns.
     # Returns:
     #     tuple: A dictionary with the normalized relation and a boolean indicating if normalization was required.
     
@@ -52,15 +75,32 @@ def transform_to_1NF(relation, pk):
         normalized_relations[pk] = relation
         return normalized_relations, is_already_1NF
     else:
-        # If the relation is not in 1NF, process each column to flatten nested structures
-        for col in relation.columns:
-            # Check if any item in the column is a nested collection
-            if relation[col].apply(is_nested_collection).any():
+        # If the relation is not in 1NF, find the columns holding nested collections
+        # (reusing the profiles of validate_1NF, completed by a full scan where they came from a sample)
+        profiles = profiling.profile_relation(relation, full=True)
+        nested_cols = [col for col in relation.columns if profiles[col].has_collection]
+        # Estimate the flattened size from the per-row list lengths before building anything
+        estimated_rows = exploder.estimate_exploded_rows(relation, nested_cols)
+        tracing.message(f"Flattening {nested_cols} turns {len(relation)} rows into {estimated_rows} rows.\n")
+
+        if split_multivalued:
+            # One relation per multi-valued column, keyed by the primary key
+            normalized_relations = exploder.split_multivalued(relation, pk, nested_cols)
+            for rel_key in normalized_relations:
+                tracing.show(normalized_relations[rel_key], "The relation after transforming into 1NF:")
+            return normalized_relations, is_already_1NF
+        elif chunk_rows is not None:
+            # Explode chunk by chunk into one shared dictionary, so the full string frame never exists
+            dictionary = encoding.SharedDictionary()
+            chunks = backend.current().explode(relation, nested_cols, chunk_rows)
+            relation = encoding.concat_encoded([encoding.EncodedRelation.from_frame(chunk, dictionary) for chunk in chunks])
+        else:
+            for col in nested_cols:
                 # Flatten the nested structures in the column using explode
                 relation = relation.explode(col)  # Explode the column to separate nested elements into individual rows
 
         # Display the transformed relation
-        print(f"The relation after transforming into 1NF:\n{relation}\n")
+        tracing.show(relation, "The relation after transforming into 1NF:")
         normalized_relations[pk] = relation  # Store the normalized relation
         return normalized_relations, is_already_1NF  # Return the normalized relations and 1NF status
 
@@ -82,7 +122,9 @@ def validate_2NF(pk, fds, rel):
 
 def transform_to_2NF(rel, pk, fds):
     # Focus on the primary key in the relation
-    rel = rel[pk]  # Select only the primary key columns
+    others = {name: relation for name, relation in rel.items() if name != pk}  # Split off in 1NF, kept as they are
+    rel = plan.lazy(rel[pk])  # Select only the primary key columns; later stages only change the plan's schemas
+    rel = rel[list(rel.columns)]  # A new relation, so the in-place drop below leaves the 1NF relation as it was
     normalized_relations = {}  # Dictionary to hold normalized relations
     attributes_to_remove = []  # List to track attributes to remove from the original relation
     is_2NF = validate_2NF(pk, fds, rel)  # Validate if the relation is in 2NF
@@ -90,9 +132,10 @@ def transform_to_2NF(rel, pk, fds):
     if is_2NF:
         # If the relation is already in 2NF, store it and return
         normalized_relations[pk] = rel
+        normalized_relations.update(others)
         return normalized_relations, is_2NF
     else:
-        print("Resulting relation after conversion to 2NF:\n")
+        tracing.message("Resulting relation after conversion to 2NF:\n")
         # Collect non-primary attributes for further processing
         non_primary_attrs = [col for col in rel.columns if col not in pk]
 
@@ -114,47 +157,119 @@ def transform_to_2NF(rel, pk, fds):
         # Remove the non-key attributes from the original relation
         rel.drop(columns=attributes_to_remove, inplace=True)
         normalized_relations[pk] = rel  # Store the modified original relation
+        normalized_relations.update(others)
 
         # Display the normalized relations
         for rel_key in normalized_relations:
-            print(normalized_relations[rel_key])  # Print each normalized relation
-            print('\n')
+            tracing.show(normalized_relations[rel_key])  # Print each normalized relation
 
         return normalized_relations, is_2NF  # Return the normalized relations and 2NF status
 ############3NF#############
+def relation_fds(relation, fds, max_checks=DEFAULT_PROJECTION_CHECKS):
+    # The functional dependencies that hold inside one relation: the projection of fds onto its columns,
+    # X -> (closure of X) & columns for the subsets X of the columns. The closure runs over all of fds,
+    # so an FD that only follows through attributes the relation lacks (ID -> Dept -> Floor without
+    # Dept) is kept. A minimal determinant only holds attributes on some left-hand side, so only those
+    # are combined, smallest first, skipping supersets of superkeys and leaving out the FDs implied by
+    # those already found. Past max_checks candidates only the given determinants within the columns
+    # are added, which can miss projected FDs.
+    # Returns:
+    #     dict: Functional dependencies over the relation's columns, in the {tuple(lhs): [rhs]} form.
+    columns = list(relation.columns)
+    if not fds:
+        return {}
+    engine = closure.get_engine(fds)
+    relation_mask = engine.encode(columns)
+    lhs_attrs = {attr for lhs in fds for attr in ((lhs,) if isinstance(lhs, str) else lhs)}
+    candidates = [col for col in columns if col in lhs_attrs]
+    found = []  # (lhs mask, rhs mask) of the projected FDs
+    superkeys = []  # Determinants whose supersets derive nothing new
+
+    def implied(mask):
+        # Closure of mask under the projected FDs found so far
+        changed = True
+        while changed:
+            changed = False
+            for lhs_mask, rhs_mask in found:
+                if lhs_mask & ~mask == 0 and rhs_mask & ~mask:
+                    mask |= rhs_mask
+                    changed = True
+        return mask
+
+    def project(lhs_mask):
+        derived = engine.closure_mask(lhs_mask) & relation_mask
+        if relation_mask & ~derived == 0:
+            superkeys.append(lhs_mask)
+        gained = derived & ~implied(lhs_mask)
+        if gained:
+            found.append((lhs_mask, gained))
+
+    checks = 0
+    for size in range(len(candidates) + 1):
+        for combo in combinations(candidates, size):
+            lhs_mask = engine.encode(combo)
+            if any(key & lhs_mask == key for key in superkeys):
+                continue  # Superset of a superkey, so nothing new
+            checks += 1
+            if checks > max_checks:
+                break
+            project(lhs_mask)
+        if checks > max_checks:
+            for lhs in fds:  # The given determinants within the relation
+                lhs_mask = engine.encode((lhs,) if isinstance(lhs, str) else lhs)
+                if lhs_mask & ~relation_mask == 0:
+                    project(lhs_mask)
+            break
+
+    # Given determinants first, in their order, so the synthesized relations keep the order of fds
+    given = {}
+    for lhs in fds:
+        given.setdefault(engine.encode((lhs,) if isinstance(lhs, str) else lhs), len(given))
+    found.sort(key=lambda fd: given.get(fd[0], len(given)))
+
+    def names(mask):
+        return [col for col in columns if mask >> engine.bit_of[col] & 1]
+    return {tuple(names(lhs_mask)): names(rhs_mask) for lhs_mask, rhs_mask in found}
+
 def has_partial_dependencies(relations_dict, fds):
-    # Identify the primary key by extracting keys from functional dependencies
-    pk = set(fds.keys())
-    # Identify non-key attributes by collecting attributes from right-hand sides of functional dependencies
-    non_key_attributes = {attr for attrs in fds.values() for attr in attrs}
-    
-    # Iterate over each relation in the relations dictionary
+    # Check the relations for FDs that violate 3NF: a determinant that is not a superkey
+    # deciding an attribute that is not part of any candidate key
     for rel_name, rel in relations_dict.items():
-        # Check each functional dependency
-        for lhs, rhs in fds.items():
-            # Check if the lhs is part of the relation, not a subset of the primary key,
-            # and the rhs is a subset of non-key attributes
-            if (set(lhs).issubset(rel.columns) and 
-                not set(lhs).issubset(pk) and 
-                set(rhs).issubset(non_key_attributes)):
-                return True  # Return True if a partial dependency is found
-    return False  # Return False if no partial dependencies exist
+        local_fds = cover.minimal_cover(relation_fds(rel, fds))
+        engine = closure.get_engine(local_fds)
+        prime_attributes, undecided = keys.prime_attributes(rel.columns, local_fds)
+        if undecided:
+            # Counting them as non-prime can only report a violation, and 3NF synthesis is always correct
+            tracing.message(f"Could not decide within {keys.DEFAULT_PRIME_CHECKS} key checks whether {sorted(undecided)} "
+                            f"of {rel_name} belong to a candidate key; treating them as non-prime.\n")
+        for lhs, rhs in local_fds.items():
+            if not engine.is_superkey(lhs, rel.columns) and not set(rhs).issubset(prime_attributes):
+                return True  # Return True if a 3NF violation is found
+    return False  # Return False if no violations exist
 
 def validate_3NF(relations_dict, fds):
-    # Validate if the relations are in 3NF by checking for partial dependencies
+    # Validate if the relations are in 3NF by checking for partial and transitive dependencies
     return not has_partial_dependencies(relations_dict, fds)
 
-def create_new_relations(relations_dict, lhs, rhs, rel):
-    # Create new relations based on the left-hand side (lhs) and right-hand side (rhs) of a functional dependency
-    combined_columns = list(set(lhs).union(rhs))  # Combine lhs and rhs attributes
-    new_table1_cols = list(lhs) + rhs  # Columns for the first new table
-    new_table2_cols = list(set(rel.columns) - set(rhs))  # Columns for the second new table
-    
-    # Create new tables with unique values and reset their index
-    table1 = rel[new_table1_cols].drop_duplicates().reset_index(drop=True)
-    table2 = rel[new_table2_cols].drop_duplicates().reset_index(drop=True)
-    
-    return table1, table2  # Return the two newly created tables
+def synthesize_for_3NF(rel_name, rel, fds):
+    # Plans the Bernstein synthesis of the FDs that apply to one relation. Only the schemas are
+    # returned, so process workers never send projections (or their source rows) back.
+    # Returns:
+    #     list: (name, columns) pairs replacing the relation, or None to keep it; the relation holding
+    #           a key keeps its name.
+    local_fds = relation_fds(rel, fds)
+    schemas = cover.synthesize_3NF(rel.columns, local_fds)
+    if len(schemas) <= 1:
+        return None  # Keep the original relation if no transformation was made
+    engine = closure.get_engine(local_fds)
+    relation_schemas = []
+    key_named = False
+    for determinant, columns in schemas:
+        name = determinant
+        if not key_named and engine.is_superkey(columns, rel.columns):
+            name, key_named = rel_name, True
+        relation_schemas.append((name, list(columns)))
+    return relation_schemas
 
 def transform_to_3NF(relations_dict, fds):
     modified_relations = {}  # Dictionary to hold modified relations
@@ -162,59 +277,47 @@ def transform_to_3NF(relations_dict, fds):
     if validate_3NF(relations_dict, fds):
         return relations_dict, True  # Return current relations if they are valid in 3NF
 
-    print("Relations after transforming into 3NF:\n")
-    # Iterate through each relation to transform it into 3NF
-    for rel_name, rel in relations_dict.items():
-        for lhs, rhs in fds.items():
-            # Check if lhs is part of the relation and rhs is not a subset of lhs
-            if (set(lhs).issubset(rel.columns) and 
-                not set(rhs).issubset(lhs)):
-                # Create new relations based on the current functional dependency
-                table1, table2 = create_new_relations(relations_dict, lhs, rhs, rel)
-                
-                modified_relations[tuple(lhs)] = table1  # Store the first new table
-                modified_relations[rel_name] = table2  # Store the second modified table
-                break  # Exit the inner loop after transforming one dependency
-        else:
-            modified_relations[rel_name] = rel  # Keep the original relation if no transformation was made
+    tracing.message("Relations after transforming into 3NF:\n")
+    # Synthesize each relation into 3NF (in parallel when configured), collecting the results in order
+    results = executor.map_relations(synthesize_for_3NF, relations_dict, fds)
+    for (rel_name, rel), relation_schemas in zip(relations_dict.items(), results):
+        if relation_schemas is None:
+            relation_schemas = [(rel_name, None)]
+        for name, columns in relation_schemas:
+            # Project each synthesized relation from the original once
+            table = rel if columns is None else plan.project(rel, columns)
+            if name in modified_relations:
+                name = tuple(table.columns)  # Do not overwrite a relation synthesized from another one
+            modified_relations[name] = table
 
     # Print each modified relation
     for rel in modified_relations:
-        print(modified_relations[rel])  # Display the modified relation
-        print('\n')
+        tracing.show(modified_relations[rel])  # Display the modified relation
 
     return modified_relations, False  # Return modified relations and indicate they are not in 3NF
 
 #####################BCNF#########
 def attribute_closure(attributes_set, functional_deps):
     # Determine the closure of a set of attributes based on provided functional dependencies.
-    closure_result = set(attributes_set)  # Start with the initial set of attributes
-    while True:
-        previous_closure = closure_result.copy()  # Keep a copy of the previous state
-        for lhs, rhs in functional_deps.items():
-            # If the left-hand side is a subset of the current closure, add the right-hand side attributes
-            if set(lhs).issubset(closure_result):
-                closure_result.update(rhs)  # Expand the closure with new attributes
-        
-        # Break the loop if no new attributes were added
-        if previous_closure == closure_result:
-            break
-            
-    return closure_result  # Return the final closure
+    # The bitset engine for functional_deps is built once and reused across calls (see closure.py).
+    return closure.get_engine(functional_deps).closure(attributes_set)  # Return the final closure
+
+def has_bcnf_violation(relation_name, relation, fds):
+    # Check if one relation violates BCNF
+    engine = closure.get_engine(fds)  # Index the FDs once; closures are memoized for transform_to_BCNF too
+    # Check each functional dependency in the set of functional dependencies (fds)
+    for lhs, rhs in fds.items():
+        # Ensure some dependent is not part of the left-hand side (lhs)
+        if any(dependent not in lhs for dependent in rhs):
+            # If the attribute closure of lhs does not cover all columns, BCNF is violated
+            if not engine.is_superkey(lhs, relation.columns):
+                return True
+    return False
 
 def validate_bcnf(relations_dict, pk, fds):
-    # Validate if each relation satisfies the conditions for BCNF
-    for relation_name, relation in relations_dict.items():
-        all_columns = set(relation.columns)  # Get all columns of the relation
-        # Check each functional dependency in the set of functional dependencies (fds)
-        for lhs, rhs in fds.items():
-            for dependent in rhs:
-                # Ensure dependent is not part of the left-hand side (lhs)
-                if dependent not in lhs:
-                    # If the attribute closure of lhs does not cover all columns, BCNF is violated
-                    if all_columns - attribute_closure(lhs, fds):
-                        return False  # Return False to indicate BCNF violation
-    return True  # Return True if all relations satisfy BCNF conditions
+    # Validate if each relation satisfies the conditions for BCNF (relations are checked in parallel when configured)
+    violations = executor.map_relations(has_bcnf_violation, relations_dict, fds)
+    return not any(violations)  # Return True if all relations satisfy BCNF conditions
 
 
 def transform_to_BCNF(relations_dict, pk, fds):
@@ -226,13 +329,13 @@ def transform_to_BCNF(relations_dict, pk, fds):
         if is_bcnf_valid:
             return relations_dict, is_bcnf_valid  # Return current relations if they are valid in BCNF
 
-        print("Transformed relations into BCNF:\n")
+        tracing.message("Transformed relations into BCNF:\n")
+        engine = closure.get_engine(fds)  # Index the FDs once for every closure below
         # Iterate over each relation for transformation
         for relation_name, relation in relations_dict.items():
             for lhs, rhs in fds.items():
-                closure_result = attribute_closure(set(lhs), fds)  # Get the attribute closure of lhs
-                # Check if closure does not cover all columns in the relation
-                if not closure_result.issuperset(relation.columns):
+                # Check if the attribute closure of lhs does not cover all columns in the relation
+                if not engine.is_superkey(lhs, relation.columns):
                     combined_columns = list(lhs) + rhs  # Combine lhs and rhs for new relation
                     # Ensure the combined columns are part of the relation but not all columns
                     if set(combined_columns).issubset(relation.columns) and not set(combined_columns) == set(relation.columns):
@@ -250,37 +353,92 @@ def transform_to_BCNF(relations_dict, pk, fds):
 
         # Print each updated relation
         for updated_relation in updated_bcnf_relations:
-            print(updated_bcnf_relations[updated_relation])  # Display the updated relation
-            print('\n')
+            tracing.show(updated_bcnf_relations[updated_relation])  # Display the updated relation
 
         return updated_bcnf_relations, is_bcnf_valid  # Return the final updated relations and BCNF validity
 
 
 ###############4NF##############
+def find_4NF_violation(relation, determinant_cols, dependent):
+    # Checks one MVD X ->> Y against a relation on its factorized codes (cached per relation).
+    # Args:
+    #     relation (DataFrame): The relation to check.
+    #     determinant_cols (list): The columns of X.
+    #     dependent: The column Y.
+    # Returns:
+    #     tuple: (True if X ->> Y is a 4NF violation, DataFrame of X-groups where the MVD fails or None,
+    #             sampling.Verdict of the MVD check or None)
+    if dependent in determinant_cols or len(determinant_cols) + 1 >= len(relation.columns):
+        return False, None, None  # Trivial MVD: Y is part of X, or X and Y cover the whole relation
+    encoded = encoding.cached_codes(relation)
+    # Both checks look for a counterexample in growing samples before scanning the whole relation
+    if sampling.check_fd(relation, determinant_cols, relation.columns, encoded).holds:
+        return False, None, None  # X is a superkey, so the MVD is allowed in 4NF
+    verdict = sampling.check_mvd(relation, determinant_cols, [dependent], encoded)
+    if not verdict.holds:
+        # The MVD does not hold in the data, splitting on it would be lossy
+        return False, mvd.group_values(relation, determinant_cols, verdict.counterexample), verdict
+    return True, None, verdict
+
+def check_4NF_relation(relation_name, relation, mvds):
+    # Checks one relation against the MVDs.
+    # Returns:
+    #     tuple: (messages to report, True if the relation violates 4NF)
+    messages = []
+    # Check each determinant and its associated dependents in the MVDs
+    for determinant, dependents in mvds.items():
+        for dependent in dependents:
+            # Determine if the determinant is a tuple or a single attribute
+            if isinstance(determinant, tuple):
+                determinant_cols = list(determinant)  # Convert tuple to list for processing
+            else:
+                determinant_cols = [determinant]  # Wrap single attribute in a list
+
+            # Check if all determinant columns and the dependent are present in the relation
+            if all(col in relation.columns for col in determinant_cols + [dependent]):
+                # Compare |XY| x |XZ| with |XYZ| per determinant group, using vectorized counts
+                is_violation, violating_groups, verdict = find_4NF_violation(relation, determinant_cols, dependent)
+                if violating_groups is not None and tracing.frames_enabled():  # Only format the groups when shown
+                    found = "" if verdict.complete else f" (found in a sample of {verdict.rows_checked} rows)"
+                    messages.append(f"Multi-valued dependency {determinant} ->> {dependent} does not hold{found} for:\n{violating_groups}\n")
+                if is_violation:
+                    messages.append(f"Multi-valued dependency violation: {determinant} ->> {dependent}")
+                    return messages, True
+    return messages, False
+
 def validate_4NF(relations, mvds):
     # Validate if each relation satisfies the 4NF conditions based on multi-valued dependencies (MVDs)
-    for relation_name, relation in relations.items():
-        # Check each determinant and its associated dependents in the MVDs
-        for determinant, dependents in mvds.items():
-            for dependent in dependents:
-                # Determine if the determinant is a tuple or a single attribute
-                if isinstance(determinant, tuple):
-                    determinant_cols = list(determinant)  # Convert tuple to list for processing
-                else:
-                    determinant_cols = [determinant]  # Wrap single attribute in a list
-
-                # Check if all determinant columns and the dependent are present in the relation
-                if all(col in relation.columns for col in determinant_cols + [dependent]):
-                    # Group the relation by the determinant columns and aggregate the dependent
-                    grouped = relation.groupby(determinant_cols)[dependent].apply(set).reset_index()
-                    # If the number of groups is less than the number of rows in the relation, 4NF is violated
-                    if len(grouped) < len(relation):
-                        print(f"Multi-valued dependency violation: {determinant} ->> {dependent}")
-                        return False  # Return False to indicate 4NF violation
+    # Relations are checked in parallel when configured; messages are printed in relation order
+    relations = plan.materialize_all(relations)  # The MVD checks need the rows
+    for messages, is_violation in executor.map_relations(check_4NF_relation, relations, mvds):
+        for message in messages:
+            tracing.message(message)
+        if is_violation:
+            return False  # Return False to indicate 4NF violation
 
     return True  # Return True if all relations satisfy 4NF conditions
 
 
+def split_for_4NF(relation_name, relation, mvds):
+    # Finds the first MVD that violates 4NF in one relation. Only the columns are returned, so
+    # process workers never send projections (or their source rows) back.
+    # Returns:
+    #     tuple: (determinant columns, dependent), or None if nothing needs to be split
+    for determinant, dependents in mvds.items():
+        for dependent in dependents:
+            # Determine if the determinant is a tuple or a single attribute
+            if isinstance(determinant, tuple):
+                determinant_cols = list(determinant)  # Convert tuple to list for processing
+            else:
+                determinant_cols = [determinant]  # Wrap single attribute in a list
+
+            # Check if all determinant columns and the dependent are present in the relation
+            if all(col in relation.columns for col in determinant_cols + [dependent]):
+                # If a violation is found, create new relations based on the determinants
+                if find_4NF_violation(plan.concrete(relation), determinant_cols, dependent)[0]:
+                    return determinant_cols, dependent  # Stop at the first violation
+    return None
+
 def transform_to_4NF(relations, mvds):
     four_relations = {}  # Dictionary to hold relations transformed into 4NF
     fournfcheck = validate_4NF(relations, mvds)  # Validate the relations for 4NF
@@ -288,41 +446,30 @@ def transform_to_4NF(relations, mvds):
     if fournfcheck:
         return relations, fournfcheck  # Return original relations if they are already in 4NF
     else:
-        print(f"The relation after transforming into 4NF.\n")
-        # Iterate over each relation for transformation
-        for relation_name, relation in relations.items():
-            for determinant, dependents in mvds.items():
-                for dependent in dependents:
-                    # Determine if the determinant is a tuple or a single attribute
-                    if isinstance(determinant, tuple):
-                        determinant_cols = list(determinant)  # Convert tuple to list for processing
-                    else:
-                        determinant_cols = [determinant]  # Wrap single attribute in a list
-
-                    # Check if all determinant columns and the dependent are present in the relation
-                    if all(col in relation.columns for col in determinant_cols + [dependent]):
-                        # Group the relation by the determinant columns and aggregate the dependent
-                        grouped = relation.groupby(determinant_cols)[dependent].apply(set).reset_index()
-                        # If a violation is found, create new relations based on the determinants
-                        if len(grouped) < len(relation):
-                            # Create first table with determinant columns and dependent
-                            table_1 = relation[determinant_cols + [dependent]].drop_duplicates()
-                            four_relations[tuple(determinant_cols)] = table_1  # Store the first table
-                            # Create second table excluding the dependent and the determinant columns
-                            table_2 = relation[determinant_cols + [col for col in relation.columns if col not in [dependent] + determinant_cols]].drop_duplicates()
-                            four_relations[relation_name] = table_2  # Store the second table
-                            break  # Exit the loop to avoid duplicate processing
-                else:
-                    continue  # Continue to the next dependent if no break occurred
-                break  # Exit to the next relation if a break occurred
-            else:
+        tracing.message(f"The relation after transforming into 4NF.\n")
+        # Split each relation (in parallel when configured) and name the new tables in relation order
+        splits = executor.map_relations(split_for_4NF, relations, mvds)
+        for (relation_name, relation), split in zip(relations.items(), splits):
+            if split is None:
                 four_relations[relation_name] = relation  # Store the original relation if no changes were made
+                continue
+            determinant_cols, dependent = split
+            # Create first table with determinant columns and dependent, as a projection of the plan
+            table_1 = plan.project(relation, determinant_cols + [dependent])
+            # Create second table excluding the dependent and the determinant columns
+            table_2 = plan.project(relation, determinant_cols + [col for col in relation.columns if col not in [dependent] + determinant_cols])
+            table_1_name = tuple(determinant_cols)
+            if table_1_name == relation_name or table_1_name in relations or table_1_name in four_relations:
+                table_1_name = tuple(determinant_cols + [dependent])  # Do not overwrite an existing relation
+            four_relations[table_1_name] = table_1  # Store the first table
+            four_relations[relation_name] = table_2  # Store the second table
 
     # If the number of transformed relations matches the original, return them
     if len(four_relations) == len(relations):
         return four_relations, False  # Return False to indicate no further transformation is needed
     else:
-        return transform_to_4NF(four_relations, mvds)  # Recursive call to ensure all relations are in 4NF
+        # Recursive call to ensure all relations are in 4NF; the input itself was not in 4NF
+        return transform_to_4NF(four_relations, mvds)[0], False
 
 
 ##################5NF######################
@@ -330,54 +477,49 @@ def transform_to_4NF(relations, mvds):
 # Group the relation by the specified determinant and count occurrences
 def is_superkey(relation, determinant):
     #Determine if a given set of attr (determinant) is a superkey for the relation.
-    # Group the relation by the determinant attr and count occurrences
-    count_df = relation.groupby(list(determinant)).size().reset_index(name='count')
-    # Check if all counts are 1 (indicating uniqueness)
-    unique_count = count_df['count'] == 1
-    return unique_count.all()  # Return True if all counts are 1, indicating a superkey
-def validate_5NF(relations):
-    candidate_keys_dict = {}
-    for relation_name, relation in relations.items():
-        print(relation)
-        user_input = input(
-            "Enter the candidate keys for above relation (e.g., (A, B), (C, D)): ")
-        print('\n')
-        tuples = re.findall(r'\((.*?)\)', user_input)
-        candidate_keys = [tuple(map(str.strip, t.split(','))) for t in tuples]
-        candidate_keys_dict[relation_name] = candidate_keys
-
-    print(f'Candidate Keys for tables:')
-    print(candidate_keys_dict)
-    print('\n')
-
-    for relation_name, relation in relations.items():
-        candidate_keys = candidate_keys_dict[relation_name]
-
-        data_tuples = [tuple(row) for row in relation.to_numpy()]
-
-        def project(data, attributes):
-            return {tuple(row[attr] for attr in attributes) for row in data}
-
-        def superkey(attributes):
-            for key in candidate_keys:
-                if set(key).issubset(attributes):
-                    return True
-            return False, candidate_keys_dict
-
-        for i in range(1, len(relation.columns)):
-            for attrs in combinations(relation.columns, i):
-                if superkey(attrs):
-                    continue
-
-                projected_data = project(data_tuples, attrs)
-                complement_attrs = set(relation.columns) - set(attrs)
-                complement_data = project(data_tuples, complement_attrs)
+    # No two rows may share the determinant values (works on DataFrames and encoded relations alike)
+    return keys.is_unique(relation, determinant)  # Return True if all values are unique, indicating a superkey
+def check_5NF_relation(relation_name, relation, fds):
+    # Checks one relation for a join dependency not implied by its candidate keys.
+    # Returns:
+    #     tuple: (candidate keys of the relation, attributes of the first failing split or None)
+    # Discover the minimal candidate keys from the FDs, or from the data when no FDs are given
+    candidate_keys = keys.discover_candidate_keys(relation, fds)
+    columns = list(relation.columns)
+    encoded = encoding.cached_codes(relation)  # Encode the relation once for every split below
+
+    def superkey(attributes):
+        for key in candidate_keys:
+            if set(key).issubset(attributes):
+                return True
+        return False
 
-                joined_data = {(row1 + row2)
-                               for row1 in projected_data for row2 in complement_data}
-                if set(data_tuples) != joined_data:
-                    print("Failed 5NF check for attributes:", attrs)
-                    return False, candidate_keys_dict
+    for i in range(1, len(columns)):
+        for attrs in combinations(columns, i):
+            complement_attrs = [col for col in columns if col not in attrs]
+            # A split where either side is a superkey is implied by the candidate keys
+            if superkey(attrs) or superkey(complement_attrs):
+                continue
+
+            # A lossless split into attrs and its complement is a join dependency not implied by the keys;
+            # most splits are lossy, which a sampled counterexample shows without the full join count
+            if sampling.check_join(relation, attrs, complement_attrs, encoded).holds:
+                return candidate_keys, attrs
+    return candidate_keys, None
+
+def validate_5NF(relations, fds=None):
+    # Check every relation (in parallel when configured), then report in relation order
+    results = executor.map_relations(check_5NF_relation, relations, fds)
+    candidate_keys_dict = {relation_name: candidate_keys for relation_name, (candidate_keys, _) in zip(relations, results)}
+
+    tracing.message(f'Candidate Keys for tables:')
+    tracing.message(candidate_keys_dict)
+    tracing.message('\n')
+
+    for candidate_keys, failed_attrs in results:
+        if failed_attrs is not None:
+            tracing.message(f"Failed 5NF check for attributes: {failed_attrs}")
+            return False, candidate_keys_dict
 
     return True, candidate_keys_dict
 
@@ -389,8 +531,8 @@ def decompose_into_5NF(relation_name, dataframe, candidate_keys):
         common_columns = set(df1.columns) & set(df2.columns)
         if not common_columns:
             return False
-        joined_df = pd.merge(df1, df2, how='inner', on=list(common_columns))
-        return df.equals(joined_df)
+        # Count the join on factorized codes instead of materializing and comparing it
+        return joins.is_lossless_join(df, df1.columns, df2.columns)
 
     decomposed_rel = [dataframe]
 
@@ -414,17 +556,22 @@ def decompose_into_5NF(relation_name, dataframe, candidate_keys):
 
 
 def transform_to_5NF(relations, pk, fds):
-    five_relations = {}
-    fivenfcheck, candidate_keys_dict = validate_5NF(relations)
+    five_relations = store.relation_store()  # Spills the decomposed tables to disk beyond the memory budget
+    relations = plan.materialize_all(relations)  # The join checks need the rows
+    fivenfcheck, candidate_keys_dict = validate_5NF(relations, fds)
 
     if fivenfcheck:
         return relations, fivenfcheck
     else:
-        print(f"The relation after transforming into 5NF.\n")
-        for relation_name, relation in relations:
+        tracing.message(f"The relation after transforming into 5NF.\n")
+        for relation_name, relation in relations.items():
             candidate_keys = candidate_keys_dict[relation_name]
             decomposed_relations = decompose_into_5NF(
                 relation_name, relation, candidate_keys)
-            five_relations.append(decomposed_relations)
+            if len(decomposed_relations) == 1:
+                five_relations[relation_name] = decomposed_relations[0]  # Relation was kept as is
+            else:
+                for table in decomposed_relations:
+                    five_relations[tuple(table.columns)] = table  # Name each new table after its columns
 
     return five_relations, fivenfcheck
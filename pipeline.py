@@ -0,0 +1,189 @@
+# Non-interactive normalization pipeline shared by main.py and batch.py
+import chase
+import normalizer
+import preservation
+import schema
+import tracing
+# Modules that need pandas are loaded on first use, so schema-only runs start without it
+ingest = schema.lazy_import("ingest")
+encoding = schema.lazy_import("encoding")
+exploder = schema.lazy_import("exploder")
+fd_discovery = schema.lazy_import("fd_discovery")
+result_cache = schema.lazy_import("result_cache")
+
+# Names of the normal forms by the step numbers used on the command line and in manifests
+NORMAL_FORMS = {
+    1: "1NF",
+    2: "2NF",
+    3: "3NF",
+    4: "BCNF",
+    5: "4NF",
+    6: "5NF"
+}
+
+
+def parse_fds(lines):
+    # Parses functional dependencies written as "X, Y -> A, B", one per line, into the {tuple(lhs): [rhs]} form
+    fds = {}
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        determinant, dependent = line.split(" -> ")
+        # Splitting the determinant by comma to make it a list
+        fds[tuple(determinant.split(", "))] = dependent.split(", ")
+    return fds
+
+
+def read_fds(path):
+    # Reads the functional dependencies of a fds.txt style file
+    with open(path, 'r') as file:
+        return parse_fds(file)
+
+
+def parse_mvd(text):
+    # Parses one multi-valued dependency written as "X ->> A, B"; raises ValueError for any other format
+    determinant, dependent = text.split(" ->> ")
+    # Clean up the inputs by stripping extra spaces
+    determinants_list = [d.strip() for d in determinant.split(',')]
+    dependents_list = [d.strip() for d in dependent.split(',')]
+    return tuple(determinants_list), dependents_list
+
+
+def read_mvds(path):
+    # Reads multi-valued dependencies, one "X ->> A, B" per line
+    mvds = {}
+    with open(path, 'r') as file:
+        for line in file:
+            if line.strip():
+                determinant, dependents = parse_mvd(line.strip())
+                mvds.setdefault(determinant, []).extend(dependents)
+    return mvds
+
+
+def parse_key(text):
+    # Parses a primary key given as comma-separated column names
+    return tuple(col.strip() for col in text.split(','))
+
+
+def read_table(path, dtype=str):
+    # Reads a whole csv table. Values are read as text by default, as the streamed path reads them
+    # (see ingest.read_csv_chunks): inferred dtypes would print 201 as "201.0" in a column with a blank.
+    import pandas as pd  # Only needed once the rows are read
+    return pd.read_csv(path, dtype=dtype)
+
+
+def _stream_rows(source, relations):
+    # The planned relations filled with their distinct rows, streamed from the source csv file in one pass
+    with tracing.stage("stream", relations) as record:
+        relations = source.relations(relations)
+        record.output(relations)
+    return relations
+
+
+def normalize(table, fds, mvds, pk, step, schema_only=False, max_lhs=None, jobs=1, explode_chunk_rows=100000,
+              cache_dir=None, cache_max_mb=None, source=None, split_multivalued=False):
+    # Runs the normal forms up to step on one table, printing every stage like the interactive program
+    # (as far as the tracing verbosity allows) and recording one tracing stage record per step.
+    # Args:
+    #     table: The input table as read from the csv file, or a SchemaRelation for schema-only runs.
+    #     fds (dict): Functional dependencies, or None to mine them from the 1NF table.
+    #     mvds (dict): Multi-valued dependencies, used by 4NF.
+    #     pk (tuple): The primary key.
+    #     step (int): The target normal form, 1-6 (see NORMAL_FORMS).
+    #     schema_only (bool): The table is a SchemaRelation; only valid up to BCNF unless source is given.
+    #     max_lhs, jobs: Passed to FD discovery.
+    #     explode_chunk_rows (int): Rows per chunk when flattening multi-valued columns.
+    #     cache_dir (str): Directory of the on-disk result cache; None disables it (schema-only runs never use it).
+    #     cache_max_mb (float): Size bound of the result cache, result_cache.DEFAULT_MAX_MB by default.
+    #     source (ingest.StreamedTable): With schema_only, the csv file the rows come from. The relations
+    #         planned on the header are filled with their streamed rows before the data-level 4NF and
+    #         5NF stages (or at the end), so any target runs without the whole table in memory.
+    #     split_multivalued (bool): 1NF puts each multi-valued column in its own relation with the primary
+    #         key instead of cross-multiplying them in one table.
+    # Returns:
+    #     tuple: (relations of the target normal form, highest normal form reached or 0, the FDs used)
+    highest_normal_form = 0  # Variable to keep track of the highest normal form achieved
+    relations = {}
+
+    # The same table, dependencies, key and target give the same result, so look it up before any transform
+    key = None
+    if cache_dir is not None and not schema_only:
+        with tracing.stage("result_cache") as record:
+            key = result_cache.result_key(table, fds, mvds, pk, step, max_lhs, split_multivalued)
+            cached = result_cache.load(cache_dir, key)
+            if cached is not None:
+                record.output(cached[0])
+        if cached is not None:
+            tracing.message(f"Loaded the {NORMAL_FORMS[step]} relations from the result cache.\n")
+            return cached
+
+    if not schema_only:
+        # Split the columns that contain commas into lists of stripped values
+        table = ingest.parse_multivalued(table)
+    # Normalize to 1NF
+    if step >= 1:
+        with tracing.stage("1NF", {pk: table}) as record:
+            relations, onenfcheck = normalizer.transform_to_1NF(table, pk, chunk_rows=explode_chunk_rows,
+                                                                split_multivalued=split_multivalued)
+            if source is not None and source.multivalued:
+                # The header says nothing about the values; the first streaming pass found the multi-valued columns
+                onenfcheck = False
+                tracing.message(f"Flattening {source.multivalued} as the rows are streamed in.\n")
+                if split_multivalued:
+                    relations = {name: schema.SchemaRelation(columns) for name, columns
+                                 in exploder.split_schemas(table.columns, pk, source.multivalued).items()}
+            # Dictionary-encode the 1NF table: later stages work on int32 codes and only decode for display and SQL
+            if not schema_only:
+                relations = {name: encoding.encode_relation(rel) for name, rel in relations.items()}
+            record.output(relations)
+
+        # Check if the table was already in 1NF
+        if onenfcheck:
+            tracing.message("Given input table is already in 1NF.\n")
+            highest_normal_form = max(highest_normal_form, 1)  # Update the highest normal form achieved
+
+    # Mine the FDs from the 1NF table when they were not provided
+    if fds is None and step >= 2:
+        with tracing.stage("fd_discovery", relations):
+            fds = fd_discovery.discover_fds(relations[pk], max_lhs=max_lhs, n_jobs=jobs)
+        tracing.message(f"Discovered fds=\n{fds}\n")
+
+    # Each later stage transforms the relations of the previous one
+    stages = [
+        (2, lambda relations: normalizer.transform_to_2NF(relations, pk, fds)),
+        (3, lambda relations: normalizer.transform_to_3NF(relations, fds)),
+        (4, lambda relations: normalizer.transform_to_BCNF(relations, pk, fds)),
+        (5, lambda relations: normalizer.transform_to_4NF(relations, mvds)),
+        (6, lambda relations: normalizer.transform_to_5NF(relations, pk, fds)),
+    ]
+    for stage, transform in stages:
+        if step < stage:
+            break
+        if stage == 5 and source is not None:
+            relations, source = _stream_rows(source, relations), None  # 4NF and 5NF check the data
+        with tracing.stage(NORMAL_FORMS[stage], relations) as record:
+            before = relations
+            relations, check = transform(relations)  # Get the normalized tables and check result
+            record.output(relations)
+            # Prove the decomposition lossless on the schema with the chase (5NF join dependencies need the data)
+            if stage < 6:
+                record.record["lossless"] = chase.verify_decomposition(before, relations, fds, mvds if stage == 5 else None)
+            lost = preservation.verify_decomposition(before, relations, fds)
+            record.record["unpreserved_fds"] = [[list(lhs), rhs] for lhs, rhs in lost]
+        if record.record["lossless"] is False:
+            tracing.message(f"Warning: the {NORMAL_FORMS[stage]} decomposition is not lossless under the given dependencies.\n")
+        if lost:
+            tracing.message(f"FDs not preserved by the {NORMAL_FORMS[stage]} decomposition: {preservation.format_fds(lost)}\n")
+        # Check if the table was already in this normal form
+        if check:
+            tracing.message(f"Given input table is already in {NORMAL_FORMS[stage]}.\n")
+            highest_normal_form = max(highest_normal_form, stage)  # Update highest normal form
+
+    if source is not None:
+        relations = _stream_rows(source, relations)
+
+    if key is not None:
+        result_cache.store(cache_dir, key, relations, highest_normal_form, fds,
+                           result_cache.DEFAULT_MAX_MB if cache_max_mb is None else cache_max_mb)
+    return relations, highest_normal_form, fds
@@ -0,0 +1,167 @@
+# Lazy decomposition plan: transforms work on attribute sets and tables are projected from the source once
+import threading
+import weakref
+from collections.abc import Mapping
+import schema  # Schema-only relations, planned without any data
+store = schema.lazy_import("store")  # Spill-to-disk storage of the materialized projections
+backend = schema.lazy_import("backend")  # Distinct projections of the selected execution backend
+
+
+class ProjectionCache:
+    # Materialized distinct projections of one source relation, keyed by their set of columns.
+    # A new projection is computed from the smallest cached projection that contains its columns,
+    # so projections sharing columns deduplicate the source rows only once. With a spill budget
+    # (see store.py) the source and the projections live in a RelationStore and the coldest ones are
+    # kept on disk.
+    # A projection is released once no live LazyRelation needs it, either as its rows or as the parent
+    # of a narrower projection not computed yet, so earlier stages' tables do not live for the whole run.
+
+    def __init__(self, source):
+        self.projections = store.relation_store()  # frozenset of columns -> materialized relation
+        self.projections[None] = source  # The source is spilled like the projections, under the key None
+        self.source_rows = len(source)
+        self.rows = {}  # frozenset of columns -> row count, so choosing a parent never reopens a spilled one
+        self.live = {}  # frozenset of columns -> number of live LazyRelations with those columns
+        self._lock = threading.RLock()  # LazyRelations may be released from the executor's worker threads
+
+    def retain(self, columns):
+        # Counts a new LazyRelation over columns and returns the key to release it with
+        key = frozenset(columns)
+        with self._lock:
+            self.live[key] = self.live.get(key, 0) + 1
+        return key
+
+    def release(self, key):
+        # Forgets a LazyRelation that was garbage collected, dropping the projections nothing can use any more
+        with self._lock:
+            self.live[key] -= 1
+            if self.live[key]:
+                return
+            del self.live[key]
+            self._prune()
+
+    def _prune(self):
+        # Drops the projections that are neither live nor a possible parent of a live one still to compute
+        with self._lock:
+            pending = [columns for columns in self.live if columns not in self.rows]
+            for cached_columns in list(self.rows):
+                if cached_columns not in self.live and not any(columns <= cached_columns for columns in pending):
+                    del self.projections[cached_columns]
+                    del self.rows[cached_columns]
+
+    def materialize(self, columns):
+        columns = list(columns)
+        key = frozenset(columns)
+        relation = self.projections.get(key)
+        if relation is None:
+            parent, parent_rows = None, self.source_rows
+            for cached_columns, n_rows in list(self.rows.items()):
+                if key <= cached_columns and n_rows < parent_rows:
+                    parent, parent_rows = cached_columns, n_rows  # Fewer rows to deduplicate than the source
+            parent = self.projections[parent]
+            relation = backend.current().project(parent, columns)
+            self.projections[key] = relation
+            self.rows[key] = len(relation)
+            self._prune()  # Its parents may not be needed any more
+        if list(relation.columns) != columns:
+            relation = relation[columns]  # Same rows, in the requested column order
+        return relation
+
+
+class LazyRelation:
+    # A distinct projection of a source relation that is only computed when its rows are needed.
+    # It supports the schema-level operations of the 2NF, 3NF and BCNF transforms (columns, column
+    # projection, drop, drop_duplicates, reset_index) without touching any data; printing it or
+    # calling materialize() computes it through the ProjectionCache shared with its source.
+
+    def __init__(self, cache, columns):
+        self._cache = cache
+        self._columns = list(columns)
+        self._release = weakref.finalize(self, cache.release, cache.retain(self._columns))
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.materialize()[key]  # A single column needs the data
+        return LazyRelation(self._cache, key)
+
+    def drop_duplicates(self):
+        return self  # A projection is always distinct
+
+    def reset_index(self, drop=True):
+        return self
+
+    def drop(self, columns, inplace=False):
+        columns = [columns] if isinstance(columns, str) else columns  # One column name, as with DataFrame.drop
+        kept = [col for col in self._columns if col not in columns]
+        if inplace:
+            self._release()  # Counted under the new columns from now on
+            self._columns = kept
+            self._release = weakref.finalize(self, self._cache.release, self._cache.retain(kept))
+            return None
+        return LazyRelation(self._cache, kept)
+
+    def materialize(self):
+        return self._cache.materialize(self._columns)
+
+    @property
+    def empty(self):
+        return self.materialize().empty
+
+    def __len__(self):
+        return len(self.materialize())
+
+    def __repr__(self):
+        return repr(self.materialize())
+
+
+def lazy(relation):
+    # Starts a plan on a concrete relation; lazy and schema-only relations are returned unchanged
+    if isinstance(relation, (LazyRelation, schema.SchemaRelation)):
+        return relation
+    return LazyRelation(ProjectionCache(relation), relation.columns)
+
+
+def project(relation, columns):
+    # Distinct projection: recorded in the plan for lazy and schema-only relations, computed right away otherwise
+    if isinstance(relation, (LazyRelation, schema.SchemaRelation)):
+        return relation[list(columns)]
+    return backend.current().project(relation, columns)
+
+
+def concrete(relation):
+    # The rows of a relation, materializing it if it is lazy
+    return relation.materialize() if isinstance(relation, LazyRelation) else relation
+
+
+def materialize_all(relations):
+    # Computes every lazy relation of a dict, widest first, so narrower ones can reuse their rows.
+    # With a spill budget the rows stay in the spill stores of the projection caches and the result
+    # only looks them up on access, so materializing never pins every relation in memory at once.
+    order = sorted(relations, key=lambda name: -len(relations[name].columns))
+    if store.spilling():
+        for name in order:
+            concrete(relations[name])
+        return Materialized(relations)
+    materialized = {}
+    for name in order:
+        materialized[name] = concrete(relations[name])
+    return {name: materialized[name] for name in relations}
+
+
+class Materialized(Mapping):
+    # Read-only dict of the concrete relations of a dict of (possibly lazy) relations, materialized on access
+    def __init__(self, relations):
+        self._relations = relations
+
+    def __getitem__(self, name):
+        return concrete(self._relations[name])
+
+    def __iter__(self):
+        return iter(self._relations)
+
+    def __len__(self):
+        return len(self._relations)
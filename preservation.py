@@ -0,0 +1,89 @@
+# Dependency-preservation test for decompositions: the polynomial restricted-closure algorithm on bitsets
+import threading
+from collections import OrderedDict
+import closure
+
+# Results of recent decompositions, keyed by (engine number, attribute mask, schema masks)
+_RESULT_CACHE = OrderedDict()
+_RESULT_CACHE_SIZE = 256
+_CACHE_LOCK = threading.Lock()
+
+
+def restricted_closure(engine, mask, schema_masks):
+    # Closure of mask under the FDs that hold inside the schemas, without projecting any FD set:
+    # Z grows by (Z & R)+ & R for every schema R until nothing changes.
+    # Args:
+    #     engine (ClosureEngine): Engine of the FDs of the decomposed relation.
+    #     mask (int): The starting attributes.
+    #     schema_masks (iterable): Attribute masks of the relations of the decomposition.
+    result = mask
+    changed = True
+    while changed:
+        changed = False
+        for schema_mask in schema_masks:
+            gained = engine.closure_mask(result & schema_mask) & schema_mask & ~result
+            if gained:
+                result |= gained
+                changed = True
+    return result
+
+
+def unpreserved_fds(fds, schemas, attributes=None):
+    # Finds the FDs that the decomposition no longer enforces, i.e. that do not follow from the FDs
+    # holding inside its relations.
+    # Args:
+    #     fds (dict): Functional dependencies in the {tuple(lhs): [rhs]} form.
+    #     schemas (iterable): The attribute lists of the relations of the decomposition.
+    #     attributes (iterable): Attributes of the decomposed relation (by default those of schemas);
+    #         FDs are checked on their part inside these attributes.
+    # Returns:
+    #     list: (lhs tuple, list of the RHS attributes that are lost) per FD that is not preserved
+    if not fds:
+        return []
+    engine = closure.get_engine(fds)
+    schema_masks = tuple(sorted({engine.encode(schema) for schema in schemas}))
+    attribute_mask = 0
+    for schema_mask in schema_masks:
+        attribute_mask |= schema_mask
+    if attributes is not None:
+        attribute_mask = engine.encode(attributes)
+
+    key = (engine.number, attribute_mask, schema_masks)
+    with _CACHE_LOCK:
+        lost = _RESULT_CACHE.get(key)
+        if lost is not None:
+            _RESULT_CACHE.move_to_end(key)
+            return lost
+
+    lost = []
+    for lhs, rhs in fds.items():
+        lhs = (lhs,) if isinstance(lhs, str) else tuple(lhs)
+        lhs_mask = engine.encode(lhs)
+        rhs_mask = engine.encode(rhs) & attribute_mask & ~lhs_mask
+        if lhs_mask & ~attribute_mask or not rhs_mask:
+            continue  # The FD is not about this relation, or trivial on it
+        missing = rhs_mask & ~restricted_closure(engine, lhs_mask, schema_masks)
+        if missing:
+            lost.append((lhs, [attr for attr in rhs if missing >> engine.bit_of[attr] & 1]))
+    with _CACHE_LOCK:
+        _RESULT_CACHE[key] = lost
+        if len(_RESULT_CACHE) > _RESULT_CACHE_SIZE:
+            _RESULT_CACHE.popitem(last=False)  # Evict the least recently used decomposition
+    return lost
+
+
+def verify_decomposition(before, after, fds):
+    # Lists the FDs lost by one normalization stage, going from the relations before to those after it.
+    # Args:
+    #     before, after (dict): name -> relation; only their columns are used.
+    # Returns:
+    #     list: As unpreserved_fds.
+    attributes = []
+    for relation in before.values():
+        attributes.extend(col for col in relation.columns if col not in attributes)
+    return unpreserved_fds(fds, [list(relation.columns) for relation in after.values()], attributes)
+
+
+def format_fds(fds):
+    # Writes (lhs, rhs) pairs in the "X, Y -> A, B" input format, separated by semicolons
+    return "; ".join(f"{', '.join(lhs)} -> {', '.join(rhs)}" for lhs, rhs in fds)
@@ -0,0 +1,76 @@
+# Single-pass column type profiling for the 1NF checks, sampled first and cached per relation
+import weakref
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Profile of one column:
+#     n_types: number of distinct Python types of the values
+#     has_nested: True if some value is a list, dict or set (violates 1NF)
+#     has_collection: True if some value is a list or set (flattened by transform_to_1NF)
+#     max_length, mean_length: list/set length statistics over the collection values (0 without any)
+#     complete: True if every value was scanned; otherwise the profile was decided by a sample and only
+#         its positive findings (n_types > 1, has_nested, has_collection) are certain
+ColumnProfile = namedtuple("ColumnProfile", "n_types has_nested has_collection max_length mean_length complete")
+
+_NESTED_TYPES = (list, dict, set)
+_COLLECTION_TYPES = (list, set)
+DEFAULT_SAMPLE_SIZE = 1000
+
+# Profiles of live relations, keyed by id() and dropped when the relation is garbage collected
+_PROFILE_CACHE = {}
+
+
+def _profile_values(series, complete):
+    # One pass over the values: their types, then everything else derived from the type array
+    types = series.map(type)
+    nested = types.isin(_NESTED_TYPES).to_numpy()
+    collections = types.isin(_COLLECTION_TYPES).to_numpy()
+    lengths = series[collections].map(len).to_numpy() if collections.any() else np.zeros(0)
+    return ColumnProfile(int(types.nunique()), bool(nested.any()), bool(collections.any()),
+                         int(lengths.max()) if len(lengths) else 0,
+                         float(lengths.mean()) if len(lengths) else 0.0, complete)
+
+
+def profile_column(series, sample_size=DEFAULT_SAMPLE_SIZE, full=False):
+    # Profiles one column, answering from a sample when the sample already shows a 1NF violation.
+    # Args:
+    #     series (Series): The column values.
+    #     sample_size (int): Rows looked at before deciding whether a full scan is needed.
+    #     full (bool): Always scan every value (needed when the exact set of list columns matters).
+    if not pd.api.types.is_object_dtype(series.dtype):
+        # Typed columns (numbers, booleans, dates, strings) can not hold nested values
+        n_types = 1 + int(pd.api.types.is_string_dtype(series.dtype) and bool(series.isna().any()))
+        return ColumnProfile(n_types, False, False, 0, 0.0, True)
+    if not full and len(series) > sample_size:
+        sample = _profile_values(series.sample(sample_size, random_state=0), complete=False)
+        if sample.n_types > 1 or sample.has_nested:
+            return sample  # Already a violation, no need to look at the remaining rows
+    return _profile_values(series, complete=True)
+
+
+def profile_relation(relation, sample_size=DEFAULT_SAMPLE_SIZE, full=False, n_jobs=None):
+    # Profiles every column of a relation, in parallel threads, reusing profiles cached for this object.
+    # Returns:
+    #     dict: column -> ColumnProfile
+    key = id(relation)
+    entry = _PROFILE_CACHE.get(key)
+    profiles = {}
+    if entry is not None and entry[0] == len(relation):
+        profiles = {col: profile for col, profile in entry[1].items() if col in relation.columns}
+    todo = [col for col in relation.columns if col not in profiles or (full and not profiles[col].complete)]
+
+    if todo:
+        def run(col):
+            return profile_column(relation[col], sample_size, full)
+        if n_jobs == 1 or len(todo) == 1:
+            results = map(run, todo)
+        else:
+            with ThreadPoolExecutor(n_jobs) as pool:
+                results = list(pool.map(run, todo))
+        profiles.update(zip(todo, results))
+        if entry is None:
+            weakref.finalize(relation, _PROFILE_CACHE.pop, key, None)
+        _PROFILE_CACHE[key] = (len(relation), profiles)
+    return {col: profiles[col] for col in relation.columns}
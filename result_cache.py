@@ -0,0 +1,123 @@
+# Content-addressed on-disk cache of normalization results, keyed by the table contents and the
+# dependencies, key and target, so reruns with the same inputs skip the whole 1NF-5NF pipeline
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import encoding  # Encoded relations are stored as their int32 codes and the shared dictionary
+import plan  # Planned projections are materialized before they are stored
+
+# Bumped whenever the stored layout or the normalization results change meaning
+FORMAT_VERSION = 2
+DEFAULT_MAX_MB = 1024
+
+
+def _canonical(dependencies):
+    # Order-independent form of an FD or MVD dict, or None
+    if dependencies is None:
+        return None
+    return sorted([sorted(lhs) if not isinstance(lhs, str) else [lhs], sorted(rhs)] for lhs, rhs in dependencies.items())
+
+
+def result_key(table, fds, mvds, pk, step, max_lhs=None, split_multivalued=False):
+    # Hex digest identifying one normalization: the table's column names, dtypes and values,
+    # the FDs (or the FD discovery bound when they are mined), the MVDs, the primary key, the target
+    # and how 1NF treats multi-valued columns
+    digest = hashlib.sha256()
+    row_hashes = pd.util.hash_pandas_object(table, index=False).to_numpy()
+    digest.update(row_hashes.tobytes())
+    inputs = {"version": FORMAT_VERSION, "columns": [str(col) for col in table.columns],
+              "dtypes": [str(dtype) for dtype in table.dtypes], "rows": len(table),
+              "fds": _canonical(fds), "max_lhs": max_lhs if fds is None else None,
+              "mvds": _canonical(mvds), "pk": list(pk), "step": step,
+              "split_multivalued": split_multivalued}
+    digest.update(json.dumps(inputs, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def _path(directory, key):
+    return os.path.join(directory, key + ".npz")
+
+
+def _pack_strings(values):
+    # The strings as one uint8 array of UTF-8 bytes and the int64 offsets of each string in it; unlike a
+    # fixed-width str array this takes only the bytes of the text and keeps trailing NUL characters
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(data, offsets):
+    data = data.tobytes()
+    return [data[start:stop].decode("utf-8") for start, stop in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+def load(directory, key):
+    # Reads a stored result.
+    # Returns:
+    #     tuple: (relations, highest normal form, fds) or None when the key is not cached
+    path = _path(directory, key)
+    try:
+        with np.load(path, allow_pickle=False) as stored:
+            meta = json.loads(str(stored["meta"]))
+            dictionary = encoding.SharedDictionary()
+            dictionary.encode_uniques(_unpack_strings(stored["dictionary"], stored["dictionary_offsets"]))
+            relations = {}
+            for number, (name, columns) in enumerate(meta["relations"]):
+                codes = {col: stored[f"r{number}_c{position}"] for position, col in enumerate(columns)}
+                relations[tuple(name)] = encoding.EncodedRelation(codes, dictionary, stored[f"r{number}_index"])
+    except (FileNotFoundError, KeyError, ValueError, OSError):
+        return None  # Missing, or left incomplete by an interrupted run
+    os.utime(path)  # Recently used entries are evicted last
+    fds = None if meta["fds"] is None else {tuple(lhs): rhs for lhs, rhs in meta["fds"]}
+    return relations, meta["highest_normal_form"], fds
+
+
+def store(directory, key, relations, highest_normal_form, fds, max_mb=DEFAULT_MAX_MB):
+    # Writes a result as one compressed .npz file: the shared string dictionary, then one int32 code
+    # array per column and the row labels of every relation; evicts the least recently used entries
+    # beyond max_mb megabytes.
+    relations = plan.materialize_all(relations)
+    dictionary = next((rel.dictionary for rel in relations.values() if isinstance(rel, encoding.EncodedRelation)),
+                      encoding.SharedDictionary())
+    arrays, names = {}, []
+    for number, (name, relation) in enumerate(relations.items()):
+        if not isinstance(relation, encoding.EncodedRelation) or relation.dictionary is not dictionary:
+            relation = encoding.EncodedRelation.from_frame(encoding.to_frame(relation), dictionary)
+        names.append([[name] if isinstance(name, str) else list(name), list(relation.columns)])
+        for position, col in enumerate(relation.columns):
+            arrays[f"r{number}_c{position}"] = relation.column_codes(col)
+        index = np.asarray(relation.index)
+        arrays[f"r{number}_index"] = index if index.dtype.kind in "iu" else np.arange(len(relation))  # No pickled labels
+    meta = {"relations": names, "highest_normal_form": highest_normal_form,
+            "fds": None if fds is None else [[list(lhs), list(rhs)] for lhs, rhs in fds.items()]}
+    arrays["meta"] = np.array(json.dumps(meta))
+    arrays["dictionary"], arrays["dictionary_offsets"] = _pack_strings(dictionary.values)
+
+    os.makedirs(directory, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(handle, 'wb') as file:
+        np.savez_compressed(file, **arrays)
+    os.replace(temporary, _path(directory, key))  # Readers never see a partly written entry
+    evict(directory, max_mb)
+
+
+def evict(directory, max_mb=DEFAULT_MAX_MB):
+    # Deletes the least recently used entries until the cache holds at most max_mb megabytes
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".npz"):
+            info = entry.stat()
+            entries.append((info.st_mtime, info.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_mb * 1024 * 1024:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # Evicted by another process sharing the cache
+        total -= size
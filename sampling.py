@@ -0,0 +1,190 @@
+# Sampled pre-validation of FDs, keys, MVDs and join dependencies: counterexamples are searched on
+# growing random samples first, and the full relation is only scanned for dependencies that pass them
+import weakref
+from collections import namedtuple
+import numpy as np
+import encoding  # Factorized integer codes, cached per relation
+import joins  # Join-cardinality check, used for the full scan of a join dependency
+import mvd  # Counting-based MVD check, used for the full scan of an MVD
+import tracing  # Counts the sample rejections and full scans of every stage
+
+# Verdict of one check:
+#     holds: True if the dependency held on every row checked
+#     rows_checked: size of the sample that found the counterexample, or of the whole relation
+#     complete: True if every row was scanned. A sample can only reject, and its counterexample is
+#         certain, so a verdict with complete=False always has holds=False.
+#     counterexample: positions of the rows of a counterexample, or None
+Verdict = namedtuple("Verdict", "holds rows_checked complete counterexample")
+
+DEFAULT_SAMPLE_SIZE = 1000
+_GROWTH = 4  # Each sample is this many times larger than the previous one
+_MAX_PACKED = 1 << 62  # Bound on mixed-radix row keys before int64 overflow
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)  # Odd 64-bit constant mixing the codes of hashed row keys
+
+# Sorted row keys of live relations, keyed by id() and dropped when the relation is garbage collected
+_ROW_KEYS = {}
+
+
+def sample_sizes(n_rows, sample_size=DEFAULT_SAMPLE_SIZE):
+    # Growing sample sizes for a relation of n_rows rows, up to a quarter of it; larger samples cost
+    # about as much as the full scan they would save
+    size = sample_size
+    while 0 < size and size * _GROWTH <= n_rows:
+        yield size
+        size *= _GROWTH
+
+
+def _samples(n_rows, sample_size):
+    # (size, sorted row positions) of every sample, drawn without replacement with a fixed seed
+    rng = np.random.default_rng(0)
+    for size in sample_sizes(n_rows, sample_size):
+        yield size, np.sort(rng.choice(n_rows, size, replace=False)), rng
+
+
+def _reject(size, rows):
+    tracing.count("sample_rejections")
+    return Verdict(False, size, False, rows)
+
+
+def _full(holds, n_rows, rows=None):
+    tracing.count("full_scans")
+    return Verdict(holds, n_rows, True, rows)
+
+
+def _pack(encoded, columns, rows):
+    # Key over columns of the tuples taking each column's value from the rows at rows[col] (so one
+    # tuple may combine several rows). The mixed-radix int64 key is exact; when it could overflow
+    # (wide relations) the key is a 64-bit hash of the codes instead. Keys are only used to look up
+    # combined tuples among the rows, so a hash collision can hide a counterexample but never make one up.
+    key, bound = 0, 1
+    for col in columns:
+        codes, cardinality = encoded[col]
+        cardinality = max(cardinality, 1)
+        if bound * cardinality >= _MAX_PACKED:
+            return _hash(encoded, columns, rows)
+        key = key * cardinality + codes[rows[col]]
+        bound *= cardinality
+    return key
+
+
+def _hash(encoded, columns, rows):
+    # 64-bit multiply-xor hash of the codes of the tuples described as in _pack (uint64 wraps around)
+    key = None
+    for col in columns:
+        codes = encoded[col][0][rows[col]].astype(np.uint64)
+        key = codes if key is None else (key * _HASH_MULTIPLIER) ^ codes
+    return key
+
+
+def _duplicate_pair(ids):
+    # Positions (within ids) of two entries with the same value, or None if all are distinct
+    order = np.argsort(ids, kind="stable")
+    same = np.flatnonzero(ids[order][1:] == ids[order][:-1])
+    return None if not len(same) else order[[same[0], same[0] + 1]]
+
+
+def check_fd(relation, lhs, rhs, encoded=None, sample_size=DEFAULT_SAMPLE_SIZE):
+    # Checks the functional dependency lhs -> rhs on the distinct tuples of a relation.
+    # Two sampled rows that agree on lhs and differ on rhs are a counterexample for the whole relation.
+    if encoded is None:
+        encoded = encoding.cached_codes(relation)
+    lhs = list(lhs)
+    both = lhs + [col for col in rhs if col not in lhs]
+    n_rows = len(relation)
+    for size, rows, _ in _samples(n_rows, sample_size):
+        sample = encoding.project_codes(encoded, rows, both)  # Dense again, so group counts are exact
+        lhs_ids, n_lhs = encoding.group_ids(sample, lhs, size)
+        both_ids, n_both = encoding.group_ids(sample, both, size)
+        if n_lhs != n_both:
+            # Among the distinct lhs+rhs tuples, two share their lhs values
+            _, first = np.unique(both_ids, return_index=True)
+            pair = _duplicate_pair(lhs_ids[first])
+            return _reject(size, rows[first[pair]])
+    _, n_lhs = encoding.group_ids(encoded, lhs, n_rows)
+    _, n_both = encoding.group_ids(encoded, both, n_rows)
+    return _full(n_lhs == n_both, n_rows)
+
+
+def check_unique(relation, attributes, encoded=None, sample_size=DEFAULT_SAMPLE_SIZE):
+    # Checks that no two rows of a relation agree on attributes (as keys.is_unique, so repeated
+    # rows count as a violation too); two such sampled rows are a counterexample.
+    if encoded is None:
+        encoded = encoding.cached_codes(relation)
+    attributes = list(attributes)
+    n_rows = len(relation)
+    for size, rows, _ in _samples(n_rows, sample_size):
+        sample = encoding.project_codes(encoded, rows, attributes)
+        ids, n_groups = encoding.group_ids(sample, attributes, size)
+        if n_groups < size:
+            return _reject(size, rows[_duplicate_pair(ids)])
+    _, n_groups = encoding.group_ids(encoded, attributes, n_rows)
+    return _full(n_groups == n_rows, n_rows)
+
+
+def _row_keys(relation, encoded, columns):
+    # Sorted keys of the rows of relation over columns, cached per relation
+    key = id(relation)
+    entry = _ROW_KEYS.get(key)
+    if entry is not None and entry[0] == len(relation) and columns in entry[1]:
+        return entry[1][columns]
+    row_keys = np.sort(_pack(encoded, columns, dict.fromkeys(columns, slice(None))))
+    if entry is None or entry[0] != len(relation):
+        if entry is None:
+            weakref.finalize(relation, _ROW_KEYS.pop, key, None)
+        entry = (len(relation), {})
+        _ROW_KEYS[key] = entry
+    entry[1][columns] = row_keys
+    return row_keys
+
+
+def _join_counterexample(relation, encoded, left, right, columns, rows, rng):
+    # Pairs every sampled row with a random sampled row that agrees on the shared columns, and
+    # returns the positions of a pair whose combined tuple (left part of one, right part of the
+    # other) is not a row of the relation, or None. Such a tuple is in the join of the projections
+    # but not in the relation, which proves the join dependency fails.
+    row_keys = _row_keys(relation, encoded, columns)
+    shared = [col for col in left if col in right]
+    sample = {col: (encoded[col][0][rows], encoded[col][1]) for col in shared}
+    shared_ids, _ = encoding.group_ids(sample, shared, len(rows))
+    # Two independent random orders within each shared group, so position k of both is a valid pair
+    first = rows[np.lexsort((rng.random(len(rows)), shared_ids))]
+    second = rows[np.lexsort((rng.random(len(rows)), shared_ids))]
+    parts = {col: first if col in left else second for col in columns}
+    combined = _pack(encoded, columns, parts)
+    found = np.minimum(np.searchsorted(row_keys, combined), len(row_keys) - 1)  # Binary search, no full sort
+    missing = np.flatnonzero(row_keys[found] != combined)
+    if not len(missing):
+        return None
+    return np.array([first[missing[0]], second[missing[0]]])
+
+
+def check_join(relation, left, right, encoded=None, sample_size=DEFAULT_SAMPLE_SIZE):
+    # Checks the join dependency *(left, right): joining the projections on left and right gives
+    # back exactly the (distinct tuples of the) relation. The counterexample is a pair of rows.
+    if encoded is None:
+        encoded = encoding.cached_codes(relation)
+    left, right = list(left), list(right)
+    # In relation order, so every split of the relation shares one cached set of row keys
+    columns = tuple(col for col in relation.columns if col in left or col in right)
+    for size, rows, rng in _samples(len(relation), sample_size):
+        pair = _join_counterexample(relation, encoded, left, right, columns, rows, rng)
+        if pair is not None:
+            return _reject(size, pair)
+    return _full(joins.is_lossless_join(relation, left, right, encoded), len(relation))
+
+
+def check_mvd(relation, determinant, dependent, encoded=None, sample_size=DEFAULT_SAMPLE_SIZE):
+    # Checks the MVD X ->> Y, the join dependency *(XY, XZ) with Z the remaining columns.
+    # The counterexample holds one row of each violating X-group found (all of them after a full scan).
+    if encoded is None:
+        encoded = encoding.cached_codes(relation)
+    x_cols = list(determinant)
+    y_cols = [col for col in dependent if col not in x_cols]
+    z_cols = [col for col in relation.columns if col not in x_cols and col not in y_cols]
+    columns = tuple(relation.columns)
+    for size, rows, rng in _samples(len(relation), sample_size):
+        pair = _join_counterexample(relation, encoded, x_cols + y_cols, x_cols + z_cols, columns, rows, rng)
+        if pair is not None:
+            return _reject(size, pair[:1])
+    violating = mvd.violating_rows(relation, x_cols, y_cols, encoded)
+    return _full(not len(violating), len(relation), violating)
@@ -0,0 +1,59 @@
+# Schema-only relations for the 1NF-BCNF transforms, which need attribute sets and FDs but no rows
+import csv
+import importlib.util
+import sys
+
+
+class SchemaRelation:
+    # A relation known only by its columns. It supports the DataFrame operations the 1NF-BCNF
+    # transforms use (columns, column projection, drop, drop_duplicates, reset_index), so they run
+    # without pandas; data-level checks (4NF, 5NF) need a real table instead.
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+
+    @property
+    def empty(self):
+        return not self.columns
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            raise TypeError(f"Schema-only relation has no values for column {key}")
+        return SchemaRelation(key)
+
+    def drop_duplicates(self):
+        return self
+
+    def reset_index(self, drop=True):
+        return self
+
+    def drop(self, columns, inplace=False):
+        columns = [columns] if isinstance(columns, str) else columns  # One column name, as with DataFrame.drop
+        kept = [col for col in self.columns if col not in columns]
+        if inplace:
+            self.columns = kept
+            return None
+        return SchemaRelation(kept)
+
+    def __repr__(self):
+        return f"Relation({', '.join(self.columns)})"
+
+
+def read_header(path):
+    # Column names from the first line of a CSV file, read with the csv module only
+    with open(path, newline='') as file:
+        return [column.strip() for column in next(csv.reader(file), [])]
+
+
+def lazy_import(name):
+    # Returns a module that is only executed on first attribute access, so modules that pull in
+    # pandas and numpy cost nothing at startup when only schemas are normalized
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
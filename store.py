@@ -0,0 +1,170 @@
+# Spill-to-disk relation store: a dict of relations that writes the least recently used encoded relations
+# to .npy files once the codes held in memory exceed a budget, and reopens them memory-mapped on access
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import MutableMapping
+import schema  # Lazy module loader: plan.py asks spilling() in schema-only runs too, without numpy or pandas
+import tracing  # Counts the spilled relations of every stage
+encoding = schema.lazy_import("encoding")  # Spilled as int32 code arrays; the shared dictionary stays in memory
+
+# Budget of the stores created by relation_store(); None keeps everything in memory.
+# NORMALIZER_SPILL_MB sets the initial budget and NORMALIZER_SPILL_DIR where the files go.
+_settings = {"budget_mb": float(os.environ["NORMALIZER_SPILL_MB"]) if os.environ.get("NORMALIZER_SPILL_MB") else None,
+             "directory": os.environ.get("NORMALIZER_SPILL_DIR")}
+
+
+def configure(budget_mb=None, directory=None):
+    # Sets the memory budget in MB (0 spills every encoded relation) and the parent directory of the spill files
+    _settings["budget_mb"] = budget_mb
+    if directory is not None:
+        _settings["directory"] = directory
+
+
+def spilling():
+    # True if relations are spilled to disk beyond a memory budget
+    return _settings["budget_mb"] is not None
+
+
+def relation_store():
+    # A RelationStore with the configured budget, or a plain dict when spilling is off
+    if _settings["budget_mb"] is None:
+        return {}
+    return RelationStore(_settings["budget_mb"], _settings["directory"])
+
+
+def _resident_bytes(relation):
+    # Bytes of a relation's code arrays that live in memory (memory-mapped arrays are backed by the files)
+    if not isinstance(relation, encoding.EncodedRelation):
+        return 0  # DataFrames and lazy or schema-only relations are never spilled
+    import numpy as np  # Only needed once encoded relations are stored
+    arrays = [relation.column_codes(col) for col in relation.columns] + [relation.index]
+    return sum(array.nbytes for array in arrays if isinstance(array, np.ndarray) and not _is_mapped(array))
+
+
+def _is_mapped(array):
+    # True if the array is a view of a memory-mapped file (copies of np.memmap arrays are np.memmap too)
+    import numpy as np
+    while isinstance(array, np.ndarray):
+        array = array.base
+    return isinstance(array, mmap.mmap)
+
+
+class RelationStore(MutableMapping):
+    # name -> relation, in insertion order like a dict. Encoded relations are kept in memory, most recently
+    # used last; when their codes exceed budget_mb, the least recently used ones are written to one .npy file
+    # per column and replaced by read-only memory-mapped views of those files, so the operating system pages
+    # them in on demand (zero-copy) and can drop them again under memory pressure. A spilled relation that
+    # fits the budget is read back into memory when it is accessed, and its files are reused if it is
+    # spilled again (relations are never modified in place).
+
+    def __init__(self, budget_mb, directory=None):
+        self.budget = budget_mb * 1024 * 1024
+        self.directory = tempfile.mkdtemp(prefix="normalizer-spill-", dir=directory)
+        weakref.finalize(self, shutil.rmtree, self.directory, True)  # The files live as long as the store
+        self._relations = {}  # name -> relation (in memory or memory-mapped)
+        self._hot = OrderedDict()  # name -> resident bytes, of the relations held in memory, least recently used first
+        self._files = {}  # name -> paths of the spill files of a relation
+        self._resident = 0
+        self._count = 0
+        self._lock = threading.Lock()  # Relations may be stored from the executor's worker threads
+
+    def __getitem__(self, name):
+        with self._lock:
+            relation = self._relations[name]
+            if name in self._hot:
+                self._hot.move_to_end(name)
+            elif name in self._files and self.budget > 0 and _mapped_bytes(relation) <= self.budget:
+                relation = _in_memory(relation)  # Hot again: one sequential read instead of page faults
+                self._relations[name] = relation
+                self._hot[name] = _resident_bytes(relation)
+                self._resident += self._hot[name]
+                self._spill()
+            return relation
+
+    def __setitem__(self, name, relation):
+        with self._lock:
+            self._discard(name)
+            self._relations[name] = relation
+            size = _resident_bytes(relation)
+            if size:
+                self._hot[name] = size
+                self._resident += size
+            self._spill()
+
+    def __delitem__(self, name):
+        with self._lock:
+            self._discard(name)
+            del self._relations[name]
+
+    def __iter__(self):
+        return iter(list(self._relations))
+
+    def __len__(self):
+        return len(self._relations)
+
+    def resident_mb(self):
+        # Megabytes of code arrays currently held in memory
+        return self._resident / 2 ** 20
+
+    def spilled(self):
+        # Names of the relations that are memory-mapped from disk
+        return [name for name in self._relations if name in self._files and name not in self._hot]
+
+    def _discard(self, name):
+        # Forgets the memory accounting and spill files of an entry that is replaced or deleted
+        self._resident -= self._hot.pop(name, 0)
+        for path in self._files.pop(name, ()):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _spill(self):
+        # Writes the least recently used relations to disk until the resident codes fit the budget
+        while self._resident > self.budget and self._hot:
+            name, size = self._hot.popitem(last=False)
+            self._resident -= size
+            if name not in self._files:
+                self._write(name, self._relations[name])
+                tracing.count("spilled_relations")
+            self._relations[name] = self._open(name, self._relations[name])
+
+    def _write(self, name, relation):
+        # Saves every column and the row labels (unless they are objects) of a relation as .npy files
+        import numpy as np
+        self._count += 1
+        prefix = os.path.join(self.directory, f"{os.getpid()}-{self._count}")  # Forked workers share the directory
+        paths = []
+        for position, col in enumerate(relation.columns):
+            paths.append(f"{prefix}-c{position}.npy")
+            np.save(paths[-1], relation.column_codes(col))
+        if np.asarray(relation.index).dtype.kind in "iub":  # Object labels would need pickling
+            paths.append(f"{prefix}-index.npy")
+            np.save(paths[-1], np.asarray(relation.index))
+        self._files[name] = paths
+
+    def _open(self, name, relation):
+        # The relation memory-mapped from its spill files (object row labels stay in memory)
+        import numpy as np
+        paths = self._files[name]
+        codes = {col: np.load(path, mmap_mode="r") for col, path in zip(relation.columns, paths)}
+        index = np.load(paths[-1], mmap_mode="r") if len(paths) > len(codes) else relation.index
+        return encoding.EncodedRelation(codes, relation.dictionary, index)
+
+
+def _mapped_bytes(relation):
+    # Bytes of a relation's code arrays and row labels, wherever they live
+    import numpy as np
+    return sum(relation.column_codes(col).nbytes for col in relation.columns) + np.asarray(relation.index).nbytes
+
+
+def _in_memory(relation):
+    # A copy of a memory-mapped relation whose arrays are read into memory
+    import numpy as np
+    codes = {col: np.array(relation.column_codes(col)) for col in relation.columns}
+    return encoding.EncodedRelation(codes, relation.dictionary, np.array(relation.index))
@@ -0,0 +1,50 @@
+# Checks that the arrow backend returns the same rows in the same order as the pandas backend
+import random
+import numpy as np
+import pandas as pd
+import pytest
+import backend
+import encoding
+import exploder
+
+pytest.importorskip("pyarrow")
+
+
+def random_frame(rng, n_rows=300):
+    return pd.DataFrame({col: [str(rng.randint(0, 5)) for _ in range(n_rows)] for col in "ABC"})
+
+
+def test_grouping_and_projection_match_pandas():
+    rng = random.Random(0)
+    pandas_backend, arrow_backend = backend.PandasBackend(), backend.ArrowBackend()
+    for _ in range(10):
+        frame = random_frame(rng)
+        encoded = encoding.factorize_columns(frame)
+        for columns in (["A"], ["A", "B"], ["C", "A", "B"]):
+            expected_ids, expected_groups = pandas_backend.group_ids(encoded, columns, len(frame))
+            ids, groups = arrow_backend.group_ids(encoded, columns, len(frame))
+            assert groups == expected_groups
+            np.testing.assert_array_equal(ids, expected_ids)
+            np.testing.assert_array_equal(arrow_backend.distinct_rows(encoded, columns, len(frame)),
+                                          pandas_backend.distinct_rows(encoded, columns, len(frame)))
+            grouped = columns + ["C"]  # The counted columns include those of the groups, as in mvd.py
+            np.testing.assert_array_equal(arrow_backend.distinct_per_group(encoded, grouped, ids, groups, len(frame)),
+                                          pandas_backend.distinct_per_group(encoded, grouped, ids, groups, len(frame)))
+            relation = encoding.encode_relation(frame)
+            assert (arrow_backend.project(relation, columns).decode().values.tolist()
+                    == pandas_backend.project(relation, columns).decode().values.tolist())
+
+
+def test_arrow_flatten_matches_flatten_column():
+    arrow_backend = backend.ArrowBackend()
+    columns = [pd.Series([["a", "b"], [], ["c"]]), pd.Series([["a"], "b", []]), pd.Series([[1, 2], [], [3.5]]),
+               pd.Series([["a", None], ["b"]]), pd.Series(["a", "b"])]
+    for series in columns:
+        values, starts, lengths = arrow_backend._flatten(series)
+        expected_values, expected_starts, expected_lengths = exploder.flatten_column(series)
+        np.testing.assert_array_equal(lengths, expected_lengths)
+        for row in range(len(series)):
+            got = values[starts[row]:starts[row] + lengths[row]]
+            expected = expected_values[expected_starts[row]:expected_starts[row] + expected_lengths[row]]
+            assert pd.isna(got).tolist() == pd.isna(expected).tolist()
+            assert [value for value in got if not pd.isna(value)] == [value for value in expected if not pd.isna(value)]
@@ -0,0 +1,51 @@
+# Checks the batch runner on a small manifest: per-job outputs, the summary and a job whose table is missing
+import json
+import batch
+
+TABLES = {
+    "staff.csv": "ID,Name,Dept,Floor\n1,Ann,IT,3\n2,Bob,IT,3\n3,Cid,HR,1\n4,Dee,HR,1\n",
+    "ctb.csv": "Course,Teacher,Book\nDB,T1,B1\nDB,T1,B2\nDB,T2,B1\nDB,T2,B2\nOS,T3,B3\n",
+}
+FILES = {"staff_fds.txt": "ID -> Name, Dept\nDept -> Floor\n", "staff_key.txt": "ID",
+         "ctb_mvds.txt": "Course ->> Teacher\n", "ctb_key.txt": "Course, Teacher, Book"}
+JOBS = [{"name": "staff", "table": "staff.csv", "fds": "staff_fds.txt", "key": "staff_key.txt", "target": "BCNF"},
+        {"name": "ctb", "table": "ctb.csv", "mvds": "ctb_mvds.txt", "key": "ctb_key.txt", "target": 5}]  # 5 is 4NF
+
+
+def write_manifest(tmp_path, jobs):
+    for name, text in {**TABLES, **FILES}.items():
+        (tmp_path / name).write_text(text)
+    (tmp_path / "manifest.json").write_text(json.dumps(jobs))
+    return str(tmp_path / "manifest.json")
+
+
+def test_two_jobs_in_two_workers(tmp_path, capsys):
+    output_dir = tmp_path / "out"
+    assert batch.main([write_manifest(tmp_path, JOBS), "--output-dir", str(output_dir), "--workers", "2"]) == 0
+    assert "2 of 2 tables normalized" in capsys.readouterr().out
+    summaries = json.loads((output_dir / "summary.json").read_text())
+    assert [summary["name"] for summary in summaries] == ["staff", "ctb"]  # Manifest order
+    staff, ctb = summaries
+    assert (staff["status"], staff["target"], staff["highest"]) == ("ok", "BCNF", "2NF")  # Dept -> Floor is transitive
+    assert (ctb["status"], ctb["target"]) == ("ok", "4NF")
+    assert [stage["stage"] for stage in staff["stages"]] == ["1NF", "2NF", "3NF", "BCNF", "ddl"]
+    for summary in summaries:
+        sql = (output_dir / f"{summary['name']}.sql").read_text()
+        assert sql.count("CREATE TABLE") == summary["tables"] > 0
+        assert (output_dir / f"{summary['name']}.log").exists()
+    staff_sql = (output_dir / "staff.sql").read_text()
+    assert "Floor" in staff_sql and "Course" not in staff_sql  # Each job writes only its own tables
+    assert "Discovered fds" in (output_dir / "ctb.log").read_text()  # No fds file: mined from the rows
+
+
+def test_missing_table_fails_only_its_job(tmp_path, capsys):
+    jobs = JOBS + [{"name": "lost", "table": "missing.csv", "key": "staff_key.txt", "target": "3NF"}]
+    output_dir = tmp_path / "out"
+    assert batch.main([write_manifest(tmp_path, jobs), "--output-dir", str(output_dir), "--workers", "2"]) == 1
+    out = capsys.readouterr().out
+    assert "lost: failed (FileNotFoundError" in out and "2 of 3 tables normalized" in out
+    lost = json.loads((output_dir / "summary.json").read_text())[2]
+    assert (lost["status"], lost["tables"], lost["stages"]) == ("failed", 0, [])
+    assert lost["error"].startswith("FileNotFoundError")
+    assert "Traceback" in (output_dir / "lost.log").read_text()
+    assert not (output_dir / "lost.sql").exists()
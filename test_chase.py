@@ -0,0 +1,59 @@
+# Checks of the chase against the binary-decomposition test and textbook examples
+import random
+import chase
+import closure
+
+
+def random_fds(rng, attributes, n_fds):
+    fds = {}
+    for _ in range(n_fds):
+        lhs = tuple(sorted(rng.sample(attributes, rng.randint(1, 2))))
+        fds.setdefault(lhs, []).extend(rng.sample(attributes, 1))
+    return fds
+
+
+def test_binary_decompositions_match_the_common_attribute_test():
+    # R1, R2 is lossless under FDs exactly when R1 & R2 determines R1 or R2
+    rng = random.Random(0)
+    attributes = [f"A{i}" for i in range(6)]
+    for _ in range(300):
+        fds = random_fds(rng, attributes, rng.randint(0, 6))
+        first = rng.sample(attributes, rng.randint(1, 5))
+        second = [attr for attr in attributes if attr not in first]
+        second += rng.sample(first, rng.randint(0, len(first) - 1))
+        common = closure.ClosureEngine(fds).closure([attr for attr in first if attr in second])
+        expected = set(first) <= common or set(second) <= common
+        assert chase.is_lossless(attributes, [first, second], fds) == expected
+
+
+def test_multiway_decomposition():
+    fds = {("A",): ["B"], ("B",): ["C"], ("C",): ["D"]}
+    assert chase.is_lossless("ABCD", [["A", "B"], ["B", "C"], ["C", "D"]], fds)
+    assert not chase.is_lossless("ABCD", [["A", "B"], ["C", "D"], ["B", "C"]], {})
+    assert not chase.is_lossless("ABCD", [["A", "B"], ["A", "C"], ["B", "D"]], {("B",): ["C"]})
+
+
+def test_mvd_decomposition():
+    mvds = {("A",): ["B"]}  # A ->> B, so A ->> C too
+    assert chase.is_lossless("ABC", [["A", "B"], ["A", "C"]], mvds=mvds)
+    assert not chase.is_lossless("ABC", [["A", "B"], ["B", "C"]], mvds=mvds)
+    assert not chase.is_lossless("ABC", [["A", "B"], ["A", "C"]])
+
+
+def test_verify_decomposition_uses_the_columns_of_the_relations():
+    class Relation:
+        def __init__(self, columns):
+            self.columns = columns
+    before = {("A",): Relation(["A", "B", "C"])}
+    after = {("A",): Relation(["A", "B"]), ("B",): Relation(["B", "C"])}
+    assert chase.verify_decomposition(before, after, {("B",): ["C"]})
+    assert not chase.verify_decomposition(before, after, {})
+
+
+def test_dependencies_reaching_outside_the_attributes_are_skipped():
+    # X is not a column of the decomposed relation, so (X, A) -> B says nothing about A, B and C
+    assert not chase.is_lossless("ABC", [["A", "B"], ["A", "C"]], {("X", "A"): ["B"]})
+    assert not chase.is_lossless("ABC", [["A", "B"], ["A", "C"]], mvds={("X", "A"): ["B"]})
+    assert not chase.is_lossless("ABC", [["A", "B"], ["B", "C"]], {("X",): ["B"]})
+    # An inside LHS still holds for the inside part of its RHS
+    assert chase.is_lossless("ABC", [["A", "B"], ["A", "C"]], {("A",): ["B", "X"]})
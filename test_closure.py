@@ -0,0 +1,103 @@
+# Brute-force checks of the bitset closure engine against the textbook fixpoint closure
+import random
+import threading
+import closure
+
+
+def random_fds(rng, attributes, n_fds):
+    # Random FDs in the {tuple(lhs): [rhs]} form, some with a repeated or empty left-hand side
+    fds = {}
+    for _ in range(n_fds):
+        lhs = tuple(sorted(rng.sample(attributes, rng.randint(0, 3))))
+        fds.setdefault(lhs, []).extend(rng.sample(attributes, rng.randint(1, 2)))
+    return fds
+
+
+def fixpoint_closure(attributes, fds):
+    # Applies every FD whose LHS is in the closure until nothing changes
+    result = set(attributes)
+    changed = True
+    while changed:
+        changed = False
+        for lhs, rhs in fds.items():
+            if set(lhs) <= result and not set(rhs) <= result:
+                result |= set(rhs)
+                changed = True
+    return result
+
+
+def test_closure_matches_fixpoint():
+    rng = random.Random(0)
+    attributes = [f"A{i}" for i in range(8)]
+    for _ in range(200):
+        fds = random_fds(rng, attributes, rng.randint(0, 8))
+        engine = closure.ClosureEngine(fds)
+        for _ in range(10):
+            start = rng.sample(attributes, rng.randint(0, 4))
+            assert engine.closure(start) == fixpoint_closure(start, fds)
+
+
+def test_cached_engine_matches_fixpoint():
+    rng = random.Random(1)
+    attributes = [f"A{i}" for i in range(8)]
+    for _ in range(50):
+        fds = random_fds(rng, attributes, 6)
+        for _ in range(2):  # The second round is answered from the shared closure cache
+            for size in range(4):
+                start = attributes[:size]
+                assert closure.get_engine(fds).closure(start) == fixpoint_closure(start, fds)
+
+
+def test_is_superkey():
+    fds = {("A",): ["B"], ("B",): ["C"]}
+    engine = closure.get_engine(fds)
+    assert engine.is_superkey(["A"], ["A", "B", "C"])
+    assert not engine.is_superkey(["B"], ["A", "B", "C"])
+    assert engine.is_superkey(["A", "D"], ["A", "B", "C", "D"])  # D is not mentioned by any FD
+
+
+def test_concurrent_registration_keeps_one_bit_per_attribute():
+    engine = closure.get_engine({("A",): ["B"]})
+    names = [f"X{i}" for i in range(500)]
+    threads = [threading.Thread(target=lambda: [engine.encode([name]) for name in names]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(engine.names) == len(set(engine.names)) == len(engine.bit_of)
+    assert all(engine.names[bit] == attr for attr, bit in engine.bit_of.items())
+
+
+def test_closure_cache_counters_and_eviction(monkeypatch):
+    monkeypatch.setattr(closure, "_CLOSURE_CACHE", closure.OrderedDict())
+    monkeypatch.setattr(closure, "_CLOSURE_CACHE_SIZE", 2)
+    engine = closure.get_engine({("A",): ["B"], ("B",): ["C"], ("D",): ["A"]})
+    a, b, d = (engine.encode([attr]) for attr in "ABD")
+    before = closure.stats()
+
+    def counted():
+        after = closure.stats()
+        return {name: after[name] - before[name] for name in after}
+
+    engine.closure_mask(a)
+    engine.closure_mask(a)
+    assert counted() == {"closure_calls": 2, "closure_hits": 1, "closure_misses": 1}
+    engine.closure_mask(b)
+    engine.closure_mask(a)  # A becomes the most recently used closure
+    engine.closure_mask(d)  # Evicts the closure of B
+    assert list(closure._CLOSURE_CACHE) == [(engine.number, a), (engine.number, d)]
+    engine.closure_mask(b)
+    assert counted() == {"closure_calls": 6, "closure_hits": 2, "closure_misses": 4}
+    engine.closure_mask(a, disabled={0})  # Closures without some FDs are never cached
+    assert counted()["closure_misses"] == 4 and len(closure._CLOSURE_CACHE) == 2
+
+
+def test_get_engine_follows_changes_to_the_fd_dict():
+    fds = {("A",): ["B"]}
+    engine = closure.get_engine(fds)
+    assert closure.get_engine(fds) is engine
+    assert closure.get_engine(dict(fds)) is engine  # Equal FDs share one engine
+    fds[("B",)] = ["C"]
+    assert closure.get_engine(fds).closure(["A"]) == {"A", "B", "C"}
+    fds[("A",)].append("D")  # Changed in place
+    assert closure.get_engine(fds).closure(["A"]) == {"A", "B", "C", "D"}
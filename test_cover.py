@@ -0,0 +1,93 @@
+# Brute-force checks of the minimal cover and of Bernstein 3NF synthesis
+import itertools
+import random
+import closure
+import cover
+import normalizer
+from schema import SchemaRelation
+
+
+def random_fds(rng, attributes, n_fds):
+    fds = {}
+    for _ in range(n_fds):
+        lhs = tuple(sorted(rng.sample(attributes, rng.randint(1, 3))))
+        fds.setdefault(lhs, []).extend(rng.sample(attributes, rng.randint(1, 2)))
+    return fds
+
+
+def unit_fds(fds):
+    return [(tuple(lhs), rhs) for lhs, rhs_list in fds.items() for rhs in rhs_list]
+
+
+def closures(fds, attributes):
+    # Closure of every subset of attributes
+    engine = closure.ClosureEngine(fds)
+    return {combo: engine.closure(combo) for size in range(len(attributes) + 1)
+            for combo in itertools.combinations(attributes, size)}
+
+
+def implies(fds, lhs, rhs):
+    return rhs in closure.ClosureEngine(fds).closure(lhs)
+
+
+def test_minimal_cover_is_equivalent_and_minimal():
+    rng = random.Random(0)
+    attributes = [f"A{i}" for i in range(6)]
+    for _ in range(150):
+        fds = random_fds(rng, attributes, rng.randint(0, 7))
+        minimal = cover.minimal_cover(fds)
+        assert closures(minimal, attributes) == closures(fds, attributes)
+        units = unit_fds(minimal)
+        assert len(units) == len(set(units))
+        for position, (lhs, rhs) in enumerate(units):
+            assert rhs not in lhs
+            others = dict()
+            for other_lhs, other_rhs in units[:position] + units[position + 1:]:
+                others.setdefault(other_lhs, []).append(other_rhs)
+            assert not implies(others, lhs, rhs)  # No redundant FD
+            for attr in lhs:
+                smaller = tuple(col for col in lhs if col != attr)
+                assert not implies(minimal, smaller, rhs)  # No extraneous LHS attribute
+
+
+def test_synthesis_is_lossless_and_dependency_preserving():
+    rng = random.Random(1)
+    attributes = [f"A{i}" for i in range(6)]
+    for _ in range(150):
+        fds = random_fds(rng, attributes, rng.randint(0, 7))
+        schemas = [list(columns) for _, columns in cover.synthesize_3NF(attributes, fds)]
+        assert set().union(*schemas) == set(attributes)
+        engine = closure.ClosureEngine(fds)
+        assert any(engine.is_superkey(columns, attributes) for columns in schemas)  # Lossless
+        projected = {}  # The FDs that hold inside one schema, whose union must imply every FD
+        for columns in schemas:
+            for size in range(1, len(columns) + 1):
+                for lhs in itertools.combinations(columns, size):
+                    projected.setdefault(lhs, []).extend(attr for attr in engine.closure(lhs) if attr in columns)
+        for lhs, rhs in unit_fds(fds):
+            assert implies(projected, lhs, rhs)
+
+
+def test_relation_fds_match_brute_force_projection():
+    rng = random.Random(2)
+    attributes = [f"A{i}" for i in range(7)]
+    for _ in range(150):
+        fds = random_fds(rng, attributes, rng.randint(0, 7))
+        columns = sorted(rng.sample(attributes, rng.randint(1, 6)), key=attributes.index)
+        engine = closure.ClosureEngine(fds)
+        expected = {combo: {attr for attr in engine.closure(combo) if attr in columns} | set(combo)
+                    for size in range(len(columns) + 1) for combo in itertools.combinations(columns, size)}
+        projected = normalizer.relation_fds(SchemaRelation(columns), fds)
+        assert all(set(lhs + tuple(rhs)) <= set(columns) for lhs, rhs in projected.items())
+        assert closures(projected, columns) == expected
+        # Stopped early, the projection only misses FDs; everything it lists still holds
+        bounded = normalizer.relation_fds(SchemaRelation(columns), fds, max_checks=1)
+        for lhs, rhs in unit_fds(bounded):
+            assert rhs in expected[lhs]
+
+
+def test_3NF_check_sees_dependencies_through_dropped_columns():
+    fds = {("ID",): ["Name", "Dept"], ("Dept",): ["Floor"]}
+    relation = SchemaRelation(["ID", "Skills", "Floor"])  # Dept went to another relation
+    assert normalizer.relation_fds(relation, fds) == {("ID",): ["Floor"]}
+    assert normalizer.has_partial_dependencies({("ID", "Skills"): relation}, fds)
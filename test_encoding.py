@@ -0,0 +1,34 @@
+# Checks of the dictionary-encoded relations against the DataFrames they encode
+import random
+import numpy as np
+import pandas as pd
+import encoding
+
+
+def random_frame(rng, n_rows=100):
+    return pd.DataFrame({col: [str(rng.randint(0, 3)) for _ in range(n_rows)] for col in ("A", "B", "AB")})
+
+
+def test_encode_decode_round_trip():
+    frame = pd.DataFrame({"A": ["x", "", "é"], "B": ["1", "1", "2"]}, index=[5, 3, 9])
+    decoded = encoding.encode_relation(frame).decode()
+    assert decoded.values.tolist() == frame.values.tolist()
+    assert list(decoded.index) == [5, 3, 9]
+
+
+def test_relation_operations_match_pandas():
+    rng = random.Random(0)
+    for _ in range(20):
+        frame = random_frame(rng)
+        encoded = encoding.encode_relation(frame)
+        for columns in (["A"], ["A", "B"], ["B", "AB", "A"]):
+            expected = frame[columns].drop_duplicates()
+            assert encoded[columns].drop_duplicates().decode().values.tolist() == expected.values.tolist()
+            assert encoding.distinct_projection(encoded, columns).decode().values.tolist() == expected.values.tolist()
+        np.testing.assert_array_equal(encoded.duplicated(["A", "B"]), frame.duplicated(["A", "B"]).to_numpy())
+
+
+def test_drop_takes_one_column_name():
+    encoded = encoding.encode_relation(random_frame(random.Random(1), 5))
+    assert list(encoded.drop("AB").columns) == ["A", "B"]
+    assert list(encoded.drop(["A"]).columns) == ["B", "AB"]
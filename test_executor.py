@@ -0,0 +1,55 @@
+# Checks that the worker pools return the same results as a serial run, in the order of the relations
+import os
+import random
+import time
+import pandas as pd
+import executor
+import normalizer
+
+
+def tagged(name, relation, delay):
+    # Finishes the relations in a shuffled order, and reports the process that ran it
+    time.sleep(delay[name])
+    return name, len(relation), os.getpid()
+
+
+def random_relations(rng, n_relations):
+    relations = {}
+    for number in range(n_relations):
+        columns = rng.sample("ABCDEF", rng.randint(2, 5))
+        relations[f"R{number}"] = pd.DataFrame({col: [str(rng.randint(0, 3)) for _ in range(30)] for col in columns})
+    return relations
+
+
+def test_results_keep_the_order_of_the_relations():
+    rng = random.Random(0)
+    relations = {f"R{number}": pd.DataFrame({"A": range(number)}) for number in range(12)}
+    delay = {name: rng.random() / 50 for name in relations}
+    for kind in ("thread", "process"):
+        results = executor.map_relations(tagged, relations, delay, workers=4, kind=kind)
+        assert [(name, size) for name, size, _ in results] == [(name, len(rel)) for name, rel in relations.items()]
+        pids = {pid for _, _, pid in results}
+        assert (pids == {os.getpid()}) == (kind == "thread")
+
+
+def test_pools_match_serial_runs():
+    rng = random.Random(1)
+    for _ in range(5):
+        relations = random_relations(rng, 8)
+        fds = {tuple(rng.sample("ABCDEF", rng.randint(1, 2))): rng.sample("ABCDEF", 1) for _ in range(4)}
+        for func, arg in ((normalizer.has_bcnf_violation, fds), (normalizer.synthesize_for_3NF, fds),
+                          (normalizer.check_5NF_relation, fds)):
+            serial = executor.map_relations(func, relations, arg, workers=1)
+            for kind in ("thread", "process"):
+                assert executor.map_relations(func, relations, arg, workers=3, kind=kind) == serial
+
+
+def test_configured_defaults():
+    settings = dict(executor._settings)
+    executor.configure(workers=3, kind="process")
+    try:
+        results = executor.map_relations(tagged, {"A": [1], "B": [1, 2]}, {"A": 0.01, "B": 0})
+        assert [name for name, _, _ in results] == ["A", "B"]
+        assert os.getpid() not in {pid for _, _, pid in results}
+    finally:
+        executor._settings.update(settings)
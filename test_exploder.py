@@ -0,0 +1,50 @@
+# Checks of the chunked cross-product explosion against pandas' chained explode
+import random
+import pandas as pd
+import exploder
+
+CELLS = [[], ["1"], ["1", "2", "3"], "5", ["4", "5"], ("6", "7")]
+
+
+def random_frame(rng, n_rows):
+    return pd.DataFrame({"K": [str(row) for row in range(n_rows)],
+                         "A": [rng.choice(CELLS) for _ in range(n_rows)],
+                         "B": [rng.choice(CELLS) for _ in range(n_rows)]},
+                        index=rng.sample(range(1000), n_rows))
+
+
+def test_iter_exploded_matches_explode_in_any_chunk_size():
+    rng = random.Random(0)
+    for _ in range(40):
+        frame = random_frame(rng, rng.randint(1, 20))
+        expected = frame.explode("A").explode("B")
+        for chunk_rows in (1, 2, 5, 1000):
+            chunks = list(exploder.iter_exploded(frame, ["A", "B"], chunk_rows))
+            pd.testing.assert_frame_equal(pd.concat(chunks), expected, check_dtype=False)
+            assert all(len(chunk) <= max(chunk_rows, 9) for chunk in chunks)  # One row explodes to at most 3 x 3
+
+
+def test_estimate_exploded_rows():
+    rng = random.Random(1)
+    for _ in range(50):
+        frame = random_frame(rng, rng.randint(1, 20))
+        assert exploder.estimate_exploded_rows(frame) == len(frame.explode("A").explode("B"))
+
+
+def test_split_multivalued_pairs_each_column_with_the_key():
+    frame = pd.DataFrame({"K": ["1", "2"], "A": [["x", "y"], "z"], "B": [["p"], ["q", "r"]]})
+    relations = exploder.split_multivalued(frame, ("K",))
+    assert set(relations) == {("K",), ("K", "A"), ("K", "B")}
+    assert sorted(map(tuple, relations[("K", "A")].to_numpy())) == [("1", "x"), ("1", "y"), ("2", "z")]
+    assert sorted(map(tuple, relations[("K", "B")].to_numpy())) == [("1", "p"), ("2", "q"), ("2", "r")]
+
+
+def test_split_multivalued_flattens_a_multivalued_key_column():
+    frame = pd.DataFrame({"K": ["1", "2"], "A": [["x", "y"], "z"], "B": [["p"], ["q", "r"]]})
+    relations = exploder.split_multivalued(frame, ("K", "A"))
+    assert set(relations) == {("K", "A"), ("K", "A", "B")}
+    assert {name: list(relation.columns) for name, relation in relations.items()} == \
+        exploder.split_schemas(list(frame.columns), ("K", "A"), ["A", "B"])
+    assert sorted(map(tuple, relations[("K", "A")].to_numpy())) == [("1", "x"), ("1", "y"), ("2", "z")]
+    assert sorted(map(tuple, relations[("K", "A", "B")].to_numpy())) == \
+        [("1", "x", "p"), ("1", "y", "p"), ("2", "z", "q"), ("2", "z", "r")]
@@ -0,0 +1,50 @@
+# Checks of the SQLite and CSV exports: every row arrives, and identifiers are quoted safely
+import csv
+import sqlite3
+import pandas as pd
+import ddl
+import export
+
+
+def test_sqlite_export_loads_every_row(tmp_path):
+    relations = {("K",): pd.DataFrame({"K": ["1", "2", "3"], "V": ["a", None, "c"]})}
+    path = str(tmp_path / "out.db")
+    reports = export.export_sqlite(relations, {("K",): ["V"]}, path, 3, ("K",), batch_rows=2)
+    assert [report["verified"] for report in reports] == [True]
+    with sqlite3.connect(path) as connection:
+        assert connection.execute('SELECT "K", "V" FROM "K" ORDER BY "K"').fetchall() == [("1", "a"), ("2", None), ("3", "c")]
+
+
+def test_identifiers_with_double_quotes(tmp_path):
+    relations = {('a"b',): pd.DataFrame({'a"b': ["1", "2"], 'c"': ["x", "y"]})}
+    path = str(tmp_path / "out.db")
+    reports = export.export_sqlite(relations, {('a"b',): ['c"']}, path, 3, ('a"b',))
+    assert reports[0]["verified"] and reports[0]["unique_key"]
+    with sqlite3.connect(path) as connection:
+        assert connection.execute('SELECT COUNT(*) FROM "a""b"').fetchone() == (2,)
+
+
+def test_csv_export_round_trip(tmp_path):
+    relations = {("K",): pd.DataFrame({"K": ["1", "2"], "V": ["a, b", None]})}
+    reports = export.export_csv(relations, {("K",): ["V"]}, str(tmp_path), 3, ("K",))
+    assert reports[0]["verified"]
+    with open(tmp_path / f"{reports[0]['table']}.csv", newline="") as file:
+        assert list(csv.reader(file)) == [["K", "V"], ["1", "a, b"], ["2", ""]]
+
+
+def test_relations_sharing_a_table_name_keep_their_rows(tmp_path):
+    # ("A_B",) and ("A", "B") both join to A_B; the second table must not replace the first
+    relations = {("A_B",): pd.DataFrame({"A_B": ["1", "2"], "C": ["x", "y"]}),
+                 ("A", "B"): pd.DataFrame({"A": ["1"], "B": ["2"], "D": ["z"]}),
+                 ("a_b",): pd.DataFrame({"a_b": ["3"], "E": ["w"]})}
+    fds = {("A_B",): ["C"], ("A", "B"): ["D"], ("a_b",): ["E"]}
+    path = str(tmp_path / "out.db")
+    reports = export.export_sqlite(relations, fds, path, 3, ("A_B",))
+    assert [report["table"] for report in reports] == ["A_B", "A_B_2", "a_b_3"]
+    assert all(report["verified"] for report in reports)
+    with sqlite3.connect(path) as connection:
+        counts = [connection.execute(f'SELECT COUNT(*) FROM "{report["table"]}"').fetchone()[0] for report in reports]
+    assert counts == [2, 1, 1]
+    csv_reports = export.export_csv(relations, fds, str(tmp_path / "csv"), 3, ("A_B",))
+    assert [report["table"] for report in csv_reports] == ["A_B", "A_B_2", "a_b_3"]
+    assert ddl.generate_sql(relations, fds, 3, ("A_B",))[1].startswith("CREATE TABLE A_B_2 (")
@@ -0,0 +1,66 @@
+# Brute-force checks of TANE: every minimal non-trivial FD of a small relation instance, and only those
+import itertools
+import random
+import pandas as pd
+import encoding
+import fd_discovery
+
+
+def holds(rows, lhs, rhs):
+    # True if no two rows (dicts) agree on lhs but differ on rhs
+    seen = {}
+    for row in rows:
+        if seen.setdefault(tuple(row[col] for col in lhs), row[rhs]) != row[rhs]:
+            return False
+    return True
+
+
+def brute_force_fds(frame, max_lhs=None):
+    # Minimal FDs X -> A with a non-empty X, as a set of (lhs tuple, rhs) pairs
+    columns = list(frame.columns)
+    rows = frame.to_dict("records")
+    found = set()
+    for rhs in columns:
+        others = [col for col in columns if col != rhs]
+        minimal = []
+        for size in range(1, (len(others) if max_lhs is None else max_lhs) + 1):
+            for lhs in itertools.combinations(others, size):
+                if not any(set(smaller) <= set(lhs) for smaller in minimal) and holds(rows, lhs, rhs):
+                    minimal.append(lhs)
+        found.update((lhs, rhs) for lhs in minimal)
+    return found
+
+
+def as_pairs(fds):
+    return {(tuple(lhs), rhs) for lhs, rhs_list in fds.items() for rhs in rhs_list}
+
+
+def random_frame(rng, n_columns, n_rows):
+    return pd.DataFrame({f"C{i}": [str(rng.randint(0, rng.randint(1, 3))) for _ in range(n_rows)]
+                         for i in range(n_columns)})
+
+
+def test_discover_fds_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(60):
+        frame = random_frame(rng, rng.randint(2, 5), rng.randint(1, 15))
+        assert as_pairs(fd_discovery.discover_fds(frame)) == brute_force_fds(frame)
+
+
+def test_discover_fds_on_encoded_relation_and_lhs_bound():
+    rng = random.Random(1)
+    for _ in range(20):
+        frame = random_frame(rng, 5, 20)
+        encoded = encoding.encode_relation(frame)
+        assert as_pairs(fd_discovery.discover_fds(encoded)) == brute_force_fds(frame)
+        assert as_pairs(fd_discovery.discover_fds(frame, max_lhs=2)) == brute_force_fds(frame, max_lhs=2)
+
+
+def test_max_lhs_bounds_every_left_hand_side():
+    rng = random.Random(2)
+    for _ in range(150):
+        frame = random_frame(rng, rng.randint(3, 7), rng.randint(1, 60))
+        max_lhs = rng.randint(1, 3)
+        fds = fd_discovery.discover_fds(frame, max_lhs=max_lhs)
+        assert all(len(lhs) <= max_lhs for lhs in fds)
+        assert as_pairs(fds) == brute_force_fds(frame, max_lhs=max_lhs)
@@ -0,0 +1,59 @@
+# Checks incremental init/append against appended rows that are clean, break an FD or repeat known rows
+import json
+import os
+import pandas as pd
+import incremental
+
+BASE = "ID,Name,Dept,Floor\n1,Ann,IT,3\n2,Bob,IT,3\n3,Cid,HR,1\n"
+
+
+def init(tmp_path):
+    (tmp_path / "table.csv").write_text(BASE)
+    (tmp_path / "fds.txt").write_text("ID -> Name, Dept\nDept -> Floor\n")
+    (tmp_path / "key.txt").write_text("ID")
+    manifest = [{"name": "staff", "table": "table.csv", "fds": "fds.txt", "key": "key.txt", "target": "3NF"}]
+    (tmp_path / "manifest.json").write_text(json.dumps(manifest))
+    state = str(tmp_path / "staff.state")
+    assert incremental.main(["init", str(tmp_path / "manifest.json"), "--job", "staff", "--state", state]) == 0
+    return state
+
+
+def append(tmp_path, state, rows, batch="delta"):
+    (tmp_path / "rows.csv").write_text(rows)
+    output_dir = tmp_path / batch
+    status = incremental.main(["append", state, str(tmp_path / "rows.csv"), "--output-dir", str(output_dir)])
+    written = {name[:-4]: pd.read_csv(output_dir / name, dtype=str) for name in os.listdir(output_dir)} \
+        if output_dir.exists() else {}
+    return status, written
+
+
+def test_clean_delta(tmp_path, capsys):
+    state = init(tmp_path)
+    status, written = append(tmp_path, state, "ID,Name,Dept,Floor\n4,Dee,HR,1\n5,Eve,Ops,2\n")
+    assert status == 0
+    assert "violated" not in capsys.readouterr().out
+    new_ids = sorted(value for frame in written.values() if "ID" in frame for value in frame["ID"])
+    assert new_ids == ["4", "5"]
+    assert incremental.load_state(state).rows >= {("4", "Dee", "HR", "1"), ("5", "Eve", "Ops", "2")}
+
+
+def test_delta_with_a_violation(tmp_path, capsys):
+    state = init(tmp_path)
+    status, _ = append(tmp_path, state, "ID,Name,Dept,Floor\n6,Fay,IT,4\n")
+    assert status == 1
+    assert "FD Dept -> Floor violated" in capsys.readouterr().out
+    # The violation is reported once, not again by the next batch
+    status, _ = append(tmp_path, state, "ID,Name,Dept,Floor\n7,Gus,HR,1\n", "delta2")
+    assert status == 0
+
+
+def test_repeated_rows_add_nothing(tmp_path, capsys):
+    state = init(tmp_path)
+    # The blank ID would make pandas read the column as float, and 2 would no longer match "2"
+    status, written = append(tmp_path, state, "ID,Name,Dept,Floor\n2,Bob,IT,3\n,Hal,HR,1\n")
+    assert status == 0
+    assert "violated" not in capsys.readouterr().out
+    new_rows = [row for frame in written.values() for row in frame.itertuples(index=False, name=None)]
+    assert not any("2" in row or "Bob" in row for row in new_rows)
+    status, written = append(tmp_path, state, "ID,Name,Dept,Floor\n1,Ann,IT,3\n1,Ann,IT,3\n", "delta2")
+    assert status == 0 and not written
@@ -0,0 +1,28 @@
+# Checks of the join counting on codes against pandas merges
+import random
+import pandas as pd
+import encoding
+import joins
+
+
+def random_frame(rng, n_rows=40):
+    return pd.DataFrame({col: [str(rng.randint(0, 2)) for _ in range(n_rows)] for col in "ABCD"})
+
+
+def test_join_cardinality_matches_merge():
+    rng = random.Random(0)
+    for _ in range(50):
+        frame = random_frame(rng)
+        left, right = ["A", "B"], ["B", "C", "D"]
+        merged = frame[left].drop_duplicates().merge(frame[right].drop_duplicates(), on="B")
+        encoded = encoding.factorize_columns(frame)
+        assert joins.join_cardinality(encoded, len(frame), left, right) == len(merged)
+
+
+def test_is_lossless_join_matches_merge():
+    rng = random.Random(1)
+    for _ in range(100):
+        frame = random_frame(rng, rng.randint(1, 20))
+        left, right = ["A", "B", "C"], ["A", "D"]
+        merged = frame[left].drop_duplicates().merge(frame[right].drop_duplicates(), on="A")
+        assert joins.is_lossless_join(frame, left, right) == (len(merged) == len(frame.drop_duplicates()))
@@ -0,0 +1,63 @@
+# Brute-force checks of candidate key discovery from FDs and from data
+import itertools
+import random
+import pandas as pd
+import closure
+import keys
+
+
+def random_fds(rng, attributes, n_fds):
+    # Random FDs in the {tuple(lhs): [rhs]} form
+    fds = {}
+    for _ in range(n_fds):
+        lhs = tuple(sorted(rng.sample(attributes, rng.randint(1, min(3, len(attributes))))))
+        fds.setdefault(lhs, []).extend(rng.sample(attributes, rng.randint(1, min(2, len(attributes)))))
+    return fds
+
+
+def minimal_sets(attributes, is_superkey):
+    # Every minimal attribute set passing is_superkey, by walking all subsets smallest first
+    found = []
+    for size in range(len(attributes) + 1):
+        for combo in itertools.combinations(attributes, size):
+            if not any(set(key) <= set(combo) for key in found) and is_superkey(combo):
+                found.append(combo)
+    return found
+
+
+def test_candidate_keys_from_fds_match_brute_force():
+    rng = random.Random(0)
+    for _ in range(200):
+        attributes = [f"A{i}" for i in range(rng.randint(1, 7))]
+        fds = random_fds(rng, attributes, rng.randint(0, 6))
+        engine = closure.ClosureEngine(fds)
+        expected = minimal_sets(attributes, lambda combo: engine.is_superkey(combo, attributes))
+        assert sorted(keys.candidate_keys_from_fds(attributes, fds)) == sorted(expected)
+
+
+def test_candidate_keys_from_data_match_brute_force():
+    rng = random.Random(1)
+    for _ in range(50):
+        columns = [f"C{i}" for i in range(rng.randint(1, 5))]
+        frame = pd.DataFrame({col: [str(rng.randint(0, 2)) for _ in range(12)] for col in columns})
+        frame = frame.drop_duplicates().reset_index(drop=True)
+        expected = minimal_sets(columns, lambda combo: combo and not frame.duplicated(list(combo)).any())
+        assert sorted(keys.candidate_keys_from_data(frame)) == sorted(expected)
+
+
+def test_prime_attributes_match_brute_force():
+    rng = random.Random(2)
+    for _ in range(300):
+        attributes = [f"A{i}" for i in range(rng.randint(1, 7))]
+        fds = random_fds(rng, attributes, rng.randint(0, 6))
+        expected = {attr for key in keys.candidate_keys_from_fds(attributes, fds) for attr in key}
+        assert keys.prime_attributes(attributes, fds) == (expected, set())
+
+
+def test_prime_attributes_stop_at_the_bound():
+    rng = random.Random(3)
+    attributes = [f"A{i}" for i in range(150)]
+    fds = random_fds(rng, attributes, 120)
+    prime, undecided = keys.prime_attributes(attributes, fds, max_checks=100)
+    assert not prime & undecided
+    assert {attr for attr in attributes if not any(attr in rhs for rhs in fds.values())} <= prime
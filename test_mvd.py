@@ -0,0 +1,27 @@
+# Checks of the counting-based MVD test against the join of the two projections
+import random
+import pandas as pd
+import mvd
+
+
+def holds_by_join(frame, x_cols, y_cols):
+    z_cols = [col for col in frame.columns if col not in x_cols + y_cols]
+    joined = frame[x_cols + y_cols].drop_duplicates().merge(frame[x_cols + z_cols].drop_duplicates(), on=x_cols)
+    return len(joined) == len(frame.drop_duplicates())
+
+
+def test_check_mvd_matches_join():
+    rng = random.Random(0)
+    for _ in range(50):
+        n_rows = rng.randint(1, 15)
+        frame = pd.DataFrame({col: [str(rng.randint(0, 2)) for _ in range(n_rows)] for col in "ABCD"})
+        for x_cols, y_cols in ((["A"], ["B"]), (["A", "B"], ["C"]), (["D"], ["A", "B"])):
+            holds, groups = mvd.check_mvd(frame, x_cols, y_cols)
+            assert holds == holds_by_join(frame, x_cols, y_cols)
+            assert holds == groups.empty
+
+
+def test_superkey_determinant():
+    frame = pd.DataFrame({"A": ["1", "2", "3"], "B": ["x", "x", "y"]})
+    assert mvd.is_determinant_unique(frame, ["A"])
+    assert not mvd.is_determinant_unique(frame, ["B"])
@@ -0,0 +1,58 @@
+# Checks of the lazy decomposition plan: projections match pandas, and unused ones are released
+import gc
+import random
+import pandas as pd
+import encoding
+import plan
+import store
+
+
+def random_relation(rng, n_rows=200):
+    frame = pd.DataFrame({col: [str(rng.randint(0, 4)) for _ in range(n_rows)] for col in "ABCD"})
+    return frame, encoding.encode_relation(frame)
+
+
+def test_projections_match_drop_duplicates():
+    rng = random.Random(0)
+    frame, encoded = random_relation(rng)
+    lazy = plan.lazy(encoded)
+    for columns in (["A", "B", "C"], ["B", "A"], ["C"], ["D", "A"]):
+        expected = frame[columns].drop_duplicates().reset_index(drop=True)
+        projected = plan.concrete(plan.project(lazy, columns)).decode().reset_index(drop=True)
+        pd.testing.assert_frame_equal(projected, expected, check_dtype=False)
+
+
+def test_drop_takes_one_column_name():
+    lazy = plan.lazy(pd.DataFrame({"AB": ["1"], "A": ["2"], "B": ["3"]}))
+    assert lazy.drop("AB").columns == ["A", "B"]
+    assert lazy.drop(columns=["A"]).columns == ["AB", "B"]
+
+
+def test_unused_projections_are_released():
+    rng = random.Random(1)
+    _, encoded = random_relation(rng)
+    wide = plan.project(plan.lazy(encoded), ["A", "B", "C"])
+    narrow = wide[["A", "B"]]
+    wide.materialize()
+    cache = wide._cache
+    assert frozenset("ABC") in cache.rows
+    narrow.materialize()  # The wide projection is still live, so it stays
+    assert {frozenset("ABC"), frozenset("AB")} <= set(cache.rows)
+    del wide
+    gc.collect()
+    assert frozenset("ABC") not in cache.rows and frozenset("AB") in cache.rows
+
+
+def test_materialize_all_with_spilling():
+    rng = random.Random(2)
+    frame, encoded = random_relation(rng)
+    try:
+        store.configure(budget_mb=0)
+        lazy = plan.lazy(encoded)
+        relations = {("A",): lazy[["A", "B"]], ("C",): lazy[["C", "D"]]}
+        materialized = plan.materialize_all(relations)
+        for name, columns in ((("A",), ["A", "B"]), (("C",), ["C", "D"])):
+            expected = frame[columns].drop_duplicates().reset_index(drop=True)
+            pd.testing.assert_frame_equal(materialized[name].decode().reset_index(drop=True), expected, check_dtype=False)
+    finally:
+        store.configure(budget_mb=None)
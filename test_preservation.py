@@ -0,0 +1,42 @@
+# Brute-force checks of the dependency-preservation test against FDs projected onto every schema
+import itertools
+import random
+import closure
+import preservation
+
+
+def random_fds(rng, attributes, n_fds):
+    fds = {}
+    for _ in range(n_fds):
+        lhs = tuple(sorted(rng.sample(attributes, rng.randint(1, 2))))
+        fds.setdefault(lhs, []).extend(rng.sample(attributes, rng.randint(1, 2)))
+    return fds
+
+
+def brute_force_lost(fds, schemas):
+    # (lhs, rhs) of every FD not implied by the FDs that hold inside single schemas
+    engine = closure.ClosureEngine(fds)
+    projected = {}
+    for columns in schemas:
+        for size in range(1, len(columns) + 1):
+            for lhs in itertools.combinations(columns, size):
+                projected.setdefault(lhs, []).extend(attr for attr in engine.closure(lhs) if attr in columns)
+    implied = closure.ClosureEngine(projected)
+    return {(tuple(lhs), rhs) for lhs, rhs_list in fds.items() for rhs in rhs_list
+            if rhs not in lhs and rhs not in implied.closure(lhs)}
+
+
+def test_unpreserved_fds_match_brute_force():
+    rng = random.Random(0)
+    attributes = [f"A{i}" for i in range(6)]
+    for _ in range(300):
+        fds = random_fds(rng, attributes, rng.randint(0, 6))
+        schemas = []
+        while set().union(*schemas) != set(attributes):
+            schemas.append(rng.sample(attributes, rng.randint(1, 4)))
+        lost = {(lhs, rhs) for lhs, rhs_list in preservation.unpreserved_fds(fds, schemas) for rhs in rhs_list}
+        assert lost == brute_force_lost(fds, schemas)
+
+
+def test_format_fds():
+    assert preservation.format_fds([(("A", "B"), ["C"]), (("D",), ["E", "F"])]) == "A, B -> C; D -> E, F"
@@ -0,0 +1,66 @@
+# Checks that the cached single-pass profiles give the same 1NF verdicts as the per-column checks they replaced
+import random
+import numpy as np
+import pandas as pd
+import normalizer
+import profiling
+
+
+def old_validate_1NF(relation):
+    # The checks validate_1NF ran before the profiles: two passes over every column
+    for col in relation.columns:
+        if relation[col].map(type).nunique() > 1:
+            return False
+        if relation[col].apply(lambda item: isinstance(item, (list, dict, set))).any():
+            return False
+    return True
+
+
+def old_nested_cols(relation):
+    # The list and set columns transform_to_1NF flattened before the profiles
+    return [col for col in relation.columns if relation[col].apply(normalizer.is_nested_collection).any()]
+
+
+def random_column(rng, kind, n_rows):
+    values = {
+        "list": lambda: [str(rng.randint(0, 3)) for _ in range(rng.randint(0, 3))],
+        "set": lambda: {rng.randint(0, 3) for _ in range(rng.randint(1, 3))},
+        "string": lambda: rng.choice(["x", "y", "z"]),
+        "number": lambda: rng.randint(0, 9),
+    }
+    if kind in values:
+        column = [values[kind]() for _ in range(n_rows)]
+    elif kind == "mixed":  # Mostly strings, with the odd number, list or missing value
+        column = [rng.choice(["x", "y"]) for _ in range(n_rows)]
+        column[rng.randrange(n_rows)] = rng.choice([7, ["x"], np.nan, {"k": 1}])
+    else:  # A few lists among atomic strings, as after parse_multivalued
+        column = [rng.choice(["x", "y"]) for _ in range(n_rows)]
+        column[rng.randrange(n_rows)] = ["x", "y"]
+    return pd.Series(column, dtype="int64" if kind == "number" else object)
+
+
+def test_profiles_match_per_column_checks():
+    rng = random.Random(0)
+    kinds = ["list", "set", "string", "number", "mixed", "rare_list"]
+    for _ in range(100):
+        n_rows = rng.choice([1, 5, 40, 300])
+        columns = rng.sample(kinds, rng.randint(1, 3))
+        frame = pd.DataFrame({f"{kind}{i}": random_column(rng, kind, n_rows) for i, kind in enumerate(columns)})
+        for sample_size in (4, 1000):
+            profiling._PROFILE_CACHE.pop(id(frame), None)
+            profiles = profiling.profile_relation(frame, sample_size=sample_size)
+            in_1NF = not any(profile.n_types > 1 or profile.has_nested for profile in profiles.values())
+            assert in_1NF == old_validate_1NF(frame), (columns, sample_size)
+            full = profiling.profile_relation(frame, sample_size=sample_size, full=True)
+            assert [col for col in frame.columns if full[col].has_collection] == old_nested_cols(frame)
+        assert normalizer.validate_1NF(frame) == old_validate_1NF(frame)
+
+
+def test_list_lengths_and_typed_columns():
+    frame = pd.DataFrame({"L": [["a", "b"], ["c"], [], ["d", "e", "f"]], "N": [1.0, np.nan, 2.0, 3.0],
+                          "S": pd.Series(["a", None, "b", "c"], dtype="string")})
+    profiles = profiling.profile_relation(frame, full=True)
+    assert (profiles["L"].max_length, profiles["L"].mean_length) == (3, 1.5)
+    assert profiles["N"] == profiling.ColumnProfile(1, False, False, 0, 0.0, True)
+    assert profiles["S"].n_types == frame["S"].map(type).nunique() == 2
+    assert all(profiling.profile_relation(frame)[col] is profiles[col] for col in frame.columns)  # Cached
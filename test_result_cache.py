@@ -0,0 +1,49 @@
+# Round-trip checks of the on-disk result cache
+import os
+import pandas as pd
+import encoding
+import result_cache
+
+VALUES = ["", "plain", "trailing nul\x00", "\x00", "non-ascii é中\U0001f600", "x" * 5000, "a,b"]
+
+
+def test_store_and_load_round_trip(tmp_path):
+    frame = pd.DataFrame({"K": VALUES, "V": list(reversed(VALUES))})
+    dictionary = encoding.SharedDictionary()
+    relations = {("K",): encoding.EncodedRelation.from_frame(frame, dictionary),
+                 ("V",): encoding.EncodedRelation.from_frame(frame[["V"]].iloc[2:], dictionary)}
+    fds = {("K",): ["V"]}
+    key = result_cache.result_key(frame, fds, None, ("K",), 3)
+    result_cache.store(str(tmp_path), key, relations, 3, fds)
+
+    loaded, highest_normal_form, loaded_fds = result_cache.load(str(tmp_path), key)
+    assert highest_normal_form == 3 and loaded_fds == fds
+    assert list(loaded) == list(relations)
+    for name, relation in relations.items():
+        pd.testing.assert_frame_equal(loaded[name].decode(), relation.decode())
+
+
+def test_plain_frames_are_stored_encoded(tmp_path):
+    frame = pd.DataFrame({"A": ["1", "2"], "B": ["x", "y\x00"]})
+    result_cache.store(str(tmp_path), "key", {("A",): frame}, 2, None)
+    loaded, _, fds = result_cache.load(str(tmp_path), "key")
+    assert fds is None
+    assert loaded[("A",)].decode().values.tolist() == frame.values.tolist()
+
+
+def test_result_key_depends_on_every_input():
+    frame = pd.DataFrame({"A": ["1", "2"], "B": ["x", "y"]})
+    key = result_cache.result_key(frame, {("A",): ["B"]}, None, ("A",), 3)
+    assert key == result_cache.result_key(frame.copy(), {("A",): ["B"]}, None, ("A",), 3)
+    assert key != result_cache.result_key(frame.assign(B=["x", "z"]), {("A",): ["B"]}, None, ("A",), 3)
+    assert key != result_cache.result_key(frame, {("B",): ["A"]}, None, ("A",), 3)
+    assert key != result_cache.result_key(frame, {("A",): ["B"]}, None, ("A",), 4)
+
+
+def test_missing_and_evicted_entries(tmp_path):
+    assert result_cache.load(str(tmp_path), "missing") is None
+    frame = pd.DataFrame({"A": [str(row) for row in range(1000)]})
+    for number in range(3):
+        result_cache.store(str(tmp_path), f"key{number}", {("A",): frame}, 1, None)
+    result_cache.evict(str(tmp_path), max_mb=0)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".npz")]
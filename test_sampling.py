@@ -0,0 +1,59 @@
+# Checks that the sampled dependency tests agree with full scans, whichever sample finds the counterexample
+import random
+import pandas as pd
+import joins
+import mvd
+import sampling
+
+
+def random_frame(rng, n_rows):
+    return pd.DataFrame({col: [str(rng.randint(0, 3)) for _ in range(n_rows)] for col in "ABCD"})
+
+
+def fd_holds(frame, lhs, rhs):
+    distinct = frame[lhs + rhs].drop_duplicates()
+    return not distinct.duplicated(lhs).any()
+
+
+def test_sampled_checks_match_full_scans():
+    rng = random.Random(0)
+    for _ in range(60):
+        frame = random_frame(rng, rng.randint(1, 200))
+        for sample_size in (2, 16, 10000):
+            verdict = sampling.check_fd(frame, ["A", "B"], ["C"], sample_size=sample_size)
+            assert verdict.holds == fd_holds(frame, ["A", "B"], ["C"])
+            assert sampling.check_unique(frame, ["A", "B"], sample_size=sample_size).holds == (
+                not frame.duplicated(["A", "B"]).any())
+            assert (sampling.check_join(frame, ["A", "B"], ["B", "C", "D"], sample_size=sample_size).holds
+                    == joins.is_lossless_join(frame, ["A", "B"], ["B", "C", "D"]))
+            assert sampling.check_mvd(frame, ["A"], ["B"], sample_size=sample_size).holds == mvd.check_mvd(frame, ["A"], ["B"])[0]
+
+
+def test_samples_missing_a_value_do_not_reject():
+    # Column A takes a value outside most samples; the FD holds and no sample may reject it
+    frame = pd.DataFrame({"A": ["1"] * 50 + ["2"], "B": ["x"] * 50 + ["y"]})
+    assert sampling.check_fd(frame, ["A"], ["B"], sample_size=4).holds
+    assert not sampling.check_unique(frame, ["A"], sample_size=4).holds
+
+
+def test_counterexample_rows_violate_the_fd():
+    frame = pd.DataFrame({"A": ["1"] * 50 + ["2"], "B": ["x", "y"] * 25 + ["z"]})
+    verdict = sampling.check_fd(frame, ["A"], ["B"], sample_size=4)
+    assert not verdict.holds
+    rows = frame.iloc[list(verdict.counterexample)]
+    assert rows["A"].nunique() == 1 and rows["B"].nunique() == 2
+
+
+def test_wide_relations_are_rejected_on_samples():
+    # 60 ** 12 tuples overflow the int64 row keys, so the rows are looked up by hash
+    rng = random.Random(2)
+    columns = [f"C{i}" for i in range(12)]
+    frame = pd.DataFrame({col: [str(rng.randint(0, 59)) for _ in range(20000)] for col in columns})
+    frame = frame.drop_duplicates(ignore_index=True)
+    verdict = sampling.check_join(frame, columns[:7], columns[6:])
+    assert not verdict.holds and not verdict.complete
+    first, second = frame.iloc[verdict.counterexample[0]], frame.iloc[verdict.counterexample[1]]
+    combined = tuple(first[columns[:7]]) + tuple(second[columns[7:]])
+    assert first[columns[6]] == second[columns[6]]
+    assert combined not in set(frame.itertuples(index=False, name=None))
+    assert not sampling.check_mvd(frame, columns[:1], columns[1:6]).complete
@@ -0,0 +1,24 @@
+# Checks that a schema-only run normalizes the header without loading numpy or pandas
+import os
+import subprocess
+import sys
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+
+RUN_MAIN = """
+import runpy, sys
+sys.argv = ["main.py", "--schema-only"]
+try:
+    runpy.run_path("main.py", run_name="__main__")
+except SystemExit:
+    pass
+print("loaded:", sorted(name for name in ("numpy", "pandas") if name in sys.modules))
+"""
+
+
+def test_schema_only_run_leaves_out_numpy_and_pandas():
+    result = subprocess.run([sys.executable, "-c", RUN_MAIN], cwd=REPO, input="exit\n4\n1\nSSN\n",
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert "Provided input schema" in result.stdout
+    assert result.stdout.rstrip().endswith("loaded: []")
@@ -0,0 +1,65 @@
+# Round-trip checks of the spill-to-disk relation store
+import gc
+import os
+import numpy as np
+import pandas as pd
+import encoding
+import store
+
+
+def relation(n_rows, offset=0):
+    frame = pd.DataFrame({"A": [str(row + offset) for row in range(n_rows)], "B": [str(row % 7) for row in range(n_rows)]})
+    return encoding.encode_relation(frame)
+
+
+def test_spilled_relations_read_back_unchanged(tmp_path):
+    relations = store.RelationStore(0, str(tmp_path))  # Every encoded relation goes to disk
+    originals = {name: relation(100, offset=name * 1000) for name in range(3)}
+    for name, rel in originals.items():
+        relations[name] = rel
+    assert relations.spilled() == [0, 1, 2] and relations.resident_mb() == 0
+    for name, rel in originals.items():
+        assert store._is_mapped(relations[name].column_codes("A"))
+        pd.testing.assert_frame_equal(relations[name].decode(), rel.decode())
+
+
+def test_cold_relations_spill_and_hot_ones_reload(tmp_path):
+    first, second = relation(1000), relation(1000, offset=5000)
+    budget_mb = 1.5 * store._resident_bytes(first) / 2 ** 20  # Room for one relation, not two
+    relations = store.RelationStore(budget_mb, str(tmp_path))
+    relations["first"], relations["second"] = first, second
+    assert relations.spilled() == ["first"]
+    reloaded = relations["first"]  # Accessing it makes it the hot one, so the other is spilled
+    assert not store._is_mapped(reloaded.column_codes("A"))
+    assert relations.spilled() == ["second"]
+    pd.testing.assert_frame_equal(reloaded.decode(), first.decode())
+    np.testing.assert_array_equal(relations["second"].column_codes("B"), second.column_codes("B"))
+
+
+def test_delete_and_collect_remove_the_files(tmp_path):
+    relations = store.RelationStore(0, str(tmp_path))
+    relations["a"], relations["b"] = relation(10), relation(10)
+    directory = relations.directory
+    files = len(os.listdir(directory))
+    del relations["a"]
+    assert len(os.listdir(directory)) < files and list(relations) == ["b"]
+    del relations
+    gc.collect()
+    assert not os.path.exists(directory)
+
+
+def test_dataframes_stay_in_memory(tmp_path):
+    relations = store.RelationStore(0, str(tmp_path))
+    frame = pd.DataFrame({"A": ["1"]})
+    relations["frame"] = frame
+    assert relations["frame"] is frame and relations.spilled() == []
+
+
+def test_relation_store_follows_the_configured_budget():
+    try:
+        store.configure(budget_mb=None)
+        assert store.relation_store() == {} and not store.spilling()
+        store.configure(budget_mb=0)
+        assert isinstance(store.relation_store(), store.RelationStore) and store.spilling()
+    finally:
+        store.configure(budget_mb=None)
@@ -0,0 +1,62 @@
+# Checks the stage records and what each verbosity level prints
+import pandas as pd
+import pytest
+import closure
+import tracing
+
+
+@pytest.fixture(autouse=True)
+def restore_tracing():
+    settings = dict(tracing._settings, callbacks=list(tracing._settings["callbacks"]))
+    yield
+    tracing._settings.update(settings)
+    tracing.configure(memory=False)
+    tracing.reset()
+
+
+def test_stage_records():
+    seen = []
+    tracing.reset()
+    tracing.configure(callback=seen.append)
+    relations = {"R": pd.DataFrame({"A": [1, 2, 3]})}
+    with tracing.stage("2NF", relations) as record:
+        closure.get_engine({("A",): ["B"]}).closure(["A"])
+        tracing.count("full_scans")
+        record.output({"R1": relations["R"], "R2": relations["R"].head(1)})
+    [stage] = tracing.records()
+    assert seen == [stage]
+    assert stage["stage"] == "2NF" and stage["seconds"] >= 0
+    assert (stage["relations_in"], stage["relations_out"], stage["rows_in"], stage["rows_out"]) == (1, 2, 3, 4)
+    assert stage["closure_calls"] >= 1 and stage["full_scans"] == 1 and stage["sample_rejections"] == 0
+    assert stage["stage_peak_mb"] is None  # Allocations are not traced by default
+    with pytest.raises(ValueError):
+        with tracing.stage("3NF"):
+            raise ValueError("a failing stage is not recorded")
+    assert len(tracing.records()) == 1
+
+
+def test_stage_peak_is_measured_per_stage():
+    tracing.configure(memory=True)
+    kept = bytearray(8 * 2 ** 20)  # Allocated before the stages, so neither may report it
+    with tracing.stage("big") as big:
+        with tracing.stage("small") as small:
+            small_buffer = bytearray(2 ** 20)
+            del small_buffer
+        big_buffer = bytearray(4 * 2 ** 20)
+        del big_buffer
+    assert 0.9 <= small.record["stage_peak_mb"] < 3
+    assert 3.9 <= big.record["stage_peak_mb"] < 6
+    del kept
+
+
+def test_verbosity_levels(capsys):
+    frame = pd.DataFrame({"A": [1]})
+    for level, printed in ((tracing.QUIET, ""), (tracing.MESSAGES, "note\n"),
+                           (tracing.FRAMES, f"note\nTable:\n{frame}\n\n")):
+        tracing.configure(verbosity=level)
+        tracing.message("note")
+        tracing.show(frame, "Table:")
+        assert capsys.readouterr().out == printed
+        assert tracing.frames_enabled() == (level == tracing.FRAMES)
+    with pytest.raises(ValueError):
+        tracing.configure(verbosity=3)
@@ -0,0 +1,152 @@
+# Stage instrumentation (wall time, rows, relations, closure calls, stage peak memory) and the verbosity
+# level that decides what the normalizer prints
+import json
+import time
+import tracemalloc  # Per-stage peak allocations, traced only when configure(memory=True) asked for them
+import closure
+
+# Verbosity levels: nothing, text messages only, or messages and every intermediate relation
+QUIET, MESSAGES, FRAMES = 0, 1, 2
+
+# Printing everything keeps the interactive program's output; batch and production runs lower it
+_settings = {"verbosity": FRAMES, "callbacks": []}
+_records = []  # Finished stage records, in order
+_open_stages = []  # Stages inside their with block, innermost last
+# Outcomes of the sampled dependency checks (see sampling.py) and relations written to disk by the spill
+# stores (see store.py), counted here so reading them never loads pandas
+_counters = {"sample_rejections": 0, "full_scans": 0, "spilled_relations": 0}
+
+
+def count(counter):
+    # Adds one to a counter reported by the stage records
+    _counters[counter] += 1
+
+
+def configure(verbosity=None, callback=None, memory=None):
+    # Sets the verbosity level, adds a callback called with every finished stage record and/or turns
+    # the tracing of allocations on or off (it slows the allocations down, so it is off by default)
+    if verbosity is not None:
+        if verbosity not in (QUIET, MESSAGES, FRAMES):
+            raise ValueError(f"Unknown verbosity level: {verbosity}")
+        _settings["verbosity"] = verbosity
+    if callback is not None:
+        _settings["callbacks"].append(callback)
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif memory is False and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def frames_enabled():
+    # Check if relations are printed, so callers can skip building frame text altogether
+    return _settings["verbosity"] >= FRAMES
+
+
+def message(text):
+    # Prints a text message unless the run is quiet
+    if _settings["verbosity"] >= MESSAGES:
+        print(text)
+
+
+def show(relation, title=None):
+    # Prints a relation (formatting it is the expensive part) only at the FRAMES level
+    if frames_enabled():
+        if title is None:
+            print(relation)
+            print('\n')
+        else:
+            print(f"{title}\n{relation}\n")
+
+
+def _rows(relations):
+    # Total rows of a dict of relations, or None while some of them are lazy or schema-only,
+    # so counting never materializes anything
+    total = 0
+    for relation in relations.values():
+        if type(relation).__name__ in ("LazyRelation", "SchemaRelation"):
+            return None
+        total += len(relation)
+    return total
+
+
+def _note_peak():
+    # Folds the traced peak since the last reset into every open stage, then resets it, so a stage
+    # nested in another one does not hide the earlier peak of the outer stage
+    peak = tracemalloc.get_traced_memory()[1]
+    for open_stage in _open_stages:
+        open_stage._peak = max(open_stage._peak, peak)
+    tracemalloc.reset_peak()
+
+
+class Stage:
+    # Context manager measuring one pipeline stage; call output() with the relations it produced.
+    # The record holds: stage, seconds, relations_in/out, rows_in/out (None for unmaterialized
+    # relations), closure_calls made during the stage (closure_cache_hits of them answered from the
+    # closure cache), stage_peak_mb, the most memory allocated during the stage on top of what was
+    # allocated when it started (None unless configure(memory=True); worker processes are not traced),
+    # whether the chase proved the stage's decomposition lossless (None when not checked or when the
+    # chase hit its size bound), the unpreserved_fds it lost, as [lhs, rhs] pairs, and how many data-level dependency checks were
+    # settled by a counterexample in a sample (sample_rejections) or needed a full_scans, and how
+    # many relations were spilled_relations to disk to stay within the memory budget.
+
+    def __init__(self, name, relations=None):
+        self.record = {"stage": name, "seconds": None,
+                       "relations_in": len(relations) if relations is not None else None,
+                       "relations_out": None,
+                       "rows_in": _rows(relations) if relations is not None else None,
+                       "rows_out": None, "closure_calls": None, "closure_cache_hits": None, "stage_peak_mb": None,
+                       "lossless": None, "unpreserved_fds": None, "sample_rejections": None, "full_scans": None,
+                       "spilled_relations": None}
+
+    def output(self, relations):
+        self.record["relations_out"] = len(relations)
+        self.record["rows_out"] = _rows(relations)
+
+    def __enter__(self):
+        self._closure_stats = closure.stats()
+        self._counters = dict(_counters)
+        if tracemalloc.is_tracing():
+            _note_peak()
+            self._allocated = self._peak = tracemalloc.get_traced_memory()[0]
+            _open_stages.append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.record["seconds"] = round(time.perf_counter() - self._start, 6)
+        closure_stats = closure.stats()
+        self.record["closure_calls"] = closure_stats["closure_calls"] - self._closure_stats["closure_calls"]
+        self.record["closure_cache_hits"] = closure_stats["closure_hits"] - self._closure_stats["closure_hits"]
+        if self in _open_stages:
+            if tracemalloc.is_tracing():
+                _note_peak()
+                self.record["stage_peak_mb"] = round((self._peak - self._allocated) / 2 ** 20, 3)
+            _open_stages.remove(self)
+        for counter, value in _counters.items():
+            self.record[counter] = value - self._counters[counter]
+        if exc_type is None:
+            _records.append(self.record)
+            for callback in _settings["callbacks"]:
+                callback(self.record)
+        return False
+
+
+def stage(name, relations=None):
+    # Measures the stage run inside the with block:  with tracing.stage("3NF", relations) as record: ...
+    return Stage(name, relations)
+
+
+def records():
+    # The stage records of this process so far
+    return list(_records)
+
+
+def reset():
+    # Forgets the recorded stages (e.g. between the tables of a batch)
+    _records.clear()
+
+
+def write_json(path):
+    # Writes the recorded stages as a JSON trace
+    with open(path, 'w') as file:
+        json.dump(records(), file, indent=2)